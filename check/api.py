@@ -0,0 +1,183 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .dashboard import (
+    CHAVE_ALERTA_ENTREGA, CHAVE_PORCENTAGEM_MODELO, CHAVE_POR_TURNO, CHAVE_STATUS, Dashboard,
+    contar_alertas_entrega, contar_por_status, obter_widgets, porcentagem_por_modelo, retiradas_por_turno,
+    versao_dashboard,
+)
+from .eventos import ultima_transacao
+from .historico import TAMANHO_MAXIMO_PAGINA, TAMANHO_PAGINA, consultar_linha_do_tempo
+from .models import Equipamento, Usuario
+from .paginacao import decodificar_cursor
+from .periodos import PERIODOS, FiltroInvalido, ler_filtro
+
+# Parâmetros de filtro aceitos por todos os widgets (ver `ler_filtro`).
+PARAMETROS_FILTRO = [
+    openapi.Parameter(
+        'periodo', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(PERIODOS),
+        description="Período predefinido.",
+    ),
+    openapi.Parameter(
+        'inicio', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Início do período: AAAA-MM-DD ou data e hora ISO.",
+    ),
+    openapi.Parameter(
+        'fim', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Fim do período: AAAA-MM-DD (inclui o dia) ou data e hora ISO.",
+    ),
+    openapi.Parameter(
+        'turno', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[codigo for codigo, _ in Usuario.TURNOS],
+        description="Código do turno.",
+    ),
+]
+
+
+def widget_condicional(nome):
+    """
+    Decorador das views de widgets do dashboard, com suporte a requisições condicionais.
+
+    A ETag do widget é calculada sem calcular o widget, a partir da última transação, da versão
+    dos dados do dashboard (renovada a cada escrita, ver `versao_dashboard`) e dos filtros. Se o
+    cliente enviar `If-None-Match` com a ETag atual (ou `If-Modified-Since` não anterior à versão),
+    a resposta é 304, sem corpo. O widget de alertas, que muda com a passagem do tempo, também
+    considera a janela de `DASHBOARD_ALERTA_CACHE_TIMEOUT` segundos e, como os widgets filtrados,
+    não envia `Last-Modified`.
+
+    A view decorada recebe a requisição e o filtro (ver `ler_filtro`) e devolve os dados do
+    widget; a resposta acrescenta "ultima_transacao", a partir da qual o cliente pode acompanhar
+    o fluxo de eventos do dashboard.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(request):
+            try:
+                filtro = ler_filtro(request.query_params)
+            except FiltroInvalido as erro:
+                raise ValidationError({'erro': str(erro)})
+
+            ultima, versao = ultima_transacao(), versao_dashboard()
+            partes = [nome, ultima, versao, *filtro.values()]
+            filtrado = any(valor is not None for valor in filtro.values())
+            if nome == 'alertas':
+                partes.append(int(time.time() // settings.DASHBOARD_ALERTA_CACHE_TIMEOUT))
+            etag = '"%s"' % hashlib.sha1(repr(partes).encode()).hexdigest()
+            ultima_modificacao = None if filtrado or nome == 'alertas' else versao // 10 ** 9
+
+            resposta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+            if resposta is None:
+                resposta = Response({'ultima_transacao': ultima, **view(request, filtro)})
+            resposta['ETag'] = etag
+            if ultima_modificacao is not None:
+                resposta['Last-Modified'] = http_date(ultima_modificacao)
+            resposta['Cache-Control'] = 'private, no-cache'  # Sempre revalidado pela ETag
+            return resposta
+        return wrapper
+    return decorador
+
+
+def _widget(chave, calcular, filtro):
+    """Dados de um widget: do cache do dashboard sem filtros, ou calculados para o filtro."""
+    if any(valor is not None for valor in filtro.values()):
+        return calcular(**filtro)
+    return obter_widgets([chave])[chave]
+
+
+@swagger_auto_schema(method='get', manual_parameters=PARAMETROS_FILTRO)
+@api_view(['GET'])
+@widget_condicional('status')
+def widget_status(request, filtro):
+    """
+    Equipamentos em operação, disponíveis e em manutenção, e o gráfico de controle.
+
+    Com filtros, apenas os equipamentos em operação são filtrados (ver `contar_por_status`).
+    """
+    status = _widget(CHAVE_STATUS, contar_por_status, filtro)
+    return {**status, 'controle': Dashboard(**status).controle}
+
+
+@swagger_auto_schema(method='get', manual_parameters=PARAMETROS_FILTRO)
+@api_view(['GET'])
+@widget_condicional('alertas')
+def widget_alertas(request, filtro):
+    """Quantidade de equipamentos em alerta de entrega."""
+    return {'total_alerta_entrega': _widget(CHAVE_ALERTA_ENTREGA, contar_alertas_entrega, filtro)}
+
+
+@swagger_auto_schema(method='get', manual_parameters=PARAMETROS_FILTRO)
+@api_view(['GET'])
+@widget_condicional('porcentagem_modelo')
+def widget_porcentagem_modelo(request, filtro):
+    """Porcentagem de retiradas por modelo ("categories" e "series")."""
+    return _widget(CHAVE_PORCENTAGEM_MODELO, porcentagem_por_modelo, filtro)
+
+
+@swagger_auto_schema(method='get', manual_parameters=PARAMETROS_FILTRO)
+@api_view(['GET'])
+@widget_condicional('por_turno')
+def widget_por_turno(request, filtro):
+    """
+    Retiradas por dia da semana e turno, no formato do Chart.js. Sem filtros, considera os
+    últimos `DASHBOARD_POR_TURNO_DIAS` dias.
+    """
+    if any(valor is not None for valor in filtro.values()):
+        return retiradas_por_turno(**filtro)
+    return obter_widgets([CHAVE_POR_TURNO])[CHAVE_POR_TURNO]['grafico']
+
+
+# Parâmetros de paginação da linha do tempo de um equipamento.
+PARAMETROS_HISTORICO = [
+    openapi.Parameter(
+        'cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Cursor \"proximo\" da página anterior. Sem ele, retorna as transações mais recentes.",
+    ),
+    openapi.Parameter(
+        'tamanho', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+        description=f"Transações por página (padrão {TAMANHO_PAGINA}, no máximo {TAMANHO_MAXIMO_PAGINA}).",
+    ),
+]
+
+
+@swagger_auto_schema(method='get', manual_parameters=PARAMETROS_HISTORICO)
+@api_view(['GET'])
+def historico_equipamento(request, equipamento_id):
+    """
+    Linha do tempo de um equipamento: as suas transações, inclusive as arquivadas, da mais recente
+    para a mais antiga, com cada retirada pareada à sua devolução e a duração da posse (ver
+    `consultar_linha_do_tempo`). A resposta traz o cursor da próxima página em "proximo".
+    """
+    equipamento = get_object_or_404(Equipamento, pk=equipamento_id)
+
+    chave = None
+    if request.query_params.get('cursor'):
+        chave = decodificar_cursor(request.query_params['cursor'])
+        if chave is None:
+            raise ValidationError({'erro': "Cursor inválido."})
+    try:
+        tamanho = int(request.query_params.get('tamanho') or TAMANHO_PAGINA)
+    except ValueError:
+        raise ValidationError({'erro': "O tamanho da página deve ser um número inteiro."})
+    tamanho = min(max(tamanho, 1), TAMANHO_MAXIMO_PAGINA)
+
+    return Response({
+        'equipamento': {
+            'id': equipamento.id,
+            'serial_number': equipamento.serial_number,
+            'modelo': equipamento.modelo,
+            'marca': equipamento.marca,
+            'status': equipamento.status,
+            'usuario_atual': equipamento.usuario_atual,
+        },
+        **consultar_linha_do_tempo(equipamento, chave, tamanho),
+    })
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CheckConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'check'
+
+    def ready(self):
+        # Registra os receivers que invalidam o cache do dashboard e o que ajusta as conexões do SQLite.
+        from . import banco, signals  # noqa: F401
@@ -0,0 +1,91 @@
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Equipamento, RegistroTransacao, RegistroTransacaoArquivo
+from .periodos import inicio_do_dia
+
+CAMPOS = ['id', 'equipamento_id', 'usuario_login', 'turno', 'tipo', 'login_registrado', 'timestamp']
+
+
+def corte_do_arquivo(meses=None, hoje=None):
+    """
+    Limite do arquivamento: a meia-noite local do dia de `meses` meses atrás. O corte em um início
+    de dia mantém cada dia inteiro em uma só tabela.
+
+    Args:
+        meses (int, opcional): Meses de histórico mantidos na tabela de transações. Usa
+                               `ARQUIVO_TRANSACOES_MESES` se omitido.
+        hoje (date, opcional): Dia de referência. Usa `timezone.localdate()` se omitido.
+
+    Returns:
+        datetime: Transações anteriores a este instante podem ser arquivadas.
+    """
+    meses = settings.ARQUIVO_TRANSACOES_MESES if meses is None else meses
+    return inicio_do_dia((hoje or timezone.localdate()) - relativedelta(months=meses))
+
+
+def arquivar_transacoes(corte, lote=5000):
+    """
+    Move para `RegistroTransacaoArquivo` as transações anteriores a `corte`.
+
+    A última transação de cada equipamento (`Equipamento.ultima_transacao`) permanece na tabela de
+    transações, qualquer que seja a sua data, pois é referenciada pelo estado de posse. As
+    transações são movidas em lotes de `lote`, cada lote em uma transação de banco (cópia e
+    remoção), de modo que uma interrupção não perde nem duplica registros. A remoção é um único
+    `DELETE` por lote, sem os sinais por objeto do ORM: o dashboard deve ser invalidado uma vez
+    ao final (ver `invalidar_dashboard`). O resumo diário não é alterado.
+
+    Args:
+        corte (datetime): Transações anteriores a este instante são arquivadas.
+        lote (int, opcional): Transações movidas por transação de banco.
+
+    Returns:
+        int: Quantidade de transações arquivadas.
+    """
+    referenciadas = Equipamento.objects.filter(ultima_transacao__isnull=False).values('ultima_transacao')
+    antigas = (
+        RegistroTransacao.objects.filter(timestamp__lt=corte)
+        .exclude(id__in=referenciadas)
+        .order_by('id')
+        .values_list(*CAMPOS)
+    )
+    tabela = connection.ops.quote_name(RegistroTransacao._meta.db_table)
+    arquivadas, ultimo_id = 0, 0
+
+    while True:
+        with transaction.atomic():
+            linhas = list(antigas.filter(id__gt=ultimo_id)[:lote])
+            if not linhas:
+                break
+            RegistroTransacaoArquivo.objects.bulk_create(
+                RegistroTransacaoArquivo(**dict(zip(CAMPOS, linha))) for linha in linhas
+            )
+            ids = [linha[0] for linha in linhas]
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {tabela} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+        arquivadas += len(linhas)
+        ultimo_id = ids[-1]
+    return arquivadas
+
+
+def fronteira_do_arquivo():
+    """
+    Instante da transação arquivada mais recente, ou None se o arquivo estiver vazio. Períodos que
+    começam depois dele não precisam consultar o arquivo.
+
+    O valor é lido a cada chamada, no índice de `timestamp` do arquivo (uma única entrada), e não
+    mantido em cache: o arquivamento roda em outro processo (o comando `arquivar_transacoes`), e
+    o cache local de cada worker não seria invalidado por ele.
+
+    Returns:
+        datetime or None: Instante da transação arquivada mais recente.
+    """
+    return RegistroTransacaoArquivo.objects.order_by('-timestamp').values_list('timestamp', flat=True).first()
+
+
+def alcanca_o_arquivo(inicio):
+    """Indica se um período que começa em `inicio` (None = sem limite) inclui transações arquivadas."""
+    fronteira = fronteira_do_arquivo()
+    return fronteira is not None and (inicio is None or inicio <= fronteira)
@@ -0,0 +1,125 @@
+import string
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from .busca import normalizar_serial, proximo_prefixo
+from .models import Equipamento, Usuario
+
+# O UPPER do SQLite só converte letras ASCII; o termo é convertido da mesma forma para que a
+# comparação com o índice `Upper(...)` seja consistente.
+MAIUSCULAS_ASCII = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+
+def _maiusculas(texto):
+    if connection.vendor == 'sqlite':
+        return texto.translate(MAIUSCULAS_ASCII)
+    return texto.upper()
+
+
+def _comeca_com(campo, prefixo):
+    """Filtro de prefixo como intervalo, que o banco resolve pelo índice do campo."""
+    return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': proximo_prefixo(prefixo)})
+
+
+def _usuarios(prefixo, limite):
+    prefixo = _maiusculas(prefixo.strip())
+    if not prefixo:
+        return ()
+    usuarios = Usuario.objects.annotate(
+        login_maiusculo=Upper('login_usuario'), nome_maiusculo=Upper('nome_usuario')
+    )
+    # Uma consulta por índice, cada uma já ordenada pelo próprio índice e limitada, em vez de um
+    # OR que precisaria ordenar todas as linhas encontradas.
+    por_login = (
+        usuarios.filter(_comeca_com('login_maiusculo', prefixo))
+        .order_by('login_maiusculo')
+        .values_list('login_usuario', 'nome_usuario')[:limite]
+    )
+    por_nome = (
+        usuarios.filter(_comeca_com('nome_maiusculo', prefixo))
+        .order_by('nome_maiusculo')
+        .values_list('login_usuario', 'nome_usuario')[:limite]
+    )
+    sugestoes = dict(por_login)
+    if len(sugestoes) < limite:
+        for login, nome in por_nome:
+            sugestoes.setdefault(login, nome)
+    return tuple((login, f"{nome} ({login})") for login, nome in list(sugestoes.items())[:limite])
+
+
+def _equipamentos(prefixo, limite):
+    prefixo = normalizar_serial(prefixo.strip())
+    if not prefixo:
+        return ()
+    equipamentos = (
+        Equipamento.objects.filter(_comeca_com('serial_normalizado', prefixo))
+        .order_by('serial_normalizado')
+        .values_list('serial_number', 'modelo')[:limite]
+    )
+    return tuple((serial, f"{serial} - {modelo}") for serial, modelo in equipamentos)
+
+
+CONSULTAS = {
+    'usuarios': _usuarios,
+    'equipamentos': _equipamentos,
+}
+
+
+def _consultar(tipo, prefixo, limite, janela):
+    # `janela` só faz parte da chave: muda a cada AUTOCOMPLETAR_CACHE_TIMEOUT segundos, expirando
+    # as sugestões gravadas por outros processos.
+    return CONSULTAS[tipo](prefixo, limite)
+
+
+# Consulta com o cache LRU, criada no primeiro uso com o tamanho configurado naquele momento.
+_em_cache = {'tamanho': None, 'consultar': None}
+
+
+def _consultar_em_cache():
+    """`_consultar` com o cache LRU, recriado (vazio) se `AUTOCOMPLETAR_CACHE_TAMANHO` mudar."""
+    tamanho = settings.AUTOCOMPLETAR_CACHE_TAMANHO
+    if _em_cache['consultar'] is None or _em_cache['tamanho'] != tamanho:
+        _em_cache.update(tamanho=tamanho, consultar=lru_cache(maxsize=tamanho)(_consultar))
+    return _em_cache['consultar']
+
+
+def autocompletar(tipo, prefixo, limite):
+    """
+    Sugere logins de usuários ou números de série que começam com o texto digitado.
+
+    Usuários são comparados pelo início do login e, se faltarem sugestões, pelo início do nome, sem
+    diferenciar maiúsculas; equipamentos, pelo início do número de série normalizado (ver
+    `normalizar_serial`). As consultas são intervalos em índices e trazem no máximo `limite` linhas.
+
+    Os prefixos consultados ficam em um cache LRU do próprio processo, com até
+    `AUTOCOMPLETAR_CACHE_TAMANHO` entradas (configuração lida a cada chamada) válidas por
+    `AUTOCOMPLETAR_CACHE_TIMEOUT` segundos. O cache é limpo pelos signals quando um usuário ou
+    equipamento é salvo neste processo.
+
+    Args:
+        tipo (str): 'usuarios' ou 'equipamentos'.
+        prefixo (str): Texto digitado.
+        limite (int): Quantidade máxima de sugestões.
+
+    Returns:
+        tuple: Pares (valor, rótulo): usuários encontrados pelo login e depois pelo nome, e
+               equipamentos, em ordem alfabética.
+
+    Raises:
+        KeyError: Se o tipo não for suportado.
+    """
+    if tipo not in CONSULTAS:
+        raise KeyError(tipo)
+    janela = int(time.monotonic() // settings.AUTOCOMPLETAR_CACHE_TIMEOUT)
+    return _consultar_em_cache()(tipo, prefixo, limite, janela)
+
+
+def limpar_cache_autocompletar():
+    """Descarta as sugestões em cache neste processo."""
+    if _em_cache['consultar'] is not None:
+        _em_cache['consultar'].cache_clear()
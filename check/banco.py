@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    """
+    Aplica os PRAGMAs de `SQLITE_PRAGMAS` a cada nova conexão com o SQLite.
+
+    Os PRAGMAs valem por conexão (exceto o journal_mode=WAL, gravado no próprio arquivo), por isso
+    são aplicados, na ordem da configuração, quando a conexão é aberta. O journal_mode só é
+    alterado se for diferente do atual. Com `CONN_MAX_AGE`, isso ocorre uma vez por conexão
+    persistente, e não a cada requisição.
+
+    Args:
+        sender (type): Classe do backend que abriu a conexão.
+        connection (BaseDatabaseWrapper): Conexão recém-aberta.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nome, valor in settings.SQLITE_PRAGMAS.items():
+            if nome == 'journal_mode':
+                # Trocar o modo exige acesso exclusivo ao banco; consultá-lo, não.
+                cursor.execute('PRAGMA journal_mode')
+                if cursor.fetchone()[0].lower() == str(valor).lower():
+                    continue
+            cursor.execute(f'PRAGMA {nome} = {valor}')
+
@@ -0,0 +1,144 @@
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Equipamento
+
+# Caracteres removidos do número de série na normalização (a mesma do campo
+# `Equipamento.serial_normalizado`).
+SEPARADORES_SERIAL = ' -/.'
+
+# Tamanho mínimo do termo para a busca por trecho no meio do número de série, que usa um índice
+# de trigramas.
+TAMANHO_MINIMO_TRECHO = 3
+
+# Índice de trigramas do número de série no SQLite: uma tabela FTS5 de conteúdo externo
+# sincronizada por triggers.
+TABELA_FTS = 'check_equipamento_serial_fts'
+SQL_INDICE_SQLITE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        serial_normalizado, content='check_equipamento', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, serial_normalizado) VALUES (new.id, new.serial_normalizado);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, serial_normalizado)
+        VALUES ('delete', old.id, old.serial_normalizado);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF serial_number ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, serial_normalizado)
+        VALUES ('delete', old.id, old.serial_normalizado);
+        INSERT INTO {TABELA_FTS}(rowid, serial_normalizado) VALUES (new.id, new.serial_normalizado);
+    END
+    """,
+]
+
+# No PostgreSQL, um índice GIN de trigramas atende diretamente ao `LIKE '%...%'`.
+SQL_INDICE_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS equip_serial_norm_trgm_idx
+    ON check_equipamento USING gin (serial_normalizado gin_trgm_ops)
+    """,
+]
+
+
+def garantir_indice_trecho(conexao):
+    """
+    Cria, se ainda não existir, o índice de trigramas usado na busca por trecho do número de série.
+
+    O índice é criado pela migração 0011 (que tem a sua própria cópia do SQL) e esta função é
+    chamada após cada `migrate`, pois o SQLite recria a tabela de equipamentos em algumas
+    alterações de esquema, descartando os triggers que mantêm o índice. Quando os triggers precisam
+    ser recriados, o índice é reconstruído a partir da tabela.
+
+    Args:
+        conexao: Conexão de banco de dados (ex.: `schema_editor.connection`).
+    """
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{TABELA_FTS}_%'],
+            )
+            completo = cursor.fetchone()[0] == 3
+            for sql in SQL_INDICE_SQLITE:
+                cursor.execute(sql)
+            if not completo:
+                cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+        elif conexao.vendor == 'postgresql':
+            for sql in SQL_INDICE_POSTGRESQL:
+                cursor.execute(sql)
+
+
+def normalizar_serial(texto):
+    """Normaliza um número de série como o campo `Equipamento.serial_normalizado`."""
+    texto = texto or ''
+    for separador in SEPARADORES_SERIAL:
+        texto = texto.replace(separador, '')
+    return texto.upper()
+
+
+def proximo_prefixo(prefixo):
+    """Menor texto maior que todos os textos que começam com `prefixo`."""
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def _contem_trecho(termo):
+    """Filtro de equipamentos cujo número de série normalizado contém `termo`, pelo índice de trigramas."""
+    if connection.vendor == 'sqlite':
+        # O termo vai como uma frase do FTS5, na qual as aspas são escritas duplicadas.
+        frase = '"%s"' % termo.replace('"', '""')
+        return Q(id__in=RawSQL(
+            f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s", [frase]
+        ))
+    return Q(serial_normalizado__contains=termo)
+
+
+def buscar_por_serial(termo):
+    """
+    Busca equipamentos pelo número de série, ordenados por relevância.
+
+    O termo é normalizado (sem espaços, hífens, barras e pontos, em maiúsculas) e comparado com
+    `Equipamento.serial_normalizado`. Todas as comparações usam índices:
+        - número de série igual ao termo e números que começam com o termo: intervalo no índice
+          B-tree do campo normalizado;
+        - números que contêm o termo em outra posição (termos com pelo menos
+          `TAMANHO_MINIMO_TRECHO` caracteres): índice de trigramas (FTS5 no SQLite, pg_trgm no
+          PostgreSQL).
+
+    Args:
+        termo (str): Número de série completo ou parcial digitado pelo usuário.
+
+    Returns:
+        QuerySet: Equipamentos encontrados, anotados com 'relevancia' (0 = igual, 1 = começa com o
+                  termo, 2 = contém o termo) e ordenados por relevância e número de série.
+    """
+    termo = normalizar_serial(termo)
+    if not termo:
+        return Equipamento.objects.none()
+
+    igual = Q(serial_normalizado=termo)
+    comeca_com = Q(serial_normalizado__gte=termo, serial_normalizado__lt=proximo_prefixo(termo))
+    filtro = comeca_com
+    if len(termo) >= TAMANHO_MINIMO_TRECHO:
+        filtro |= _contem_trecho(termo)
+
+    return (
+        Equipamento.objects.filter(filtro)
+        .annotate(relevancia=Case(
+            When(igual, then=Value(0)),
+            When(comeca_com, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ))
+        .order_by('relevancia', 'serial_normalizado', 'id')
+    )
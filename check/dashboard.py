@@ -0,0 +1,580 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractWeekDay
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+
+from .arquivo import alcanca_o_arquivo
+from .models import Equipamento, RegistroTransacao, RegistroTransacaoArquivo, ResumoDiario
+from .periodos import alinhado_ao_dia, inicio_do_dia
+
+# Turnos exibidos no gráfico semanal, na ordem das séries, com as respectivas cores.
+TURNOS = {'T1': 'Manhã', 'T2': 'Tarde', 'T3': 'Noite'}
+CORES_TURNOS = ['rgba(75, 192, 192, 1)', 'rgba(153, 102, 255, 1)', 'rgba(255, 99, 132, 1)']
+DIAS_DA_SEMANA = ["Dom", "Seg", "Ter", "Qua", "Qui", "Sex", "Sab"]
+
+# Chaves de cache de cada widget do dashboard.
+CHAVE_STATUS = 'dashboard:status'
+CHAVE_ALERTA_ENTREGA = 'dashboard:alerta_entrega'
+CHAVE_PORCENTAGEM_MODELO = 'dashboard:porcentagem_modelo'
+CHAVE_POR_TURNO = 'dashboard:por_turno'
+CHAVES_DASHBOARD = [CHAVE_STATUS, CHAVE_ALERTA_ENTREGA, CHAVE_PORCENTAGEM_MODELO, CHAVE_POR_TURNO]
+
+# Chave da versão dos dados do dashboard, renovada a cada invalidação (ver `versao_dashboard`).
+CHAVE_VERSAO = 'dashboard:versao'
+
+
+@dataclass
+class Dashboard:
+    """
+    Resultado consolidado do dashboard: contadores dos cards e dados de todos os gráficos.
+
+    Attributes:
+        total_em_operacao (int): Equipamentos com status "Retirado".
+        total_disponivel (int): Equipamentos com status "Disponível".
+        total_manutencao (int): Equipamentos com status "Manutenção".
+        total_alerta_entrega (int): Equipamentos retirados há mais tempo que o limite de entrega.
+        porcentagem_modelo (dict): Gráfico de retiradas por modelo ("categories" e "series").
+        por_turno (dict): Gráfico de retiradas por dia da semana e turno, no formato do Chart.js.
+    """
+    total_em_operacao: int = 0
+    total_disponivel: int = 0
+    total_manutencao: int = 0
+    total_alerta_entrega: int = 0
+    porcentagem_modelo: dict = field(default_factory=dict)
+    por_turno: dict = field(default_factory=dict)
+
+    @property
+    def info(self):
+        """Dados dos cards do dashboard."""
+        return {
+            "total_em_operacao": self.total_em_operacao,
+            "total_disponivel": self.total_disponivel,
+            "total_manutencao": self.total_manutencao,
+            "total_alerta_entrega": self.total_alerta_entrega,
+        }
+
+    @property
+    def controle(self):
+        """Dados do gráfico de distribuição de equipamentos por status."""
+        return {
+            "categories": ["Em operação", "Disponível", "Manutenção"],
+            "series": [self.total_em_operacao, self.total_disponivel, self.total_manutencao],
+        }
+
+
+def consultar_equipamentos_em_operacao():
+    """
+    Consulta os equipamentos retirados junto com os dados da posse atual de cada um.
+
+    O operador e a data da retirada vêm do estado de posse mantido no próprio equipamento, e o
+    tipo da última transação de uma junção pela chave primária, de modo que toda a tabela é
+    montada em uma única consulta SQL, sem percorrer o histórico de transações.
+
+    Returns:
+        QuerySet: Dicionários com as chaves 'id', 'serial_number', 'modelo', 'marca', 'status',
+                  'tipo_transacao', 'usuario' e 'timestamp'. Os três últimos são None quando o
+                  equipamento não possui transações registradas.
+    """
+    return (
+        Equipamento.objects.filter(status='Retirado')
+        .annotate(
+            tipo_transacao=F('ultima_transacao__tipo'),
+            usuario=F('usuario_atual'),
+            timestamp=F('retirado_em'),
+        )
+        .order_by('id')
+        .values('id', 'serial_number', 'modelo', 'marca', 'status', 'tipo_transacao', 'usuario', 'timestamp')
+    )
+
+
+def linha_em_operacao(equipamento, numero):
+    """
+    Formata um equipamento de `consultar_equipamentos_em_operacao` como linha da tabela do dashboard.
+
+    Args:
+        equipamento (dict): Equipamento retornado pela consulta.
+        numero (int): Posição da linha na tabela.
+
+    Returns:
+        dict: Colunas da linha no formato do DataTables.
+    """
+    timestamp = equipamento['timestamp']
+    if timestamp:
+        timestamp = timezone.localtime(timestamp)
+    return {
+        'numero': numero,
+        'id': equipamento['id'],
+        'serial_number': equipamento['serial_number'],
+        'modelo': equipamento['modelo'],
+        'usuario': equipamento['usuario'] or 'Não disponível',
+        'data': date_format(timestamp, 'm/d/Y') if timestamp else 'Não disponível',
+        'hora': date_format(timestamp, 'H:i') if timestamp else 'Não disponível',
+        'status': equipamento['status'],
+    }
+
+
+def _filtro_posse(inicio=None, fim=None, turno=None):
+    """Filtro de equipamentos pelo início da posse (`retirado_em`) no período e pelo turno da retirada."""
+    filtro = Q()
+    if inicio is not None:
+        filtro &= Q(retirado_em__gte=inicio)
+    if fim is not None:
+        filtro &= Q(retirado_em__lt=fim)
+    if turno is not None:
+        filtro &= Q(ultima_transacao__turno=turno)
+    return filtro
+
+
+def _agregados_por_status(inicio, fim, turno):
+    """Agregações de `contar_por_status`, compartilhadas com a versão assíncrona."""
+    return {
+        'total_em_operacao': Count('id', filter=Q(status='Retirado') & _filtro_posse(inicio, fim, turno)),
+        'total_disponivel': Count('id', filter=Q(status='Disponível')),
+        'total_manutencao': Count('id', filter=Q(status='Manutenção')),
+    }
+
+
+def contar_por_status(inicio=None, fim=None, turno=None):
+    """
+    Conta os equipamentos de cada status em uma única consulta agregada.
+
+    Os filtros restringem apenas os equipamentos em operação, pela data e pelo turno da retirada
+    atual; disponíveis e em manutenção refletem sempre o estado atual do inventário.
+
+    Args:
+        inicio (datetime, opcional): Início do período (inclusive).
+        fim (datetime, opcional): Fim do período (exclusive).
+        turno (str, opcional): Código do turno da retirada.
+
+    Returns:
+        dict: Chaves "total_em_operacao", "total_disponivel" e "total_manutencao".
+    """
+    return Equipamento.objects.aggregate(**_agregados_por_status(inicio, fim, turno))
+
+
+async def acontar_por_status(inicio=None, fim=None, turno=None):
+    """Versão assíncrona de `contar_por_status`."""
+    return await Equipamento.objects.aaggregate(**_agregados_por_status(inicio, fim, turno))
+
+
+def consultar_equipamentos_em_atraso(agora=None, inicio=None, fim=None, turno=None):
+    """
+    Consulta os equipamentos retirados há mais tempo que o limite de entrega, em uma única consulta.
+
+    O início da posse é o campo `retirado_em` do equipamento, gravado na última retirada e
+    coberto pelo índice (status, retirado_em). O limite de cada equipamento é resolvido no
+    próprio SQL, nesta ordem de prioridade:
+        1. `ALERTA_ENTREGA_HORAS_POR_MODELO`, pelo modelo do equipamento;
+        2. `ALERTA_ENTREGA_HORAS_POR_TURNO`, pelo turno gravado na retirada;
+        3. `ALERTA_ENTREGA_HORAS`, para os demais.
+
+    Args:
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+        inicio (datetime, opcional): Considera apenas retiradas a partir deste instante.
+        fim (datetime, opcional): Considera apenas retiradas anteriores a este instante.
+        turno (str, opcional): Considera apenas retiradas deste turno.
+
+    Returns:
+        QuerySet: Dicionários com 'id', 'serial_number', 'modelo', 'marca', 'usuario' e
+                  'ultima_retirada', ordenados da retirada mais antiga para a mais recente.
+    """
+    agora = agora or timezone.now()
+    por_modelo = settings.ALERTA_ENTREGA_HORAS_POR_MODELO
+    por_turno = settings.ALERTA_ENTREGA_HORAS_POR_TURNO
+
+    equipamentos = Equipamento.objects.filter(Q(status='Retirado') & _filtro_posse(inicio, fim, turno)).annotate(
+        ultima_retirada=F('retirado_em'),
+        usuario=F('usuario_atual'),
+    )
+
+    regras = [
+        When(modelo=modelo, then=Value(agora - timedelta(hours=horas)))
+        for modelo, horas in por_modelo.items()
+    ]
+    if por_turno:
+        equipamentos = equipamentos.annotate(turno=F('ultima_transacao__turno'))
+        regras += [
+            When(turno=turno, then=Value(agora - timedelta(hours=horas)))
+            for turno, horas in por_turno.items()
+        ]
+
+    limite_padrao = Value(agora - timedelta(hours=settings.ALERTA_ENTREGA_HORAS))
+    limite = Case(*regras, default=limite_padrao, output_field=DateTimeField()) if regras else limite_padrao
+
+    return (
+        equipamentos.annotate(limite=limite)
+        .filter(ultima_retirada__lt=F('limite'))
+        .order_by('ultima_retirada', 'id')
+        .values('id', 'serial_number', 'modelo', 'marca', 'usuario', 'ultima_retirada')
+    )
+
+
+def contar_alertas_entrega(agora=None, inicio=None, fim=None, turno=None):
+    """
+    Conta os equipamentos em alerta de entrega (ver `consultar_equipamentos_em_atraso`).
+
+    Args:
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+        inicio (datetime, opcional): Considera apenas retiradas a partir deste instante.
+        fim (datetime, opcional): Considera apenas retiradas anteriores a este instante.
+        turno (str, opcional): Considera apenas retiradas deste turno.
+
+    Returns:
+        int: Quantidade de equipamentos em alerta de entrega.
+    """
+    return consultar_equipamentos_em_atraso(agora, inicio, fim, turno).count()
+
+
+async def acontar_alertas_entrega(agora=None, inicio=None, fim=None, turno=None):
+    """Versão assíncrona de `contar_alertas_entrega`."""
+    return await consultar_equipamentos_em_atraso(agora, inicio, fim, turno).acount()
+
+
+def _retiradas_do_periodo(inicio=None, fim=None, turno=None):
+    """
+    Retiradas do período [inicio, fim) e do turno, para agregação.
+
+    Períodos de dias inteiros (limites na meia-noite local ou vazios) são lidos do resumo diário;
+    os demais, como o turno em andamento, do histórico de transações pelo índice (tipo, timestamp),
+    que lê apenas as retiradas do intervalo. O arquivo de transações antigas só é consultado
+    quando o período começa antes da transação arquivada mais recente (ver check/arquivo.py).
+
+    Returns:
+        list[tuple]: Uma ou mais fontes (QuerySet, dict com as expressões 'modelo', 'dia' e
+                     'quantidade' sobre ele), cujos grupos devem ser somados (ver `_somar`).
+    """
+    if alinhado_ao_dia(inicio) and alinhado_ao_dia(fim):
+        retiradas = ResumoDiario.objects.filter(tipo='Retirada')
+        if inicio is not None:
+            retiradas = retiradas.filter(dia__gte=timezone.localdate(inicio))
+        if fim is not None:
+            retiradas = retiradas.filter(dia__lt=timezone.localdate(fim))
+        fontes = [(retiradas, {'modelo': F('modelo'), 'dia': F('dia'), 'quantidade': Sum('total')})]
+    else:
+        modelos = [RegistroTransacao]
+        if alcanca_o_arquivo(inicio):
+            modelos.append(RegistroTransacaoArquivo)
+        fontes = []
+        for modelo in modelos:
+            retiradas = modelo.objects.filter(tipo='Retirada')
+            if inicio is not None:
+                retiradas = retiradas.filter(timestamp__gte=inicio)
+            if fim is not None:
+                retiradas = retiradas.filter(timestamp__lt=fim)
+            fontes.append(
+                (retiradas, {'modelo': F('equipamento__modelo'), 'dia': F('timestamp'), 'quantidade': Count('id')})
+            )
+    if turno is not None:
+        fontes = [(retiradas.filter(turno=turno), campos) for retiradas, campos in fontes]
+    return fontes
+
+
+def _somar(linhas, *chaves):
+    """Soma o campo 'soma' das linhas agrupadas pelas mesmas `chaves` em fontes diferentes, ordenando pelas chaves."""
+    somas = Counter()
+    for linha in linhas:
+        somas[tuple(linha[chave] for chave in chaves)] += linha['soma']
+    return [{**dict(zip(chaves, grupo)), 'soma': soma} for grupo, soma in sorted(somas.items())]
+
+
+def _consulta_por_modelo(inicio, fim, turno):
+    """Consultas das retiradas do período agrupadas por modelo ('nome_modelo' e 'soma'), uma por fonte."""
+    return [
+        retiradas.values(nome_modelo=campos['modelo'])
+        .annotate(soma=campos['quantidade'])
+        .order_by('nome_modelo')
+        for retiradas, campos in _retiradas_do_periodo(inicio, fim, turno)
+    ]
+
+
+def _grafico_por_modelo(retiradas_por_modelo):
+    """Converte as retiradas por modelo nas porcentagens do gráfico."""
+    total_retiradas = sum(item['soma'] for item in retiradas_por_modelo)
+
+    return {
+        "categories": [item['nome_modelo'] for item in retiradas_por_modelo],
+        "series": [
+            round((item['soma'] / total_retiradas) * 100, 2)
+            for item in retiradas_por_modelo
+        ],
+    }
+
+
+def porcentagem_por_modelo(inicio=None, fim=None, turno=None):
+    """
+    Calcula a porcentagem de retiradas de cada modelo de equipamento.
+
+    As retiradas são somadas em uma única consulta agrupada (ver `_retiradas_do_periodo`); o total
+    de retiradas é obtido somando os grupos, sem uma contagem separada.
+
+    Args:
+        inicio (datetime, opcional): Início do período (inclusive). Sem limite se omitido.
+        fim (datetime, opcional): Fim do período (exclusive). Sem limite se omitido.
+        turno (str, opcional): Código do turno das retiradas.
+
+    Returns:
+        dict: "categories" com os modelos e "series" com as porcentagens (duas casas decimais).
+    """
+    consultas = _consulta_por_modelo(inicio, fim, turno)
+    return _grafico_por_modelo(_somar((linha for consulta in consultas for linha in consulta), 'nome_modelo'))
+
+
+async def aporcentagem_por_modelo(inicio=None, fim=None, turno=None):
+    """Versão assíncrona de `porcentagem_por_modelo`."""
+    # Montar as consultas pode ler a fronteira do arquivo no banco.
+    consultas = await sync_to_async(_consulta_por_modelo)(inicio, fim, turno)
+    linhas = [linha for consulta in consultas async for linha in consulta.aiterator()]
+    return _grafico_por_modelo(_somar(linhas, 'nome_modelo'))
+
+
+def inicio_semana_movel(hoje=None):
+    """
+    Início do período do gráfico semanal: a janela de `DASHBOARD_POR_TURNO_DIAS` dias
+    terminada hoje.
+
+    Args:
+        hoje (date, opcional): Dia de referência. Usa `timezone.localdate()` se omitido.
+
+    Returns:
+        datetime: Meia-noite local do primeiro dia do período.
+    """
+    hoje = hoje or timezone.localdate()
+    return inicio_do_dia(hoje - timedelta(days=settings.DASHBOARD_POR_TURNO_DIAS - 1))
+
+
+def _consulta_por_turno(inicio, fim, turno):
+    """Consultas das retiradas do período agrupadas por dia da semana ('weekday') e turno, uma por fonte."""
+    return [
+        retiradas.filter(turno__in=TURNOS)
+        .annotate(weekday=ExtractWeekDay(campos['dia']))
+        .values('weekday', 'turno')
+        .annotate(soma=campos['quantidade'])
+        .order_by()
+        for retiradas, campos in _retiradas_do_periodo(inicio, fim, turno)
+    ]
+
+
+def _grafico_por_turno(registros):
+    """Monta as séries do Chart.js a partir das retiradas agrupadas por dia da semana e turno."""
+    # Dias da semana: 1 (domingo) a 7 (sábado)
+    data = {(registro['weekday'], registro['turno']): registro['soma'] for registro in registros}
+
+    chart_data = {"labels": DIAS_DA_SEMANA, "datasets": []}
+    for cor, (turno, nome) in zip(CORES_TURNOS, TURNOS.items()):
+        chart_data["datasets"].append({
+            "label": nome,
+            "data": [data.get((day, turno), 0) for day in range(1, 8)],
+            "borderColor": cor,
+            "fill": False,
+        })
+    return chart_data
+
+
+def retiradas_por_turno(inicio=None, fim=None, turno=None):
+    """
+    Conta as retiradas por dia da semana e turno, no formato esperado pelo Chart.js.
+
+    As contagens vêm de uma única consulta agrupada por (dia da semana, turno) (ver
+    `_retiradas_do_periodo`). Retiradas de logins sem usuário cadastrado são ignoradas.
+
+    Args:
+        inicio (datetime, opcional): Início do período (inclusive). Sem limite se omitido.
+        fim (datetime, opcional): Fim do período (exclusive). Sem limite se omitido.
+        turno (str, opcional): Código do turno. Os demais turnos ficam com as séries zeradas.
+
+    Returns:
+        dict: "labels" com os dias da semana e "datasets" com uma série por turno.
+    """
+    consultas = _consulta_por_turno(inicio, fim, turno)
+    return _grafico_por_turno(_somar((linha for consulta in consultas for linha in consulta), 'weekday', 'turno'))
+
+
+async def aretiradas_por_turno(inicio=None, fim=None, turno=None):
+    """Versão assíncrona de `retiradas_por_turno`."""
+    consultas = await sync_to_async(_consulta_por_turno)(inicio, fim, turno)
+    linhas = [linha for consulta in consultas async for linha in consulta.aiterator()]
+    return _grafico_por_turno(_somar(linhas, 'weekday', 'turno'))
+
+
+def calcular_dashboard(inicio=None, fim=None, turno=None):
+    """
+    Obtém todos os dados do dashboard, reaproveitando do cache os widgets já calculados.
+
+    Sem filtros, os widgets são lidos do cache com uma única chamada; apenas os ausentes são
+    recalculados, cada um com uma consulta agregada. Contadores de status e gráficos são
+    descartados quando `invalidar_dashboard` é chamada após uma escrita e expiram após
+    `DASHBOARD_CACHE_TIMEOUT` segundos, prazo em que aparecem as escritas de processos que não
+    compartilham o cache; o contador de alertas de entrega, que depende da passagem do tempo,
+    expira após `DASHBOARD_ALERTA_CACHE_TIMEOUT` segundos, e o gráfico por turno, limitado aos
+    últimos `DASHBOARD_POR_TURNO_DIAS` dias, também quando o dia muda.
+
+    Com filtros, todos os widgets são calculados para o período e o turno pedidos, sem cache:
+    períodos de dias inteiros são lidos do resumo diário, e os demais (como o turno em andamento)
+    leem apenas as transações do intervalo, pelo índice de data.
+
+    Args:
+        inicio (datetime, opcional): Início do período (inclusive).
+        fim (datetime, opcional): Fim do período (exclusive).
+        turno (str, opcional): Código do turno.
+
+    Returns:
+        Dashboard: Contadores dos cards e dados dos gráficos.
+    """
+    if inicio is not None or fim is not None or turno is not None:
+        filtro = {'inicio': inicio, 'fim': fim, 'turno': turno}
+        return Dashboard(
+            **contar_por_status(**filtro),
+            total_alerta_entrega=contar_alertas_entrega(**filtro),
+            porcentagem_modelo=porcentagem_por_modelo(**filtro),
+            por_turno=retiradas_por_turno(**filtro),
+        )
+
+    widgets = obter_widgets()
+    return Dashboard(
+        **widgets[CHAVE_STATUS],
+        total_alerta_entrega=widgets[CHAVE_ALERTA_ENTREGA],
+        porcentagem_modelo=widgets[CHAVE_PORCENTAGEM_MODELO],
+        por_turno=widgets[CHAVE_POR_TURNO]['grafico'],
+    )
+
+
+def obter_widgets(chaves=CHAVES_DASHBOARD):
+    """
+    Obtém widgets do dashboard sem filtros, lendo-os do cache com uma única chamada e calculando
+    apenas os ausentes (ver `calcular_dashboard`).
+
+    Args:
+        chaves (list, opcional): Chaves dos widgets desejados. Por padrão, todos.
+
+    Returns:
+        dict: Chave -> dados do widget. O gráfico semanal vem como {'inicio', 'grafico'}.
+    """
+    widgets = cache.get_many(chaves)
+    calculados = {}
+
+    if CHAVE_STATUS in chaves and CHAVE_STATUS not in widgets:
+        calculados[CHAVE_STATUS] = contar_por_status()
+    if CHAVE_PORCENTAGEM_MODELO in chaves and CHAVE_PORCENTAGEM_MODELO not in widgets:
+        calculados[CHAVE_PORCENTAGEM_MODELO] = porcentagem_por_modelo()
+    # O gráfico semanal guarda o início do seu período e é recalculado quando a janela avança.
+    if CHAVE_POR_TURNO in chaves:
+        inicio_por_turno = inicio_semana_movel()
+        if widgets.get(CHAVE_POR_TURNO, {}).get('inicio') != inicio_por_turno:
+            calculados[CHAVE_POR_TURNO] = {
+                'inicio': inicio_por_turno,
+                'grafico': retiradas_por_turno(inicio=inicio_por_turno),
+            }
+    if calculados:
+        cache.set_many(calculados, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+    if CHAVE_ALERTA_ENTREGA in chaves and CHAVE_ALERTA_ENTREGA not in widgets:
+        calculados[CHAVE_ALERTA_ENTREGA] = contar_alertas_entrega()
+        cache.set(
+            CHAVE_ALERTA_ENTREGA,
+            calculados[CHAVE_ALERTA_ENTREGA],
+            timeout=settings.DASHBOARD_ALERTA_CACHE_TIMEOUT,
+        )
+
+    widgets.update(calculados)
+    return widgets
+
+
+async def acalcular_dashboard(inicio=None, fim=None, turno=None):
+    """
+    Versão assíncrona de `calcular_dashboard`, para as views servidas sob ASGI.
+
+    Usa o cache e o ORM assíncronos: os widgets ausentes do cache são calculados por
+    `asyncio.gather`, mas o ORM executa as consultas de uma em uma, na thread de banco de dados da
+    requisição. O ganho não é de paralelismo: enquanto as consultas executam, o laço de eventos
+    fica livre para atender outras requisições.
+    """
+    if inicio is not None or fim is not None or turno is not None:
+        filtro = {'inicio': inicio, 'fim': fim, 'turno': turno}
+        status, alertas, porcentagem, por_turno = await asyncio.gather(
+            acontar_por_status(**filtro),
+            acontar_alertas_entrega(**filtro),
+            aporcentagem_por_modelo(**filtro),
+            aretiradas_por_turno(**filtro),
+        )
+        return Dashboard(**status, total_alerta_entrega=alertas, porcentagem_modelo=porcentagem, por_turno=por_turno)
+
+    widgets = await cache.aget_many(CHAVES_DASHBOARD)
+    tarefas = {}
+
+    if CHAVE_STATUS not in widgets:
+        tarefas[CHAVE_STATUS] = acontar_por_status()
+    if CHAVE_PORCENTAGEM_MODELO not in widgets:
+        tarefas[CHAVE_PORCENTAGEM_MODELO] = aporcentagem_por_modelo()
+    inicio_por_turno = inicio_semana_movel()
+    if widgets.get(CHAVE_POR_TURNO, {}).get('inicio') != inicio_por_turno:
+        tarefas[CHAVE_POR_TURNO] = aretiradas_por_turno(inicio=inicio_por_turno)
+    if CHAVE_ALERTA_ENTREGA not in widgets:
+        tarefas[CHAVE_ALERTA_ENTREGA] = acontar_alertas_entrega()
+
+    calculados = dict(zip(tarefas, await asyncio.gather(*tarefas.values())))
+    if CHAVE_POR_TURNO in calculados:
+        calculados[CHAVE_POR_TURNO] = {'inicio': inicio_por_turno, 'grafico': calculados[CHAVE_POR_TURNO]}
+    sem_alerta = {chave: valor for chave, valor in calculados.items() if chave != CHAVE_ALERTA_ENTREGA}
+    if sem_alerta:
+        await cache.aset_many(sem_alerta, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    if CHAVE_ALERTA_ENTREGA in calculados:
+        await cache.aset(
+            CHAVE_ALERTA_ENTREGA,
+            calculados[CHAVE_ALERTA_ENTREGA],
+            timeout=settings.DASHBOARD_ALERTA_CACHE_TIMEOUT,
+        )
+
+    widgets.update(calculados)
+    return Dashboard(
+        **widgets[CHAVE_STATUS],
+        total_alerta_entrega=widgets[CHAVE_ALERTA_ENTREGA],
+        porcentagem_modelo=widgets[CHAVE_PORCENTAGEM_MODELO],
+        por_turno=widgets[CHAVE_POR_TURNO]['grafico'],
+    )
+
+
+def invalidar_dashboard(chaves=CHAVES_DASHBOARD):
+    """
+    Remove do cache os widgets do dashboard afetados por uma escrita.
+
+    As chaves são apagadas imediatamente e novamente após o commit da transação corrente,
+    para que uma leitura concorrente não grave no cache dados anteriores à escrita.
+
+    Args:
+        chaves (list, opcional): Chaves dos widgets a invalidar. Por padrão, todas.
+    """
+    chaves = list(chaves)
+
+    def invalidar():
+        cache.delete_many(chaves)
+        cache.set(CHAVE_VERSAO, time.time_ns(), timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+
+    invalidar()
+    transaction.on_commit(invalidar)
+
+
+def versao_dashboard():
+    """
+    Versão atual dos dados do dashboard: o instante (em nanossegundos) da última escrita que
+    invalidou algum widget, gravado no cache por `invalidar_dashboard`. Se a chave não estiver no
+    cache, uma nova versão é criada, o que apenas faz os clientes buscarem os widgets novamente.
+    Como os widgets, a versão expira após `DASHBOARD_CACHE_TIMEOUT` segundos, para que os
+    clientes recebam as escritas de processos que não compartilham o cache.
+
+    Returns:
+        int: Versão dos dados do dashboard.
+    """
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        versao = cache.get_or_set(CHAVE_VERSAO, time.time_ns(), timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return versao
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Usuario
+
+# Dados de um operador mantidos no diretório, com os mesmos nomes dos campos de `Usuario`.
+Operador = namedtuple('Operador', ['id', 'login_usuario', 'nome_usuario', 'turno_usuario', 'coordenador'])
+CAMPOS_OPERADOR = list(Operador._fields)
+
+# Chave, no cache, da versão do diretório. Cada escrita em `Usuario` gera uma nova versão,
+# descartando os diretórios carregados pelos processos que compartilham o cache (com o
+# `LocMemCache` padrão, apenas o próprio processo; os demais recarregam o diretório após
+# `DIRETORIO_OPERADORES_TIMEOUT` segundos).
+CHAVE_VERSAO = 'diretorio_operadores:versao'
+
+_trava = threading.Lock()
+_operadores = OrderedDict()  # login -> Operador, do menos para o mais recentemente usado
+_estado = {'versao': None, 'completo': False, 'validade': 0.0, 'banco': None}
+
+
+def _versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        versao = cache.get_or_set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+    return versao
+
+
+def _versao_do_banco():
+    """Maior id e quantidade de operadores no banco, que mudam quando outro processo cadastra ou remove um."""
+    valores = Usuario.objects.aggregate(ultimo=Max('id'), total=Count('id'))
+    return valores['ultimo'], valores['total']
+
+
+def _carregar(versao):
+    """Recarrega o diretório com uma única consulta, até a capacidade configurada."""
+    capacidade = settings.DIRETORIO_OPERADORES_TAMANHO
+    operadores = [
+        Operador(*valores)
+        for valores in Usuario.objects.order_by('id').values_list(*CAMPOS_OPERADOR)[:capacidade + 1]
+    ]
+    _operadores.clear()
+    for operador in operadores[:capacidade]:
+        _operadores[operador.login_usuario] = operador
+    # Se todos os operadores couberam, um login ausente do diretório não existe no banco, desde que
+    # o maior id e a quantidade de operadores no banco continuem os mesmos da carga.
+    completo = len(operadores) <= capacidade
+    _estado.update(
+        versao=versao,
+        completo=completo,
+        validade=time.monotonic() + settings.DIRETORIO_OPERADORES_TIMEOUT,
+        banco=(operadores[-1].id if operadores else None, len(operadores)) if completo else None,
+    )
+
+
+def buscar_operadores(logins):
+    """
+    Resolve vários logins de operadores pelo diretório em memória do processo.
+
+    O diretório é carregado com uma única consulta na primeira chamada, após cada escrita em
+    `Usuario` (ver `invalidar_diretorio`) e a cada `DIRETORIO_OPERADORES_TIMEOUT` segundos, e guarda
+    até `DIRETORIO_OPERADORES_TAMANHO` operadores. Se a base tiver mais operadores que isso, os
+    logins ausentes são buscados com uma consulta `IN` e os menos usados recentemente são
+    descartados. Se couberam todos, um login ausente só é considerado inexistente depois de
+    conferir que o maior id e a quantidade de operadores no banco não mudaram desde a carga
+    (operadores cadastrados por outro processo); se mudaram, o diretório é recarregado.
+
+    Args:
+        logins (iterable[str]): Logins a resolver.
+
+    Returns:
+        dict: Login -> `Operador` (id, login_usuario, nome_usuario, turno_usuario, coordenador),
+              apenas para os logins cadastrados.
+    """
+    versao = _versao_atual()
+    with _trava:
+        if _estado['versao'] != versao or time.monotonic() >= _estado['validade']:
+            _carregar(versao)
+
+        encontrados, ausentes = {}, set()
+        for login in logins:
+            if login in _operadores:
+                _operadores.move_to_end(login)
+                encontrados[login] = _operadores[login]
+            elif login:
+                ausentes.add(login)
+
+        if ausentes and _estado['completo'] and _versao_do_banco() != _estado['banco']:
+            _carregar(versao)
+            for login in ausentes & _operadores.keys():
+                encontrados[login] = _operadores[login]
+            ausentes -= _operadores.keys()
+
+        if ausentes and not _estado['completo']:
+            for valores in Usuario.objects.filter(login_usuario__in=ausentes).values_list(*CAMPOS_OPERADOR):
+                operador = Operador(*valores)
+                _operadores[operador.login_usuario] = operador
+                encontrados[operador.login_usuario] = operador
+            while len(_operadores) > settings.DIRETORIO_OPERADORES_TAMANHO:
+                _operadores.popitem(last=False)
+    return encontrados
+
+
+def buscar_operador(login):
+    """
+    Resolve um login de operador pelo diretório em memória (ver `buscar_operadores`).
+
+    Args:
+        login (str): Login do operador.
+
+    Returns:
+        Operador or None: Os dados do operador, ou None se o login não estiver cadastrado.
+    """
+    return buscar_operadores([login]).get(login)
+
+
+def invalidar_diretorio():
+    """
+    Descarta o diretório de operadores, após uma escrita em `Usuario`, neste processo e nos que
+    compartilham o cache (ver `CHAVE_VERSAO`).
+
+    A nova versão é gravada imediatamente e novamente após o commit da transação corrente, para
+    que um processo que recarregue o diretório no meio da transação não mantenha dados antigos.
+    """
+    def nova_versao():
+        # Uma versão nunca repetida, mesmo que a chave tenha sido removida do cache.
+        cache.set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+        with _trava:
+            _estado['versao'] = None
+
+    nova_versao()
+    transaction.on_commit(nova_versao)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+
+from .dashboard import calcular_dashboard, consultar_equipamentos_em_operacao, linha_em_operacao
+from .models import RegistroTransacao
+
+
+def ultima_transacao():
+    """Id da transação mais recente (0 se não houver), pelo índice da chave primária."""
+    return RegistroTransacao.objects.aggregate(ultima=Max('id'))['ultima'] or 0
+
+
+def calcular_evento(desde, ate=None):
+    """
+    Calcula as alterações do dashboard causadas pelas transações posteriores à transação `desde`.
+
+    As transações são lidas em ordem de id, no máximo `EVENTOS_LOTE` por evento, pelo índice da
+    chave primária, até a transação `ate` (ver `Difusor`), se informada. Apenas a última transação de cada equipamento importa: se for uma retirada, a
+    linha do equipamento entra na tabela de equipamentos em operação; se for uma devolução (ou se
+    o equipamento já não estiver retirado), a linha sai. Contadores e gráficos vêm de
+    `calcular_dashboard`, que os recalcula uma única vez após a escrita e os mantém em cache.
+
+    Args:
+        desde (int): Id da última transação já refletida pelo cliente.
+        ate (int, opcional): Id da última transação a considerar.
+
+    Returns:
+        dict or None: "id" (última transação considerada: `ate`, se não houver mais de
+                      `EVENTOS_LOTE` transações até ela), "info", "controle",
+                      "porcentagem_modelo", "por_turno", "adicionados" (linhas no formato de
+                      `linha_em_operacao`) e "removidos" (ids dos equipamentos), ou None se não
+                      houver transações novas.
+    """
+    transacoes = RegistroTransacao.objects.filter(id__gt=desde)
+    if ate is not None:
+        transacoes = transacoes.filter(id__lte=ate)
+    transacoes = list(transacoes.order_by('id').values_list('id', 'equipamento_id', 'tipo')[:settings.EVENTOS_LOTE])
+    if not transacoes:
+        return None
+    ultima = transacoes[-1][0] if ate is None or len(transacoes) == settings.EVENTOS_LOTE else ate
+
+    ultimo_tipo = {equipamento_id: tipo for _, equipamento_id, tipo in transacoes}
+    retirados = [equipamento_id for equipamento_id, tipo in ultimo_tipo.items() if tipo == 'Retirada']
+    adicionados = [
+        linha_em_operacao(equipamento, None)
+        for equipamento in consultar_equipamentos_em_operacao().filter(id__in=retirados)
+    ]
+    em_operacao = {linha['id'] for linha in adicionados}
+
+    dashboard = calcular_dashboard()
+    return {
+        'id': ultima,
+        'info': dashboard.info,
+        'controle': dashboard.controle,
+        'porcentagem_modelo': dashboard.porcentagem_modelo,
+        'por_turno': dashboard.por_turno,
+        'adicionados': adicionados,
+        'removidos': [equipamento_id for equipamento_id in ultimo_tipo if equipamento_id not in em_operacao],
+    }
+
+
+def formatar_evento(evento):
+    """Serializa um evento no formato do Server-Sent Events, com o id da última transação."""
+    return f"id: {evento['id']}\nevent: dashboard\ndata: {json.dumps(evento)}\n\n"
+
+
+class Difusor:
+    """
+    Distribui os eventos do dashboard a todas as conexões abertas no processo.
+
+    Uma única tarefa por processo acompanha as novas transações a cada `EVENTOS_INTERVALO`
+    segundos e calcula cada evento uma só vez, colocando-o na fila de cada conexão. Assim, o custo
+    de N telas abertas é o de uma consulta periódica pela chave primária, e não o de N dashboards
+    recalculados. A tarefa é iniciada na primeira conexão e encerrada quando não há mais conexões.
+
+    Uma conexão que não consome seus eventos (fila com `EVENTOS_FILA` itens) é encerrada; o
+    navegador se reconecta e recebe o estado a partir do último evento que processou.
+
+    No PostgreSQL, o id de uma transação é reservado antes do commit, e uma transação pode ser
+    confirmada depois de outra com id maior. Por isso `ultima` só avança até a primeira lacuna na
+    sequência de ids: as transações seguintes aguardam até `EVENTOS_ESPERA_LACUNA` segundos pela
+    que falta. Depois disso, os ids que faltam são considerados desfeitos (rollback), mas continuam
+    sendo verificados por `EVENTOS_RETENCAO_LACUNA` segundos; se algum aparecer, os clientes
+    recebem um evento "recarregar" e buscam o dashboard completo.
+    """
+
+    def __init__(self):
+        self._filas = set()
+        self._tarefa = None
+        self.ultima = None
+        self._lacuna = None  # (id, instante): primeiro id ausente após `ultima` e quando foi notado
+        self._puladas = {}  # id ausente considerado desfeito -> instante em que foi pulado
+
+    async def assinar(self):
+        """Registra uma conexão e devolve a sua fila de eventos."""
+        fila = asyncio.Queue(maxsize=settings.EVENTOS_FILA)
+        self._filas.add(fila)
+        tarefa = self._tarefa
+        if tarefa is None or tarefa.done() or tarefa.get_loop() is not asyncio.get_running_loop():
+            self.ultima = await sync_to_async(ultima_transacao)()
+            self._tarefa = asyncio.create_task(self._acompanhar())
+        return fila
+
+    def cancelar(self, fila):
+        """Remove a fila de uma conexão encerrada."""
+        self._filas.discard(fila)
+
+    def publicar(self, evento):
+        """Entrega um evento a todas as conexões, encerrando as que estiverem atrasadas."""
+        for fila in list(self._filas):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                self._filas.discard(fila)
+                fila.get_nowait()
+                fila.put_nowait(None)  # Sinaliza o encerramento da conexão
+
+    def verificar(self, agora=None):
+        """
+        Consulta as novas transações e avança `ultima` até a primeira lacuna de ids ainda aguardada.
+
+        Args:
+            agora (float, opcional): Instante de referência (`time.monotonic()`).
+
+        Returns:
+            list[dict]: Eventos a publicar (um "recarregar" se uma transação pulada apareceu, e as
+                        alterações das novas transações), possivelmente vazia.
+        """
+        agora = time.monotonic() if agora is None else agora
+        eventos = []
+        if self._puladas:
+            self._puladas = {
+                id: pulada for id, pulada in self._puladas.items()
+                if agora - pulada < settings.EVENTOS_RETENCAO_LACUNA
+            }
+            if RegistroTransacao.objects.filter(id__in=list(self._puladas)).exists():
+                self._puladas.clear()
+                eventos.append({'id': self.ultima, 'recarregar': True})
+
+        ids = list(
+            RegistroTransacao.objects.filter(id__gt=self.ultima)
+            .order_by('id').values_list('id', flat=True)[:settings.EVENTOS_LOTE]
+        )
+        ate = self.ultima
+        for id in ids:
+            if id != ate + 1:
+                break
+            ate = id
+        if ids and ate < ids[-1]:
+            if self._lacuna is None or self._lacuna[0] != ate + 1:
+                self._lacuna = (ate + 1, agora)
+            elif agora - self._lacuna[1] >= settings.EVENTOS_ESPERA_LACUNA:
+                presentes = set(ids)
+                self._puladas.update(
+                    (id, agora) for id in range(self.ultima + 1, ids[-1]) if id not in presentes
+                )
+                self._lacuna, ate = None, ids[-1]
+        else:
+            self._lacuna = None
+
+        if ate > self.ultima:
+            evento = calcular_evento(self.ultima, ate)
+            self.ultima = ate
+            if evento is not None:
+                eventos.append(evento)
+        return eventos
+
+    async def _acompanhar(self):
+        while self._filas:
+            await asyncio.sleep(settings.EVENTOS_INTERVALO)
+            for evento in await sync_to_async(self.verificar)():
+                self.publicar(evento)
+
+
+difusor = Difusor()
+
+
+async def transmitir(fila, pendente=None):
+    """
+    Gera o corpo do fluxo SSE de uma conexão: o evento pendente (de uma reconexão), se houver, e
+    os eventos da fila, com um comentário a cada `EVENTOS_KEEPALIVE` segundos sem eventos para
+    manter a conexão aberta em proxies.
+
+    Args:
+        fila (asyncio.Queue): Fila da conexão, obtida de `Difusor.assinar`.
+        pendente (dict, opcional): Evento a enviar antes dos demais.
+    """
+    try:
+        if pendente is not None:
+            yield formatar_evento(pendente)
+        while True:
+            try:
+                evento = await asyncio.wait_for(fila.get(), timeout=settings.EVENTOS_KEEPALIVE)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if evento is None:
+                return
+            if pendente is None or evento['id'] > pendente['id'] or evento.get('recarregar'):
+                yield formatar_evento(evento)
+    finally:
+        difusor.cancelar(fila)
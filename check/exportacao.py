@@ -0,0 +1,239 @@
+import csv
+import heapq
+import io
+import tempfile
+from itertools import islice
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .arquivo import alcanca_o_arquivo
+from .diretorio import buscar_operadores
+from .models import Equipamento, RegistroTransacao, RegistroTransacaoArquivo
+from .periodos import FiltroInvalido, ler_filtro
+
+# Transações lidas do banco (e operadores resolvidos no diretório) por vez.
+TAMANHO_LOTE = 2000
+
+# Bytes do arquivo .xlsx enviados por bloco.
+TAMANHO_BLOCO = 64 * 1024
+
+# Linhas de dados por planilha do .xlsx: o limite do Excel (1.048.576 linhas) menos o cabeçalho.
+LINHAS_POR_PLANILHA = 1_048_575
+
+COLUNAS = [
+    'ID', 'Data e hora', 'Tipo', 'Número de série', 'Modelo', 'Marca', 'Login do operador', 'Operador',
+    'Coordenador', 'Turno', 'Registrado por',
+]
+
+# Formatos aceitos -> tipo de conteúdo da resposta.
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Os dois primeiros campos ordenam a intercalação do arquivo com a tabela de transações.
+CAMPOS = [
+    'timestamp', 'id', 'tipo', 'equipamento__serial_number', 'equipamento__modelo', 'equipamento__marca',
+    'usuario_login', 'turno', 'login_registrado',
+]
+
+
+def ler_filtro_exportacao(parametros, agora=None):
+    """
+    Interpreta os filtros da exportação: os de `ler_filtro` (período, início, fim e turno) e
+    "equipamento", o número de série de um equipamento.
+
+    Args:
+        parametros (QueryDict or dict): Parâmetros da requisição ou opções do comando.
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+
+    Returns:
+        dict: "inicio", "fim", "turno" e "equipamento" (id), com None para os filtros ausentes.
+
+    Raises:
+        FiltroInvalido: Se algum parâmetro for inválido ou o equipamento não estiver cadastrado.
+    """
+    filtro = ler_filtro(parametros, agora)
+    filtro['equipamento'] = None
+    serial = (parametros.get('equipamento') or '').strip()
+    if serial:
+        filtro['equipamento'] = (
+            Equipamento.objects.filter(serial_number=serial).values_list('id', flat=True).first()
+        )
+        if filtro['equipamento'] is None:
+            raise FiltroInvalido(f"Equipamento '{serial}' não encontrado.")
+    return filtro
+
+
+def _consultas(inicio, fim, turno, equipamento):
+    """Consultas das transações do filtro: a tabela de transações e, se o período o alcança, o arquivo."""
+    modelos = [RegistroTransacao]
+    if alcanca_o_arquivo(inicio):
+        modelos.append(RegistroTransacaoArquivo)
+
+    for modelo in modelos:
+        transacoes = modelo.objects.all()
+        if inicio is not None:
+            transacoes = transacoes.filter(timestamp__gte=inicio)
+        if fim is not None:
+            transacoes = transacoes.filter(timestamp__lt=fim)
+        if turno is not None:
+            transacoes = transacoes.filter(turno=turno)
+        if equipamento is not None:
+            transacoes = transacoes.filter(equipamento_id=equipamento)
+        yield transacoes.order_by('timestamp', 'id').values_list(*CAMPOS)
+
+
+def linhas_do_historico(inicio=None, fim=None, turno=None, equipamento=None):
+    """
+    Percorre as transações do filtro, da mais antiga para a mais recente, com os dados do
+    equipamento e do operador.
+
+    As consultas são lidas em lotes de `TAMANHO_LOTE` (`QuerySet.iterator`), e o arquivo e a tabela
+    de transações são intercalados pela data, de modo que a memória usada não depende da
+    quantidade de transações. Os operadores de cada lote são resolvidos de uma vez no diretório
+    em memória (ver `buscar_operadores`); logins sem cadastro ficam sem nome e coordenador.
+
+    Args:
+        inicio (datetime, opcional): Início do período (inclusivo).
+        fim (datetime, opcional): Fim do período (exclusivo).
+        turno (str, opcional): Turno da transação.
+        equipamento (int, opcional): Id do equipamento.
+
+    Yields:
+        tuple: Valores das `COLUNAS`, com a data e hora no fuso local.
+    """
+    fontes = [
+        consulta.iterator(chunk_size=TAMANHO_LOTE)
+        for consulta in _consultas(inicio, fim, turno, equipamento)
+    ]
+    transacoes = heapq.merge(*fontes, key=itemgetter(0, 1))
+    while lote := list(islice(transacoes, TAMANHO_LOTE)):
+        operadores = buscar_operadores({transacao[6] for transacao in lote})
+        for timestamp, id, tipo, serial, modelo, marca, login, turno_, registrado in lote:
+            operador = operadores.get(login)
+            yield (
+                id, timezone.localtime(timestamp), tipo, serial, modelo, marca, login,
+                operador.nome_usuario if operador else '', (operador.coordenador or '') if operador else '',
+                turno_ or '', registrado,
+            )
+
+
+def _blocos_csv(linhas):
+    """Gera o CSV em blocos de um lote de linhas: (quantidade de linhas, bytes)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+    # BOM: o Excel só reconhece um CSV como UTF-8 com ele.
+    buffer.write('\ufeff')
+    escritor.writerow(COLUNAS)
+    yield 0, buffer.getvalue().encode()
+
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, TAMANHO_LOTE)):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(
+            (linha[0], f'{linha[1]:%Y-%m-%d %H:%M:%S}', *linha[2:]) for linha in lote
+        )
+        yield len(lote), buffer.getvalue().encode()
+
+
+def gerar_csv(linhas):
+    """
+    Gera um CSV (UTF-8 com BOM, separado por ponto e vírgula) em blocos de bytes, para uma
+    `StreamingHttpResponse`.
+
+    Args:
+        linhas (iterable[tuple]): Linhas de `linhas_do_historico`.
+
+    Yields:
+        bytes: O cabeçalho e, em seguida, um bloco por lote de `TAMANHO_LOTE` linhas.
+    """
+    for _, bloco in _blocos_csv(linhas):
+        yield bloco
+
+
+def escrever_csv(linhas, arquivo):
+    """Grava as linhas de `linhas_do_historico` em CSV no `arquivo` binário e retorna a quantidade."""
+    total = 0
+    for quantidade, bloco in _blocos_csv(linhas):
+        arquivo.write(bloco)
+        total += quantidade
+    return total
+
+
+def escrever_xlsx(linhas, arquivo):
+    """
+    Grava as linhas de `linhas_do_historico` em uma planilha .xlsx.
+
+    A planilha é montada no modo de escrita do openpyxl, que grava as linhas em arquivos
+    temporários em vez de mantê-las na memória. Acima de `LINHAS_POR_PLANILHA` linhas, as
+    seguintes vão para novas abas ("Transações 2", ...).
+
+    Args:
+        linhas (iterable[tuple]): Linhas de `linhas_do_historico`.
+        arquivo: Caminho ou arquivo binário aberto para escrita.
+
+    Returns:
+        int: Quantidade de linhas gravadas.
+    """
+    planilha = Workbook(write_only=True)
+    aba, total = None, 0
+    for linha in linhas:
+        if total % LINHAS_POR_PLANILHA == 0:
+            numero = total // LINHAS_POR_PLANILHA + 1
+            aba = planilha.create_sheet('Transações' if numero == 1 else f'Transações {numero}')
+            aba.append(COLUNAS)
+        # O Excel não guarda fusos horários: a data e hora vão no horário local.
+        aba.append((linha[0], linha[1].replace(tzinfo=None), *linha[2:]))
+        total += 1
+    if aba is None:
+        planilha.create_sheet('Transações').append(COLUNAS)
+    planilha.save(arquivo)
+    return total
+
+
+def gerar_xlsx(linhas):
+    """
+    Gera uma planilha .xlsx em blocos de bytes, para uma `StreamingHttpResponse`.
+
+    O formato .xlsx (um arquivo zip) só fica completo ao final, por isso a planilha é gravada em
+    um arquivo temporário (ver `escrever_xlsx`), enviado em blocos de `TAMANHO_BLOCO` e removido
+    em seguida.
+
+    Args:
+        linhas (iterable[tuple]): Linhas de `linhas_do_historico`.
+
+    Yields:
+        bytes: Blocos do arquivo.
+    """
+    with tempfile.TemporaryFile() as arquivo:
+        escrever_xlsx(linhas, arquivo)
+        arquivo.seek(0)
+        while bloco := arquivo.read(TAMANHO_BLOCO):
+            yield bloco
+
+
+async def em_fluxo_assincrono(blocos):
+    """
+    Consome um gerador síncrono (ex.: `gerar_csv`) um bloco por vez em uma thread.
+
+    Sob ASGI, uma `StreamingHttpResponse` com um iterador síncrono é lida inteira na memória antes
+    do envio. As consultas do gerador rodam sempre na mesma thread (`thread_sensitive`), que
+    mantém a conexão com o banco, como em `QuerySet.aiterator`.
+
+    Args:
+        blocos (generator): Gerador de blocos de bytes.
+
+    Yields:
+        bytes: Os blocos do gerador.
+    """
+    proximo = sync_to_async(next)
+    try:
+        while (bloco := await proximo(blocos, None)) is not None:
+            yield bloco
+    finally:
+        await sync_to_async(blocos.close)()
@@ -0,0 +1,120 @@
+from django.utils import timezone
+
+from .arquivo import alcanca_o_arquivo
+from .diretorio import buscar_operadores
+from .models import RegistroTransacao, RegistroTransacaoArquivo
+from .paginacao import codificar_cursor, filtrar_keyset, ordenar_keyset
+
+# Transações por página da linha do tempo, quando o cliente não informa o tamanho.
+TAMANHO_PAGINA = 50
+
+# Maior página aceita.
+TAMANHO_MAXIMO_PAGINA = 200
+
+CAMPOS = ['id', 'tipo', 'timestamp', 'usuario_login', 'turno', 'login_registrado']
+
+
+def _consultar(modelo, equipamento_id, chave, quantidade, descendente):
+    """Até `quantidade` transações de `modelo` após a chave (timestamp, id), lidas pelo índice do equipamento."""
+    transacoes = ordenar_keyset(
+        modelo.objects.filter(equipamento_id=equipamento_id), 'timestamp', descendente, nulo=False
+    )
+    if chave is not None:
+        transacoes = filtrar_keyset(transacoes, 'timestamp', *chave, descendente=descendente, nulo=False)
+    arquivada = modelo is RegistroTransacaoArquivo
+    return [
+        {**transacao, 'arquivada': arquivada}
+        for transacao in transacoes.values(*CAMPOS)[:quantidade]
+    ]
+
+
+def _transacoes(equipamento_id, chave, quantidade, descendente=True):
+    """
+    Até `quantidade` transações do equipamento após a chave, da tabela de transações e, se preciso,
+    do arquivo, intercaladas.
+
+    O arquivo só guarda transações anteriores à sua fronteira (ver `fronteira_do_arquivo`): ele é
+    consultado apenas se a página lida da tabela de transações pode alcançá-la.
+    """
+    transacoes = _consultar(RegistroTransacao, equipamento_id, chave, quantidade, descendente)
+    if descendente:
+        limite = transacoes[-1]['timestamp'] if len(transacoes) == quantidade else None
+    else:
+        limite = chave[0] if chave is not None else None
+    if alcanca_o_arquivo(limite):
+        transacoes += _consultar(RegistroTransacaoArquivo, equipamento_id, chave, quantidade, descendente)
+        transacoes.sort(key=lambda transacao: (transacao['timestamp'], transacao['id']), reverse=descendente)
+    return transacoes[:quantidade]
+
+
+def consultar_linha_do_tempo(equipamento, chave=None, tamanho=TAMANHO_PAGINA, agora=None):
+    """
+    Uma página da linha do tempo de um equipamento: as suas transações (inclusive as arquivadas),
+    da mais recente para a mais antiga, paginadas por keyset em (timestamp, id).
+
+    Cada retirada é pareada com a devolução seguinte e cada devolução com a retirada anterior,
+    com a duração da posse. As transações vizinhas da página são lidas para parear também as
+    pontas: a mais antiga é a primeira da próxima página (lida junto com a página) e a mais
+    recente é a última da página anterior (a chave do cursor). A retirada mais recente de um
+    equipamento ainda retirado fica "em_posse", com a duração até `agora`.
+
+    Cada página custa uma leitura do índice (equipamento, timestamp, id) por tabela, qualquer que
+    seja a posição da página no histórico.
+
+    Args:
+        equipamento (Equipamento): Equipamento consultado.
+        chave (tuple, opcional): Chave (timestamp, id) da última transação da página anterior
+                                 (ver `decodificar_cursor`). Sem ela, retorna a primeira página.
+        tamanho (int, opcional): Transações por página.
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+
+    Returns:
+        dict: "transacoes" (lista de dicionários com id, tipo, timestamp ISO 8601, login, operador,
+              turno, registrado por, "arquivada", "par" (id da transação pareada),
+              "duracao_segundos" e "em_posse") e "proximo" (cursor da próxima página, ou None).
+    """
+    agora = agora or timezone.now()
+    pagina = _transacoes(equipamento.id, chave, tamanho + 1)
+    anterior = pagina[tamanho] if len(pagina) > tamanho else None
+    pagina = pagina[:tamanho]
+
+    posterior = None
+    if chave is not None and pagina:
+        recentes = _transacoes(equipamento.id, (pagina[0]['timestamp'], pagina[0]['id']), 1, descendente=False)
+        posterior = recentes[0] if recentes else None
+
+    # Da mais antiga para a mais recente, com as vizinhas da página nas pontas.
+    cronologia = [anterior, *reversed(pagina), posterior]
+    operadores = buscar_operadores({transacao['usuario_login'] for transacao in pagina})
+    transacoes = []
+    for indice in range(len(pagina), 0, -1):
+        antes, transacao, depois = cronologia[indice - 1:indice + 2]
+        par, duracao, em_posse = None, None, False
+        if transacao['tipo'] == 'Devolução':
+            if antes is not None and antes['tipo'] == 'Retirada':
+                par, duracao = antes['id'], transacao['timestamp'] - antes['timestamp']
+        elif depois is not None:
+            if depois['tipo'] == 'Devolução':
+                par, duracao = depois['id'], depois['timestamp'] - transacao['timestamp']
+        elif chave is None and equipamento.status == 'Retirado':
+            em_posse, duracao = True, agora - transacao['timestamp']
+
+        operador = operadores.get(transacao['usuario_login'])
+        transacoes.append({
+            'id': transacao['id'],
+            'tipo': transacao['tipo'],
+            'timestamp': timezone.localtime(transacao['timestamp']).isoformat(),
+            'usuario_login': transacao['usuario_login'],
+            'operador': operador.nome_usuario if operador else None,
+            'turno': transacao['turno'],
+            'login_registrado': transacao['login_registrado'],
+            'arquivada': transacao['arquivada'],
+            'par': par,
+            'duracao_segundos': int(duracao.total_seconds()) if duracao is not None else None,
+            'em_posse': em_posse,
+        })
+
+    proximo = None
+    if anterior is not None:
+        proximo = codificar_cursor(pagina[-1]['timestamp'], pagina[-1]['id'])
+    return {'transacoes': transacoes, 'proximo': proximo}
@@ -0,0 +1,324 @@
+import csv
+import io
+import unicodedata
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from openpyxl import load_workbook
+
+from .autocompletar import limpar_cache_autocompletar
+from .dashboard import CHAVE_STATUS, invalidar_dashboard
+from .diretorio import invalidar_diretorio
+from .models import Equipamento, Usuario
+
+# Quantidade de linhas validadas e gravadas por vez.
+TAMANHO_LOTE = 1000
+
+# Tentativas de gravar um lote de equipamentos quando outro processo cadastra, ao mesmo tempo, algum
+# dos seus números de série.
+TENTATIVAS_LOTE = 3
+
+# Quantidade máxima de erros detalhados no relatório; os demais são apenas contados.
+LIMITE_ERROS_RELATORIO = 1000
+
+
+@dataclass
+class RelatorioImportacao:
+    """
+    Resultado de uma importação de planilha.
+
+    Attributes:
+        linhas (int): Linhas de dados lidas (sem contar o cabeçalho e as linhas em branco).
+        importadas (int): Linhas gravadas no banco.
+        ignoradas (int): Linhas válidas que não precisaram ser gravadas (ex.: já cadastradas).
+        invalidas (int): Linhas rejeitadas na validação.
+        erros (list[dict]): Detalhes das linhas rejeitadas ("linha" e "erro"), limitados a
+                            `LIMITE_ERROS_RELATORIO` itens.
+    """
+    linhas: int = 0
+    importadas: int = 0
+    ignoradas: int = 0
+    invalidas: int = 0
+    erros: list = field(default_factory=list)
+
+    def registrar_erro(self, linha, mensagem):
+        self.invalidas += 1
+        if len(self.erros) < LIMITE_ERROS_RELATORIO:
+            self.erros.append({'linha': linha, 'erro': mensagem})
+
+
+def _limpar_autocompletar():
+    """
+    Limpa o cache do autocompletar após uma gravação em massa.
+
+    O `bulk_create` não envia os signals que limpam o cache a cada usuário ou equipamento salvo. O
+    cache é limpo imediatamente e novamente após o commit da transação corrente, para descartar
+    sugestões consultadas no meio da transação.
+    """
+    limpar_cache_autocompletar()
+    transaction.on_commit(limpar_cache_autocompletar)
+
+
+class PlanilhaInvalida(Exception):
+    """O arquivo não pôde ser lido ou não possui as colunas obrigatórias."""
+
+
+def _normalizar(texto):
+    """Remove acentos, espaços nas pontas e diferença entre maiúsculas e minúsculas."""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return texto.strip().lower()
+
+
+def _texto(valor):
+    """Converte o valor de uma célula em texto, tratando células vazias como ''."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Números lidos do Excel como 123.0
+    return str(valor).strip()
+
+
+def ler_linhas(arquivo, nome_arquivo, colunas_obrigatorias):
+    """
+    Lê uma planilha CSV ou XLSX linha a linha, sem carregá-la inteira na memória.
+
+    Arquivos .xlsx são abertos no modo somente leitura do openpyxl; os demais são lidos como CSV
+    (UTF-8, separados por vírgula ou ponto e vírgula). Os nomes das colunas do cabeçalho são
+    normalizados (sem acentos e em minúsculas).
+
+    Args:
+        arquivo: Arquivo binário aberto (ex.: `UploadedFile` ou o resultado de `open(..., 'rb')`).
+        nome_arquivo (str): Nome do arquivo, usado para identificar o formato.
+        colunas_obrigatorias (list[str]): Colunas que precisam estar no cabeçalho.
+
+    Yields:
+        tuple: (número da linha na planilha, dicionário coluna -> texto da célula).
+
+    Raises:
+        PlanilhaInvalida: Se o arquivo não puder ser lido ou faltar alguma coluna obrigatória.
+    """
+    if nome_arquivo.lower().endswith('.xlsx'):
+        try:
+            planilha = load_workbook(arquivo, read_only=True, data_only=True)
+        except Exception as erro:
+            raise PlanilhaInvalida(f"Não foi possível ler o arquivo Excel: {erro}")
+        try:
+            linhas = planilha.active.iter_rows(values_only=True)
+            yield from _ler_registros(linhas, colunas_obrigatorias)
+        finally:
+            planilha.close()
+    else:
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+        try:
+            amostra = texto.readline()
+            texto.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;')
+            except csv.Error:
+                dialeto = csv.excel
+            yield from _ler_registros(csv.reader(texto, dialeto), colunas_obrigatorias)
+        except UnicodeDecodeError:
+            raise PlanilhaInvalida("O arquivo CSV deve estar codificado em UTF-8.")
+        finally:
+            texto.detach()  # Mantém o arquivo original aberto para quem o forneceu.
+
+
+def _ler_registros(linhas, colunas_obrigatorias):
+    """Associa cada linha ao cabeçalho, ignorando linhas em branco."""
+    cabecalho = [_normalizar(_texto(coluna)) for coluna in next(linhas, None) or []]
+    faltando = [coluna for coluna in colunas_obrigatorias if coluna not in cabecalho]
+    if faltando:
+        raise PlanilhaInvalida(
+            f"O arquivo está no formato incorreto. Colunas obrigatórias ausentes: {', '.join(faltando)}."
+        )
+
+    for numero, linha in enumerate(linhas, start=2):
+        valores = [_texto(valor) for valor in linha]
+        if any(valores):
+            yield numero, dict(zip(cabecalho, valores))
+
+
+def _em_lotes(iteravel, tamanho):
+    """Agrupa os itens de `iteravel` em listas de até `tamanho` itens."""
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+# Turnos aceitos na planilha: o código ("T1") ou o nome ("Manhã"), sem diferenciar acentos e caixa.
+TURNOS_ACEITOS = {
+    **{_normalizar(codigo): codigo for codigo, _ in Usuario.TURNOS},
+    **{_normalizar(nome): codigo for codigo, nome in Usuario.TURNOS},
+}
+
+
+def _validar_usuario(linha, registro, logins_vistos, relatorio):
+    """Valida uma linha da planilha de usuários, devolvendo o `Usuario` ou None se for inválida."""
+    login = registro.get('login_usuario', '')
+    nome = registro.get('nome_usuario', '')
+    turno = TURNOS_ACEITOS.get(_normalizar(registro.get('turno_usuario', '')))
+    coordenador = registro.get('coordenador', '') or None
+
+    if not login:
+        erro = "O login do usuário é obrigatório."
+    elif len(login) > 15:
+        erro = f"O login '{login}' ultrapassa 15 caracteres."
+    elif login in logins_vistos:
+        erro = f"O login '{login}' está repetido na planilha (linha {logins_vistos[login]})."
+    elif not nome:
+        erro = "O nome do usuário é obrigatório."
+    elif len(nome) > 50:
+        erro = "O nome do usuário ultrapassa 50 caracteres."
+    elif turno is None:
+        erro = f"Turno '{registro.get('turno_usuario', '')}' inválido. Use T1, T2, T3, Manhã, Tarde ou Noite."
+    elif coordenador and len(coordenador) > 50:
+        erro = "O nome do coordenador ultrapassa 50 caracteres."
+    else:
+        logins_vistos[login] = linha
+        return Usuario(login_usuario=login, nome_usuario=nome, turno_usuario=turno, coordenador=coordenador)
+
+    relatorio.registrar_erro(linha, erro)
+    return None
+
+
+def importar_usuarios(arquivo, nome_arquivo):
+    """
+    Importa (ou atualiza) usuários a partir de uma planilha CSV ou XLSX.
+
+    A planilha deve ter as colunas `login_usuario`, `nome_usuario` e `turno_usuario`, e pode ter a
+    coluna `coordenador`. As linhas são lidas em fluxo e gravadas em lotes de `TAMANHO_LOTE` com
+    `bulk_create(update_conflicts=True)`: usuários novos são criados e os já cadastrados (mesmo
+    login) têm nome, turno e coordenador atualizados. Toda a importação ocorre em uma única
+    transação, de modo que uma falha no banco não deixa a base parcialmente importada.
+
+    Args:
+        arquivo: Arquivo binário aberto.
+        nome_arquivo (str): Nome do arquivo, usado para identificar o formato (.csv ou .xlsx).
+
+    Returns:
+        RelatorioImportacao: Totais da importação e erros por linha.
+
+    Raises:
+        PlanilhaInvalida: Se o arquivo não puder ser lido ou faltar alguma coluna obrigatória.
+    """
+    relatorio = RelatorioImportacao()
+    logins_vistos = {}
+
+    def validos():
+        for linha, registro in ler_linhas(arquivo, nome_arquivo, ['login_usuario', 'nome_usuario', 'turno_usuario']):
+            relatorio.linhas += 1
+            usuario = _validar_usuario(linha, registro, logins_vistos, relatorio)
+            if usuario is not None:
+                yield usuario
+
+    with transaction.atomic():
+        for lote in _em_lotes(validos(), TAMANHO_LOTE):
+            Usuario.objects.bulk_create(
+                lote,
+                update_conflicts=True,
+                unique_fields=['login_usuario'],
+                update_fields=['nome_usuario', 'turno_usuario', 'coordenador'],
+            )
+            relatorio.importadas += len(lote)
+        if relatorio.importadas:
+            invalidar_diretorio()
+            _limpar_autocompletar()
+    return relatorio
+
+
+def _validar_equipamento(linha, registro, relatorio):
+    """Valida uma linha da planilha de equipamentos, devolvendo o `Equipamento` ou None se for inválida."""
+    serial = registro.get('serial_number', '')
+    modelo = registro.get('modelo', '')
+    marca = registro.get('marca', '')
+
+    if not serial or not modelo or not marca:
+        erro = "Número de série, modelo e marca são obrigatórios."
+    elif len(serial) > 50:
+        erro = f"O número de série '{serial}' ultrapassa 50 caracteres."
+    elif len(modelo) > 50 or len(marca) > 50:
+        erro = "Modelo e marca não podem ultrapassar 50 caracteres."
+    else:
+        return Equipamento(serial_number=serial, modelo=modelo, marca=marca, status='Disponível')
+
+    relatorio.registrar_erro(linha, erro)
+    return None
+
+
+def _gravar_equipamentos(lote):
+    """
+    Grava, em uma transação, os equipamentos do lote cujo número de série ainda não está cadastrado.
+
+    Se outro processo cadastrar algum desses números de série entre a consulta e a gravação, a
+    gravação falha por inteiro e é refeita com uma nova consulta (até `TENTATIVAS_LOTE` vezes), de
+    modo que os totais informados correspondem às linhas realmente inseridas.
+
+    Returns:
+        tuple: Quantidade de equipamentos gravados e de ignorados (já cadastrados ou repetidos no lote).
+    """
+    seriais = {equipamento.serial_number for equipamento in lote}
+    for tentativa in range(1, TENTATIVAS_LOTE + 1):
+        existentes = set(
+            Equipamento.objects.filter(serial_number__in=seriais).values_list('serial_number', flat=True)
+        )
+        novos = []
+        for equipamento in lote:
+            if equipamento.serial_number not in existentes:
+                existentes.add(equipamento.serial_number)  # Repetições dentro do lote
+                novos.append(equipamento)
+        if not novos:
+            break
+        try:
+            with transaction.atomic():
+                Equipamento.objects.bulk_create(novos)
+        except IntegrityError:
+            if tentativa == TENTATIVAS_LOTE:
+                raise
+        else:
+            break
+    return len(novos), len(lote) - len(novos)
+
+
+def importar_equipamentos(arquivo, nome_arquivo):
+    """
+    Cadastra equipamentos em massa a partir de uma planilha CSV ou XLSX.
+
+    A planilha deve ter as colunas `serial_number`, `modelo` e `marca`; os equipamentos são
+    cadastrados com status "Disponível". As linhas são lidas em fluxo e processadas em lotes de
+    `TAMANHO_LOTE`, de modo que a memória usada não depende do tamanho do arquivo: para cada lote,
+    os números de série já cadastrados são obtidos com uma única consulta `IN` e os demais são
+    inseridos com um único `bulk_create` (ver `_gravar_equipamentos`).
+
+    Equipamentos já cadastrados, inclusive os repetidos na própria planilha, são contados como
+    ignorados e não são alterados. Cada lote é gravado na sua própria transação; como equipamentos
+    existentes são ignorados, uma importação interrompida pode ser repetida com o mesmo arquivo.
+
+    Args:
+        arquivo: Arquivo binário aberto.
+        nome_arquivo (str): Nome do arquivo, usado para identificar o formato (.csv ou .xlsx).
+
+    Returns:
+        RelatorioImportacao: Equipamentos criados ("importadas"), já existentes ("ignoradas") e
+                             linhas inválidas com os respectivos erros.
+
+    Raises:
+        PlanilhaInvalida: Se o arquivo não puder ser lido ou faltar alguma coluna obrigatória.
+    """
+    relatorio = RelatorioImportacao()
+
+    def validos():
+        for linha, registro in ler_linhas(arquivo, nome_arquivo, ['serial_number', 'modelo', 'marca']):
+            relatorio.linhas += 1
+            equipamento = _validar_equipamento(linha, registro, relatorio)
+            if equipamento is not None:
+                yield equipamento
+
+    for lote in _em_lotes(validos(), TAMANHO_LOTE):
+        gravados, ignorados = _gravar_equipamentos(lote)
+        relatorio.importadas += gravados
+        relatorio.ignoradas += ignorados
+        if gravados:
+            invalidar_dashboard([CHAVE_STATUS])
+            _limpar_autocompletar()
+    return relatorio
@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from check.models import Equipamento, RegistroTransacao, Usuario
+from check.resumo import reconstruir_resumo
+
+MODELOS = ['TC21', 'TC26', 'MC3300', 'CT40', 'Rádio T470']
+TURNOS = ['T1', 'T2', 'T3']
+
+
+def popular_base(equipamentos, usuarios, transacoes, semente=42):
+    """
+    Popula a base com dados sintéticos para os benchmarks.
+
+    Cada equipamento alterna retiradas e devoluções ao longo dos últimos 90 dias; os equipamentos
+    cuja última transação é uma retirada ficam com status "Retirado", com o portador e a data da
+    retirada, como após `registrar_retirada`. O resumo diário é recalculado ao final.
+
+    Args:
+        equipamentos (int): Quantidade de equipamentos a criar.
+        usuarios (int): Quantidade de operadores a criar.
+        transacoes (int): Quantidade total de transações a criar.
+        semente (int): Semente do gerador aleatório, para resultados reproduzíveis.
+    """
+    aleatorio = random.Random(semente)
+    Usuario.objects.bulk_create(
+        Usuario(
+            login_usuario=f'bench{i:05d}',
+            nome_usuario=f'Operador {i}',
+            turno_usuario=TURNOS[i % len(TURNOS)],
+        )
+        for i in range(usuarios)
+    )
+    Equipamento.objects.bulk_create(
+        Equipamento(
+            serial_number=f'BENCH{i:07d}',
+            modelo=MODELOS[i % len(MODELOS)],
+            marca='Zebra',
+        )
+        for i in range(equipamentos)
+    )
+    ids = list(Equipamento.objects.filter(serial_number__startswith='BENCH').values_list('id', flat=True))
+
+    inicio = timezone.now() - timedelta(days=90)
+    passo = timedelta(days=90) / max(transacoes, 1)
+    ultima_por_equipamento = {}
+    lote = []
+    for i in range(transacoes):
+        equipamento_id = ids[i % len(ids)]
+        tipo = 'Devolução' if ultima_por_equipamento.get(equipamento_id) == 'Retirada' else 'Retirada'
+        ultima_por_equipamento[equipamento_id] = tipo
+        operador = aleatorio.randrange(usuarios)
+        lote.append(RegistroTransacao(
+            equipamento_id=equipamento_id,
+            usuario_login=f'bench{operador:05d}',
+            turno=TURNOS[operador % len(TURNOS)],
+            tipo=tipo,
+            login_registrado='benchmark',
+            timestamp=inicio + passo * i,
+        ))
+        if len(lote) == 5000:
+            RegistroTransacao.objects.bulk_create(lote)
+            lote = []
+    RegistroTransacao.objects.bulk_create(lote)
+
+    retirados = [pk for pk, tipo in ultima_por_equipamento.items() if tipo == 'Retirada']
+    for i in range(0, len(retirados), 900):
+        Equipamento.objects.filter(id__in=retirados[i:i + 900]).update(status='Retirado')
+
+    # Estado de posse a partir da última transação de cada equipamento, como na migração 0009.
+    ultima_transacao = RegistroTransacao.objects.filter(equipamento=OuterRef('pk')).order_by('-timestamp', '-id')
+    ultima_retirada = ultima_transacao.filter(tipo='Retirada')
+    bench = Equipamento.objects.filter(serial_number__startswith='BENCH')
+    bench.update(ultima_transacao=Subquery(ultima_transacao.values('id')[:1]))
+    bench.filter(status='Retirado').update(
+        usuario_atual=Subquery(ultima_retirada.values('usuario_login')[:1]),
+        retirado_em=Subquery(ultima_retirada.values('timestamp')[:1]),
+    )
+    reconstruir_resumo()
+
+
+def medir(funcao, repeticoes):
+    """
+    Executa `funcao` repetidas vezes medindo a latência e o número de consultas SQL.
+
+    Returns:
+        dict: "consultas" (da última execução), "mediana_ms", "p95_ms" e "max_ms".
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'consultas': len(consultas),
+        'mediana_ms': statistics.median(tempos),
+        'p95_ms': tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        'max_ms': tempos[-1],
+    }
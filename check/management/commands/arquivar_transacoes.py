@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from check.arquivo import arquivar_transacoes, corte_do_arquivo
+from check.dashboard import invalidar_dashboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as transações anteriores aos últimos N meses para o arquivo de transações "
+        "(RegistroTransacaoArquivo), mantendo a tabela de transações pequena. A última transação "
+        "de cada equipamento e o resumo diário dos gráficos são mantidos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=settings.ARQUIVO_TRANSACOES_MESES,
+            help="Meses de histórico mantidos na tabela de transações (padrão: ARQUIVO_TRANSACOES_MESES).",
+        )
+        parser.add_argument('--lote', type=int, default=5000, help="Transações movidas por transação de banco.")
+
+    def handle(self, *args, **options):
+        if options['meses'] < 1:
+            raise CommandError("Informe ao menos 1 mês de histórico a manter.")
+        if options['lote'] < 1:
+            raise CommandError("O lote deve ter ao menos 1 transação.")
+
+        corte = corte_do_arquivo(options['meses'])
+        inicio = time.perf_counter()
+        arquivadas = arquivar_transacoes(corte, options['lote'])
+        if arquivadas:
+            invalidar_dashboard()
+        self.stdout.write(
+            f"{arquivadas} transações anteriores a {timezone.localtime(corte):%d/%m/%Y} arquivadas "
+            f"em {time.perf_counter() - inicio:.1f}s."
+        )
@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from check.busca import buscar_por_serial
+from check.models import Equipamento
+
+from ._massa_de_dados import MODELOS, medir
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a latência da busca por número de série (igual, prefixo e trecho) sobre uma base "
+        "populada com equipamentos sintéticos, comparando com o antigo `icontains`. Os dados são "
+        "criados em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipamentos', type=int, default=1_000_000)
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(42)
+        total = options['equipamentos']
+        seriais = [f'S{aleatorio.randrange(36 ** 9):09X}-{i:07d}' for i in range(total)]
+
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            for i in range(0, total, 5000):
+                Equipamento.objects.bulk_create(
+                    Equipamento(serial_number=serial, modelo=MODELOS[j % len(MODELOS)], marca='Zebra')
+                    for j, serial in enumerate(seriais[i:i + 5000], start=i)
+                )
+            self.stdout.write(f"Base populada com {total} equipamentos em {time.perf_counter() - inicio:.1f}s.")
+
+            alvo = seriais[total // 2]
+            cenarios = [
+                ('igual', alvo),
+                ('prefixo', alvo[:6]),
+                ('trecho', alvo[-7:-1]),
+            ]
+            for nome, termo in cenarios:
+                def nova_busca():
+                    list(buscar_por_serial(termo)[:25])
+
+                def busca_antiga():
+                    list(Equipamento.objects.filter(serial_number__icontains=termo)[:25])
+
+                for versao, funcao in [('índice', nova_busca), ('icontains', busca_antiga)]:
+                    resultado = medir(funcao, options['repeticoes'])
+                    self.stdout.write(
+                        f"{nome} ({versao}, '{termo}'): {resultado['consultas']} consultas, "
+                        f"mediana {resultado['mediana_ms']:.1f} ms, p95 {resultado['p95_ms']:.1f} ms, "
+                        f"máx {resultado['max_ms']:.1f} ms"
+                    )
+            transaction.set_rollback(True)
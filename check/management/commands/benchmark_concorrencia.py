@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from check.models import Equipamento, RegistroTransacao
+from check.transacoes import OperacaoInvalida, registrar_devolucao, registrar_retirada
+
+PREFIXO = 'CONC'
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara várias threads retirando e devolvendo os mesmos equipamentos ao mesmo tempo, "
+        "verifica que cada equipamento teve exatamente uma retirada e uma devolução por rodada e "
+        "mede a vazão. Usa o banco configurado; os dados criados são removidos ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--equipamentos', type=int, default=20)
+        parser.add_argument('--rodadas', type=int, default=10)
+        parser.add_argument(
+            '--wal', action='store_true',
+            help="No SQLite, ativa o journal_mode=WAL antes da execução.",
+        )
+
+    def handle(self, *args, **options):
+        if Equipamento.objects.filter(serial_number__startswith=PREFIXO).exists():
+            raise CommandError(f"Já existem equipamentos com o prefixo {PREFIXO}; remova-os antes.")
+        if options['wal'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+
+        Equipamento.objects.bulk_create(
+            Equipamento(serial_number=f'{PREFIXO}{i:05d}', modelo='TC21', marca='Zebra')
+            for i in range(options['equipamentos'])
+        )
+        ids = list(Equipamento.objects.filter(serial_number__startswith=PREFIXO).values_list('id', flat=True))
+
+        try:
+            resultado = self.executar(ids, options['threads'], options['rodadas'])
+        finally:
+            RegistroTransacao.objects.filter(equipamento_id__in=ids).delete()
+            Equipamento.objects.filter(id__in=ids).delete()
+
+        operacoes = resultado['retiradas'] + resultado['devolucoes']
+        esperado = len(ids) * options['rodadas']
+        self.stdout.write(
+            f"{connection.vendor}: {options['threads']} threads, {len(ids)} equipamentos, "
+            f"{options['rodadas']} rodadas em {resultado['segundos']:.2f}s"
+        )
+        self.stdout.write(
+            f"  operações confirmadas: {operacoes} ({operacoes / resultado['segundos']:.0f}/s), "
+            f"conflitos rejeitados: {resultado['conflitos']}, erros de banco: {resultado['erros']}"
+        )
+        if resultado['duplicadas']:
+            raise CommandError(f"Inconsistência: {resultado['duplicadas']} operações duplicadas.")
+        if not resultado['erros'] and (resultado['retiradas'], resultado['devolucoes']) != (esperado, esperado):
+            raise CommandError(
+                f"Inconsistência: {resultado['retiradas']} retiradas e {resultado['devolucoes']} "
+                f"devoluções (esperado {esperado} de cada)."
+            )
+        self.stdout.write(self.style.SUCCESS("  nenhuma retirada ou devolução duplicada."))
+
+    def executar(self, ids, threads, rodadas):
+        barreira = threading.Barrier(threads)
+        trava = threading.Lock()
+        contagem = Counter()
+        confirmadas = Counter()  # (rodada, fase, equipamento) -> operações confirmadas
+
+        def trabalhador(numero):
+            aleatorio = random.Random(numero)
+            login = f'conc{numero}'
+            try:
+                for rodada in range(rodadas):
+                    for fase, operacao in (('retirada', registrar_retirada), ('devolucao', registrar_devolucao)):
+                        ordem = ids[:]
+                        aleatorio.shuffle(ordem)
+                        barreira.wait()
+                        for equipamento_id in ordem:
+                            equipamento = Equipamento(pk=equipamento_id, serial_number=str(equipamento_id))
+                            try:
+                                operacao(equipamento, login, 'benchmark')
+                                chave = 'retiradas' if fase == 'retirada' else 'devolucoes'
+                            except OperacaoInvalida:
+                                chave = 'conflitos'
+                            except OperationalError:
+                                chave = 'erros'
+                            with trava:
+                                contagem[chave] += 1
+                                if chave in ('retiradas', 'devolucoes'):
+                                    confirmadas[(rodada, fase, equipamento_id)] += 1
+                        if fase == 'devolucao':
+                            # Equipamentos que não puderam ser devolvidos por erro de banco são
+                            # liberados pelo próprio portador antes da próxima rodada.
+                            barreira.wait()
+                            for equipamento in Equipamento.objects.filter(id__in=ids, usuario_atual=login):
+                                try:
+                                    registrar_devolucao(equipamento, login, 'benchmark')
+                                except OperationalError:
+                                    pass
+            finally:
+                connection.close()
+
+        inicio = time.perf_counter()
+        execucoes = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+        for execucao in execucoes:
+            execucao.start()
+        for execucao in execucoes:
+            execucao.join()
+
+        return {
+            'segundos': time.perf_counter() - inicio,
+            'retiradas': contagem['retiradas'],
+            'devolucoes': contagem['devolucoes'],
+            'conflitos': contagem['conflitos'],
+            'erros': contagem['erros'],
+            'duplicadas': sum(1 for total in confirmadas.values() if total > 1),
+        }
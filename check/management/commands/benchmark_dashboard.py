@@ -0,0 +1,45 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from check.dashboard import CHAVES_DASHBOARD, calcular_dashboard
+
+from ._massa_de_dados import medir, popular_base
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o número de consultas e a latência do cálculo do dashboard sobre uma base "
+        "populada com dados sintéticos. Os dados são criados em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacoes', type=int, default=100_000)
+        parser.add_argument('--equipamentos', type=int, default=3_000)
+        parser.add_argument('--usuarios', type=int, default=500)
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            popular_base(options['equipamentos'], options['usuarios'], options['transacoes'])
+            self.stdout.write(
+                f"Base populada com {options['transacoes']} transações em "
+                f"{time.perf_counter() - inicio:.1f}s."
+            )
+
+            def sem_cache():
+                cache.delete_many(CHAVES_DASHBOARD)
+                calcular_dashboard()
+
+            for nome, funcao in [('sem cache', sem_cache), ('com cache', calcular_dashboard)]:
+                resultado = medir(funcao, options['repeticoes'])
+                self.stdout.write(
+                    f"calcular_dashboard ({nome}): {resultado['consultas']} consultas, "
+                    f"mediana {resultado['mediana_ms']:.1f} ms, p95 {resultado['p95_ms']:.1f} ms, "
+                    f"máx {resultado['max_ms']:.1f} ms"
+                )
+            cache.delete_many(CHAVES_DASHBOARD)
+            transaction.set_rollback(True)
@@ -0,0 +1,141 @@
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from check.dashboard import contar_por_status
+from check.eventos import ultima_transacao
+from check.models import Equipamento
+from check.transacoes import registrar_devolucao, registrar_retirada
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de contenção de escrita no SQLite: N escritores simultâneos alternam retiradas e "
+        "devoluções (cada um com o seu equipamento) enquanto leitores consultam o dashboard. Mede "
+        "transações confirmadas por segundo, latência e erros \"database is locked\" com a "
+        "configuração padrão do SQLite e com a configuração do projeto (SQLITE_PRAGMAS e "
+        "transaction_mode). Usa um banco SQLite temporário; o banco configurado não é alterado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+        parser.add_argument('--leitores', type=int, default=2, help="Threads lendo o dashboard.")
+        parser.add_argument('--duracao', type=float, default=5, help="Segundos de escrita por medição.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("O teste de contenção cria um banco SQLite temporário; configure o SQLite.")
+
+        perfis = [
+            ("Padrão do SQLite (journal DELETE, transações DEFERRED, timeout de 5s)", {'journal_mode': 'DELETE'}, {}),
+            ("Projeto (SQLITE_PRAGMAS e OPTIONS de DATABASES)", settings.SQLITE_PRAGMAS, connection.settings_dict['OPTIONS']),
+        ]
+        original = {chave: connection.settings_dict[chave] for chave in ('NAME', 'OPTIONS')}
+        with tempfile.TemporaryDirectory() as diretorio:
+            connection.close()
+            connection.settings_dict['NAME'] = str(Path(diretorio) / 'escrita.sqlite3')
+            try:
+                call_command('migrate', verbosity=0)
+                Equipamento.objects.bulk_create(
+                    Equipamento(serial_number=f'ESC{i:05d}', modelo='TC21', marca='Zebra')
+                    for i in range(max(options['escritores']))
+                )
+                ids = list(Equipamento.objects.order_by('id').values_list('id', flat=True))
+                connection.close()
+
+                for nome, pragmas, opcoes in perfis:
+                    # As threads abrem as suas conexões com estas opções e PRAGMAs.
+                    connection.settings_dict['OPTIONS'] = opcoes
+                    with override_settings(SQLITE_PRAGMAS=pragmas):
+                        connection.ensure_connection()  # Aplica o journal_mode antes das threads
+                        connection.close()
+                        self.stdout.write(nome)
+                        for escritores in options['escritores']:
+                            resultado = self.medir(ids[:escritores], options['leitores'], options['duracao'])
+                            self.relatar(escritores, resultado)
+            finally:
+                connection.close()
+                connection.settings_dict.update(original)
+
+    def medir(self, ids, leitores, duracao):
+        """Executa os escritores (um por equipamento de `ids`) e os leitores por `duracao` segundos."""
+        latencias, contagem = [], Counter()
+        trava = threading.Lock()
+        barreira = threading.Barrier(len(ids) + leitores)
+        parar = threading.Event()
+
+        def escritor(equipamento_id):
+            equipamento = Equipamento(pk=equipamento_id, serial_number=str(equipamento_id))
+            login = f'escritor{equipamento_id}'
+            operacoes = [registrar_retirada, registrar_devolucao]
+            try:
+                connection.ensure_connection()
+                barreira.wait()
+                while not parar.is_set():
+                    inicio = time.perf_counter()
+                    try:
+                        operacoes[0](equipamento, login, 'benchmark')
+                        chave = 'confirmadas'
+                        operacoes.reverse()
+                    except OperationalError:  # "database is locked"
+                        chave = 'erros'
+                    with trava:
+                        contagem[chave] += 1
+                        if chave == 'confirmadas':
+                            latencias.append(time.perf_counter() - inicio)
+            finally:
+                connection.close()
+
+        def leitor():
+            try:
+                connection.ensure_connection()
+                barreira.wait()
+                while not parar.is_set():
+                    try:
+                        ultima_transacao()
+                        contar_por_status()
+                        chave = 'leituras'
+                    except OperationalError:
+                        chave = 'erros_leitura'
+                    with trava:
+                        contagem[chave] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=escritor, args=(i,)) for i in ids]
+        threads += [threading.Thread(target=leitor) for _ in range(leitores)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duracao)
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+        # Devolve os equipamentos que ficaram retirados, para a próxima medição.
+        for equipamento in Equipamento.objects.filter(id__in=ids, status='Retirado'):
+            registrar_devolucao(equipamento, equipamento.usuario_atual, 'benchmark')
+        connection.close()
+        return {'latencias': sorted(latencias), 'contagem': contagem, 'segundos': duracao}
+
+    def relatar(self, escritores, resultado):
+        latencias, contagem = resultado['latencias'], resultado['contagem']
+        if latencias:
+            mediana = statistics.median(latencias) * 1000
+            p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000
+        else:
+            mediana = p99 = float('nan')
+        self.stdout.write(
+            f"  {escritores:>2} escritores: {contagem['confirmadas'] / resultado['segundos']:>6.0f} transações/s, "
+            f"mediana {mediana:.1f} ms, p99 {p99:.1f} ms, "
+            f"\"database is locked\": {contagem['erros']} na escrita, {contagem['erros_leitura']} na leitura, "
+            f"{contagem['leituras'] / resultado['segundos']:.0f} leituras/s"
+        )
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ._massa_de_dados import popular_base
+
+# Páginas requisitadas por cada cliente, em rodízio.
+CAMINHOS = [
+    '/',
+    '/dashboard/dados/',
+    '/dashboard/dados/?periodo=turno_atual',
+    '/buscar_equipamentos/?sn=BENCH00012',
+]
+
+
+async def requisitar(leitor, escritor, caminho, sessao):
+    """Envia um GET HTTP/1.1 pela conexão aberta e lê a resposta inteira. Retorna (status, fechar)."""
+    escritor.write(
+        f"GET {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: sessionid={sessao}\r\n\r\n".encode()
+    )
+    await escritor.drain()
+    linhas = (await leitor.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    cabecalhos = {
+        nome.strip().lower(): valor.strip()
+        for nome, _, valor in (linha.partition(':') for linha in linhas[1:] if linha)
+    }
+    if 'content-length' in cabecalhos:
+        await leitor.readexactly(int(cabecalhos['content-length']))
+    elif cabecalhos.get('transfer-encoding') == 'chunked':
+        while True:
+            tamanho = int((await leitor.readline()).strip(), 16)
+            await leitor.readexactly(tamanho + 2)  # Bloco e o CRLF que o encerra
+            if not tamanho:
+                break
+    return int(linhas[0].split()[1]), cabecalhos.get('connection', '').lower() == 'close'
+
+
+async def cliente(numero, porta, sessao, fim, latencias, status):
+    """Um cliente com conexão persistente, requisitando as páginas em sequência até `fim`."""
+    conexao = None
+    indice = numero
+    while time.perf_counter() < fim:
+        caminho = CAMINHOS[indice % len(CAMINHOS)]
+        indice += 1
+        inicio = time.perf_counter()
+        try:
+            if conexao is None:
+                conexao = await asyncio.open_connection('127.0.0.1', porta)
+            codigo, fechar = await requisitar(*conexao, caminho, sessao)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            codigo, fechar = 'erro', True
+        latencias.append(time.perf_counter() - inicio)
+        status[codigo] += 1
+        if fechar and conexao is not None:
+            conexao[1].close()
+            conexao = None
+    if conexao is not None:
+        conexao[1].close()
+
+
+async def gerar_carga(porta, sessao, clientes, duracao):
+    """Executa `clientes` clientes simultâneos por `duracao` segundos."""
+    latencias, status = [], Counter()
+    fim = time.perf_counter() + duracao
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(i, porta, sessao, fim, latencias, status) for i in range(clientes)))
+    return latencias, status, time.perf_counter() - inicio
+
+
+def aguardar_porta(porta, processo, limite=30):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise CommandError(f"O servidor encerrou ao iniciar (código {processo.returncode}).")
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"O servidor não abriu a porta {porta} em {limite}s.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga: compara vazão e latência (mediana e p99) das páginas do dashboard e da "
+        "busca servidas por WSGI (gunicorn, views síncronas) e por ASGI (uvicorn, views "
+        "assíncronas), com N clientes simultâneos. Usa um banco SQLite temporário com dados "
+        "sintéticos; o banco configurado não é alterado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=200)
+        parser.add_argument('--duracao', type=float, default=15, help="Segundos de carga por servidor.")
+        parser.add_argument('--threads', type=int, default=32, help="Threads do worker WSGI.")
+        parser.add_argument('--porta', type=int, default=8765)
+        parser.add_argument('--equipamentos', type=int, default=20_000)
+        parser.add_argument('--usuarios', type=int, default=500)
+        parser.add_argument('--transacoes', type=int, default=200_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("O teste de carga cria um banco SQLite temporário; configure o SQLite.")
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            banco = str(Path(diretorio) / 'carga.sqlite3')
+            sessao = self.preparar_banco(banco, options)
+            ambiente = {**os.environ, 'DB_NAME': banco, 'SECRET_KEY': settings.SECRET_KEY}
+            porta = options['porta']
+            servidores = [
+                ('WSGI (gunicorn, views síncronas)', [
+                    sys.executable, '-m', 'gunicorn', 'setup.wsgi:application',
+                    '--bind', f'127.0.0.1:{porta}', '--workers', '1',
+                    '--worker-class', 'gthread', '--threads', str(options['threads']),
+                    '--log-level', 'warning',
+                ]),
+                ('ASGI (uvicorn, views assíncronas)', [
+                    sys.executable, '-m', 'uvicorn', 'setup.asgi:application',
+                    '--port', str(porta), '--workers', '1', '--log-level', 'warning', '--no-access-log',
+                ]),
+            ]
+
+            self.stdout.write(
+                f"{options['clientes']} clientes simultâneos, {options['duracao']:.0f}s por servidor, "
+                f"páginas: {', '.join(CAMINHOS)}"
+            )
+            for nome, comando in servidores:
+                processo = subprocess.Popen(comando, cwd=settings.BASE_DIR, env=ambiente)
+                try:
+                    aguardar_porta(porta, processo)
+                    asyncio.run(gerar_carga(porta, sessao, 10, 2))  # Aquecimento
+                    latencias, status, segundos = asyncio.run(
+                        gerar_carga(porta, sessao, options['clientes'], options['duracao'])
+                    )
+                finally:
+                    processo.terminate()
+                    processo.wait(timeout=30)
+                self.relatar(nome, latencias, status, segundos)
+
+    def preparar_banco(self, banco, options):
+        """Cria, migra e popula o banco temporário. Retorna a chave de uma sessão autenticada."""
+        nome_original = connection.settings_dict['NAME']
+        connection.close()
+        connection.settings_dict['NAME'] = banco
+        try:
+            call_command('migrate', verbosity=0)
+            popular_base(options['equipamentos'], options['usuarios'], options['transacoes'])
+            usuario = User.objects.create_user('carga', password='carga')
+            sessao = SessionStore()
+            sessao[SESSION_KEY] = str(usuario.pk)
+            sessao[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            sessao[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+            sessao.create()
+            return sessao.session_key
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = nome_original
+
+    def relatar(self, nome, latencias, status, segundos):
+        latencias = sorted(latencias)
+        erros = sum(quantidade for codigo, quantidade in status.items() if codigo != 200)
+        self.stdout.write(nome)
+        self.stdout.write(
+            f"  {len(latencias)} requisições em {segundos:.1f}s: {len(latencias) / segundos:.0f} req/s, "
+            f"mediana {statistics.median(latencias) * 1000:.1f} ms, "
+            f"p99 {latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000:.1f} ms, "
+            f"erros {erros} {dict(status) if erros else ''}".rstrip()
+        )
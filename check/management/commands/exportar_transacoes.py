@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from check.exportacao import escrever_csv, escrever_xlsx, ler_filtro_exportacao, linhas_do_historico
+from check.periodos import PERIODOS, FiltroInvalido
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta o histórico de transações (inclusive as arquivadas), com os dados dos equipamentos "
+        "e dos operadores, para um arquivo .csv ou .xlsx (pela extensão). As transações são lidas "
+        "em lotes, com memória constante mesmo para milhões de linhas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--periodo', choices=list(PERIODOS))
+        parser.add_argument('--inicio', help="AAAA-MM-DD ou AAAA-MM-DDTHH:MM (inclusivo).")
+        parser.add_argument('--fim', help="AAAA-MM-DD (inclui o dia) ou AAAA-MM-DDTHH:MM.")
+        parser.add_argument('--turno', help="Turno da transação (T1, T2 ou T3).")
+        parser.add_argument('--equipamento', help="Número de série do equipamento.")
+
+    def handle(self, *args, **options):
+        try:
+            filtro = ler_filtro_exportacao(options)
+        except FiltroInvalido as erro:
+            raise CommandError(str(erro))
+
+        escrever = escrever_xlsx if options['arquivo'].lower().endswith('.xlsx') else escrever_csv
+        inicio = time.perf_counter()
+        try:
+            with open(options['arquivo'], 'wb') as arquivo:
+                total = escrever(linhas_do_historico(**filtro), arquivo)
+        except OSError as erro:
+            raise CommandError(str(erro))
+        self.stdout.write(
+            f"{total} transações exportadas para {options['arquivo']} em {time.perf_counter() - inicio:.1f}s."
+        )
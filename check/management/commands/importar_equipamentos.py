@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from check.importacao import PlanilhaInvalida, importar_equipamentos
+
+
+class Command(BaseCommand):
+    help = (
+        "Cadastra equipamentos em massa a partir de uma planilha .xlsx ou .csv com as colunas "
+        "serial_number, modelo e marca. Números de série já cadastrados são ignorados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                relatorio = importar_equipamentos(arquivo, options['arquivo'])
+        except (OSError, PlanilhaInvalida) as erro:
+            raise CommandError(str(erro))
+
+        for erro in relatorio.erros:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erro']}")
+        self.stdout.write(
+            f"{relatorio.linhas} linhas lidas, {relatorio.importadas} equipamentos cadastrados, "
+            f"{relatorio.ignoradas} já existentes, {relatorio.invalidas} com erro."
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from check.importacao import PlanilhaInvalida, importar_usuarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa (ou atualiza) usuários a partir de uma planilha .xlsx ou .csv com as colunas "
+        "login_usuario, nome_usuario, turno_usuario e coordenador."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                relatorio = importar_usuarios(arquivo, options['arquivo'])
+        except (OSError, PlanilhaInvalida) as erro:
+            raise CommandError(str(erro))
+
+        for erro in relatorio.erros:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erro']}")
+        self.stdout.write(
+            f"{relatorio.linhas} linhas lidas, {relatorio.importadas} importadas, "
+            f"{relatorio.invalidas} com erro."
+        )
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from check.dashboard import invalidar_dashboard
+from check.resumo import reconstruir_resumo
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o resumo diário usado pelos gráficos do dashboard a partir de todo o histórico "
+        "de transações, substituindo o resumo atual."
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        linhas = reconstruir_resumo()
+        invalidar_dashboard()
+        self.stdout.write(f"Resumo reconstruído com {linhas} linhas em {time.perf_counter() - inicio:.1f}s.")
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0006_registrotransacao_login_registrado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrotransacao',
+            index=models.Index(fields=['equipamento', 'tipo', 'timestamp'], name='transacao_equip_tipo_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0007_registrotransacao_equipamento_tipo_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipamento',
+            name='retirado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='equipamento',
+            name='ultima_transacao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='check.registrotransacao'),
+        ),
+        migrations.AddField(
+            model_name='equipamento',
+            name='usuario_atual',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['status', 'retirado_em'], name='equip_status_retirado_em_idx'),
+        ),
+    ]
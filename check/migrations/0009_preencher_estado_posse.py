@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_estado_posse(apps, schema_editor):
+    """Preenche o estado de posse dos equipamentos a partir do histórico de transações."""
+    Equipamento = apps.get_model('check', 'Equipamento')
+    RegistroTransacao = apps.get_model('check', 'RegistroTransacao')
+
+    ultima_transacao = RegistroTransacao.objects.filter(
+        equipamento=OuterRef('pk')
+    ).order_by('-timestamp', '-id')
+    ultima_retirada = RegistroTransacao.objects.filter(
+        equipamento=OuterRef('pk'), tipo='Retirada'
+    ).order_by('-timestamp', '-id')
+
+    Equipamento.objects.update(ultima_transacao=Subquery(ultima_transacao.values('id')[:1]))
+    Equipamento.objects.filter(status='Retirado').update(
+        usuario_atual=Subquery(ultima_retirada.values('usuario_login')[:1]),
+        retirado_em=Subquery(ultima_retirada.values('timestamp')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0008_equipamento_estado_posse'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_estado_posse, migrations.RunPython.noop),
+    ]
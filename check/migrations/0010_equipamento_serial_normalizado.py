@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0009_preencher_estado_posse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipamento',
+            name='serial_normalizado',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Upper(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace('serial_number', models.Value(' ')), models.Value('-')), models.Value('/')), models.Value('.'))), output_field=models.CharField(max_length=50)),
+        ),
+    ]
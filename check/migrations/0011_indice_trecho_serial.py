@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# Cópia do SQL de check/busca.py no momento desta migração: a migração não importa o módulo, que
+# pode mudar depois. O índice também é recriado após cada `migrate` (ver check/signals.py).
+TABELA_FTS = 'check_equipamento_serial_fts'
+
+SQL_SQLITE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        serial_normalizado, content='check_equipamento', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, serial_normalizado) VALUES (new.id, new.serial_normalizado);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, serial_normalizado)
+        VALUES ('delete', old.id, old.serial_normalizado);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF serial_number ON check_equipamento BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, serial_normalizado)
+        VALUES ('delete', old.id, old.serial_normalizado);
+        INSERT INTO {TABELA_FTS}(rowid, serial_normalizado) VALUES (new.id, new.serial_normalizado);
+    END
+    """,
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+]
+
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS equip_serial_norm_trgm_idx
+    ON check_equipamento USING gin (serial_normalizado gin_trgm_ops)
+    """,
+]
+
+
+def criar_indice(apps, schema_editor):
+    conexao = schema_editor.connection
+    sql = {'sqlite': SQL_SQLITE, 'postgresql': SQL_POSTGRESQL}.get(conexao.vendor, [])
+    with conexao.cursor() as cursor:
+        for comando in sql:
+            cursor.execute(comando)
+
+
+def remover_indice(apps, schema_editor):
+    conexao = schema_editor.connection
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'sqlite':
+            for sufixo in ['ai', 'ad', 'au']:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{sufixo}")
+            cursor.execute(f"DROP TABLE IF EXISTS {TABELA_FTS}")
+        elif conexao.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS equip_serial_norm_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0010_equipamento_serial_normalizado'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:47
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0011_indice_trecho_serial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Upper('login_usuario'), name='usuario_login_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Upper('nome_usuario'), name='usuario_nome_upper_idx'),
+        ),
+    ]
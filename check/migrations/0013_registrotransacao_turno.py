@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0012_usuario_indices_autocompletar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrotransacao',
+            name='turno',
+            field=models.CharField(blank=True, choices=[('T1', 'Manhã'), ('T2', 'Tarde'), ('T3', 'Noite')], max_length=2, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='registrotransacao',
+            index=models.Index(fields=['tipo', 'timestamp'], name='transacao_tipo_ts_idx'),
+        ),
+    ]
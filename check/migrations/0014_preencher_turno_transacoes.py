@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_turno(apps, schema_editor):
+    """Preenche o turno das transações existentes com o turno atual de cada operador."""
+    RegistroTransacao = apps.get_model('check', 'RegistroTransacao')
+    Usuario = apps.get_model('check', 'Usuario')
+
+    RegistroTransacao.objects.update(turno=Subquery(
+        Usuario.objects.filter(login_usuario=OuterRef('usuario_login')).values('turno_usuario')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0013_registrotransacao_turno'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_turno, migrations.RunPython.noop),
+    ]
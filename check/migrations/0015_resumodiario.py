@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0014_preencher_turno_transacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('turno', models.CharField(blank=True, default='', max_length=2)),
+                ('modelo', models.CharField(max_length=50)),
+                ('tipo', models.CharField(choices=[('Retirada', 'Retirada'), ('Devolução', 'Devolução')], max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('minutos_uso', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dia', 'turno', 'modelo', 'tipo'), name='resumo_diario_chave_unica')],
+            },
+        ),
+    ]
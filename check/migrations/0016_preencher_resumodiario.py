@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def preencher_resumo(apps, schema_editor):
+    """
+    Calcula o resumo diário a partir do histórico de transações existente.
+
+    Cópia do cálculo de `check.resumo.calcular_resumo` no momento desta migração: a migração não
+    importa o módulo, que pode mudar depois.
+    """
+    RegistroTransacao = apps.get_model('check', 'RegistroTransacao')
+    ResumoDiario = apps.get_model('check', 'ResumoDiario')
+
+    grupos = defaultdict(lambda: [0, 0])
+    equipamento_anterior, retirado_em = None, None
+    linhas = (
+        RegistroTransacao.objects.order_by('equipamento_id', 'timestamp', 'id')
+        .values_list('equipamento_id', 'timestamp', 'equipamento__modelo', 'turno', 'tipo')
+        .iterator(chunk_size=5000)
+    )
+    for equipamento_id, timestamp, modelo, turno, tipo in linhas:
+        if equipamento_id != equipamento_anterior:
+            equipamento_anterior, retirado_em = equipamento_id, None
+        grupo = grupos[timezone.localdate(timestamp), turno or '', modelo, tipo]
+        grupo[0] += 1
+        if tipo == 'Retirada':
+            retirado_em = timestamp
+        else:
+            if retirado_em is not None and timestamp >= retirado_em:
+                grupo[1] += round((timestamp - retirado_em).total_seconds() / 60)
+            retirado_em = None
+
+    ResumoDiario.objects.bulk_create(
+        (
+            ResumoDiario(dia=dia, turno=turno, modelo=modelo, tipo=tipo, total=total, minutos_uso=minutos)
+            for (dia, turno, modelo, tipo), (total, minutos) in grupos.items()
+        ),
+        batch_size=1000,
+    )
+
+
+def limpar_resumo(apps, schema_editor):
+    apps.get_model('check', 'ResumoDiario').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0015_resumodiario'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_resumo, limpar_resumo),
+    ]
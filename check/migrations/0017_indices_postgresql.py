@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# Índices específicos do PostgreSQL; nos demais bancos, a migração não faz nada.
+SQL_INDICES = [
+    # Índice parcial: apenas os equipamentos retirados (uma fração pequena do parque), usados pela
+    # tabela de equipamentos em operação e pelos contadores do dashboard.
+    """
+    CREATE INDEX IF NOT EXISTS equip_status_retirado_parcial_idx
+    ON check_equipamento (status) WHERE status = 'Retirado'
+    """,
+    # BRIN: o histórico só recebe inserções, em ordem de tempo, então cada faixa de páginas da
+    # tabela cobre um intervalo de datas. O índice ocupa poucas páginas mesmo com milhões de
+    # transações e atende às consultas por período que não filtram pelo tipo.
+    """
+    CREATE INDEX IF NOT EXISTS transacao_timestamp_brin_idx
+    ON check_registrotransacao USING brin ("timestamp")
+    """,
+]
+
+
+def criar_indices(apps, schema_editor):
+    conexao = schema_editor.connection
+    if conexao.vendor != 'postgresql':
+        return
+    with conexao.cursor() as cursor:
+        for sql in SQL_INDICES:
+            cursor.execute(sql)
+
+
+def remover_indices(apps, schema_editor):
+    conexao = schema_editor.connection
+    if conexao.vendor != 'postgresql':
+        return
+    with conexao.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS equip_status_retirado_parcial_idx")
+        cursor.execute("DROP INDEX IF EXISTS transacao_timestamp_brin_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0016_preencher_resumodiario'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0017_indices_postgresql'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroTransacaoArquivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('usuario_login', models.CharField(max_length=50)),
+                ('turno', models.CharField(blank=True, choices=[('T1', 'Manhã'), ('T2', 'Tarde'), ('T3', 'Noite')], max_length=2, null=True)),
+                ('tipo', models.CharField(choices=[('Retirada', 'Retirada'), ('Devolução', 'Devolução')], max_length=10)),
+                ('login_registrado', models.CharField(default='desconhecido', max_length=100)),
+                ('timestamp', models.DateTimeField()),
+                ('equipamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='check.equipamento')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tipo', 'timestamp'], name='arquivo_tipo_ts_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0018_registrotransacaoarquivo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrotransacao',
+            index=models.Index(fields=['equipamento', 'timestamp', 'id'], name='transacao_equip_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrotransacaoarquivo',
+            index=models.Index(fields=['equipamento', 'timestamp', 'id'], name='arquivo_equip_ts_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check', '0019_indices_linha_do_tempo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrotransacaoarquivo',
+            index=models.Index(fields=['timestamp'], name='arquivo_ts_idx'),
+        ),
+    ]
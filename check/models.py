@@ -1,10 +1,22 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Replace, Upper
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 # Modelo de Equipamento
 class Equipamento(models.Model):
     serial_number = models.CharField(max_length=50, unique=True)
+    # Número de série sem separadores e em maiúsculas, calculado pelo banco e indexado para a busca
+    # (ver check/busca.py).
+    serial_normalizado = models.GeneratedField(
+        expression=Upper(
+            Replace(Replace(Replace(Replace('serial_number', Value(' ')), Value('-')), Value('/')), Value('.'))
+        ),
+        output_field=models.CharField(max_length=50),
+        db_persist=True,
+        db_index=True,
+    )
     modelo = models.CharField(max_length=50)
     marca = models.CharField(max_length=50)
     status = models.CharField(
@@ -12,6 +24,19 @@ class Equipamento(models.Model):
         choices=[('Disponível', 'Disponível'), ('Retirado', 'Retirado'), ('Manutenção', 'Manutenção')], 
         default='Disponível'
     )
+    # Estado atual da posse, mantido pelos fluxos de retirada e devolução para evitar
+    # varreduras no histórico de transações.
+    usuario_atual = models.CharField(max_length=50, blank=True, null=True)  # Login de quem está com o equipamento
+    retirado_em = models.DateTimeField(blank=True, null=True)
+    ultima_transacao = models.ForeignKey(
+        'RegistroTransacao', on_delete=models.SET_NULL, blank=True, null=True, related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            # Atende à consulta de equipamentos retirados além do prazo de entrega.
+            models.Index(fields=['status', 'retirado_em'], name='equip_status_retirado_em_idx'),
+        ]
 
     def __str__(self):
         return f"{self.marca} {self.modelo} - {self.serial_number}"
@@ -30,6 +55,13 @@ class Usuario(models.Model):
     turno_usuario = models.CharField(max_length=2, choices=TURNOS)
     coordenador = models.CharField(max_length=50, blank=True, null=True)  # Ou você pode usar um relacionamento caso "coordenador" seja outro usuário
 
+    class Meta:
+        indexes = [
+            # Atendem ao autocompletar por prefixo do login e do nome, sem diferenciar maiúsculas.
+            models.Index(Upper('login_usuario'), name='usuario_login_upper_idx'),
+            models.Index(Upper('nome_usuario'), name='usuario_nome_upper_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nome_usuario} ({self.login_usuario})"
 
@@ -42,9 +74,74 @@ class RegistroTransacao(models.Model):
     
     equipamento = models.ForeignKey(Equipamento, on_delete=models.CASCADE)
     usuario_login = models.CharField(max_length=50)  # Armazenamos o login como string
+    # Turno do operador no momento da transação, gravado junto com ela para que os gráficos por
+    # turno agrupem no próprio banco, sem depender do cadastro atual do usuário.
+    turno = models.CharField(max_length=2, choices=Usuario.TURNOS, blank=True, null=True)
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
     login_registrado = models.CharField(max_length=100, default='desconhecido')
     timestamp = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Atende à busca da última retirada de cada equipamento (alertas de entrega e devoluções).
+            models.Index(fields=['equipamento', 'tipo', 'timestamp'], name='transacao_equip_tipo_ts_idx'),
+            # Atende aos gráficos do dashboard, que contam as transações de um tipo em um período.
+            models.Index(fields=['tipo', 'timestamp'], name='transacao_tipo_ts_idx'),
+            # Atende à linha do tempo de cada equipamento, paginada por (timestamp, id) (ver check/historico.py).
+            models.Index(fields=['equipamento', 'timestamp', 'id'], name='transacao_equip_ts_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.tipo} - {self.equipamento.serial_number} por {self.usuario_login} em {self.timestamp}"
+
+
+# Arquivo das transações antigas (ver check/arquivo.py)
+class RegistroTransacaoArquivo(models.Model):
+    """
+    Transações movidas de `RegistroTransacao` pelo comando `arquivar_transacoes`, com o mesmo id e
+    os mesmos campos. A tabela de transações mantém apenas o histórico recente; o arquivo só é
+    consultado para períodos que o alcançam, e os gráficos de dias inteiros continuam lendo o
+    resumo diário, que não é alterado pelo arquivamento.
+    """
+    id = models.BigIntegerField(primary_key=True)  # Id original da transação
+    equipamento = models.ForeignKey(Equipamento, on_delete=models.CASCADE, related_name='+')
+    usuario_login = models.CharField(max_length=50)
+    turno = models.CharField(max_length=2, choices=Usuario.TURNOS, blank=True, null=True)
+    tipo = models.CharField(max_length=10, choices=RegistroTransacao.TIPO_CHOICES)
+    login_registrado = models.CharField(max_length=100, default='desconhecido')
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tipo', 'timestamp'], name='arquivo_tipo_ts_idx'),
+            # Atende à fronteira do arquivo (ver `fronteira_do_arquivo`).
+            models.Index(fields=['timestamp'], name='arquivo_ts_idx'),
+            models.Index(fields=['equipamento', 'timestamp', 'id'], name='arquivo_equip_ts_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} - {self.equipamento_id} por {self.usuario_login} em {self.timestamp} (arquivada)"
+
+
+# Resumo diário das transações, usado pelos gráficos do dashboard
+class ResumoDiario(models.Model):
+    """
+    Contagem de transações por dia, turno, modelo de equipamento e tipo, mantida a cada transação
+    registrada (ver check/resumo.py). Os gráficos leem o resumo, de modo que o seu custo depende
+    do período consultado, e não do tamanho do histórico.
+    """
+    dia = models.DateField()  # Dia (hora local) da transação
+    turno = models.CharField(max_length=2, blank=True, default='')  # '' para logins sem cadastro
+    modelo = models.CharField(max_length=50)
+    tipo = models.CharField(max_length=10, choices=RegistroTransacao.TIPO_CHOICES)
+    total = models.PositiveIntegerField(default=0)
+    # Soma do tempo de posse, em minutos, dos equipamentos devolvidos (apenas nas linhas de devolução).
+    minutos_uso = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'turno', 'modelo', 'tipo'], name='resumo_diario_chave_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.turno or '-'} {self.modelo} {self.tipo}: {self.total}"
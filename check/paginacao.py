@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+
+
+def codificar_cursor(valor, pk):
+    """
+    Gera um cursor opaco a partir da chave de ordenação da última linha de uma página.
+
+    Args:
+        valor: Valor do campo de ordenação da linha (str, datetime, int ou None).
+        pk (int): Chave primária da linha, usada como critério de desempate.
+
+    Returns:
+        str: Cursor em base64, seguro para ser enviado como parâmetro de URL.
+    """
+    if isinstance(valor, datetime):
+        valor = {'dt': valor.isoformat()}
+    bruto = json.dumps([valor, pk]).encode()
+    return base64.urlsafe_b64encode(bruto).decode()
+
+
+def decodificar_cursor(cursor):
+    """
+    Converte um cursor gerado por `codificar_cursor` de volta para a chave (valor, pk).
+
+    Args:
+        cursor (str): Cursor recebido do cliente.
+
+    Returns:
+        tuple or None: A tupla (valor, pk), ou None se o cursor for inválido.
+    """
+    try:
+        valor, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(valor, dict):
+            valor = datetime.fromisoformat(valor['dt'])
+        return valor, int(pk)
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+
+def ordenar_keyset(queryset, campo, descendente=False, nulo=True):
+    """
+    Ordena o queryset por `campo` e pela chave primária, na mesma direção.
+
+    Valores nulos ficam no início da ordenação ascendente e no final da descendente,
+    que é a convenção assumida por `filtrar_keyset`. Com `nulo=False` (campo obrigatório), a
+    ordenação não menciona os nulos e pode ser atendida por um índice (campo, pk) nas duas direções.
+    """
+    if not nulo:
+        return queryset.order_by(f'-{campo}', '-pk') if descendente else queryset.order_by(campo, 'pk')
+    if descendente:
+        return queryset.order_by(F(campo).desc(nulls_last=True), '-pk')
+    return queryset.order_by(F(campo).asc(nulls_first=True), 'pk')
+
+
+def filtrar_keyset(queryset, campo, valor, pk, descendente=False, nulo=True):
+    """
+    Restringe o queryset às linhas posteriores à chave (valor, pk) na ordenação de `ordenar_keyset`.
+
+    Diferente de um OFFSET, o filtro permite que o banco salte diretamente para o início da
+    página pelo índice, com custo independente da posição da página na listagem.
+
+    Args:
+        queryset (QuerySet): Consulta a ser paginada.
+        campo (str): Campo de ordenação.
+        valor: Valor de `campo` na última linha da página anterior.
+        pk (int): Chave primária da última linha da página anterior.
+        descendente (bool): Direção da ordenação.
+        nulo (bool): Se o campo aceita nulos. Para campos obrigatórios, o filtro inclui também o
+                     limite `campo <= valor` (ou `>=`), que o banco usa para começar a leitura do
+                     índice na página, em vez de percorrê-lo desde o início.
+
+    Returns:
+        QuerySet: O queryset filtrado.
+    """
+    if not nulo:
+        if descendente:
+            return queryset.filter(
+                Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor}, pk__lt=pk), **{f'{campo}__lte': valor}
+            )
+        return queryset.filter(
+            Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor}, pk__gt=pk), **{f'{campo}__gte': valor}
+        )
+
+    if descendente:
+        if valor is None:
+            return queryset.filter(Q(**{f'{campo}__isnull': True}, pk__lt=pk))
+        return queryset.filter(
+            Q(**{f'{campo}__lt': valor})
+            | Q(**{campo: valor}, pk__lt=pk)
+            | Q(**{f'{campo}__isnull': True})
+        )
+
+    if valor is None:
+        return queryset.filter(
+            Q(**{f'{campo}__isnull': True}, pk__gt=pk) | Q(**{f'{campo}__isnull': False})
+        )
+    return queryset.filter(Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor}, pk__gt=pk))
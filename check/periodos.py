@@ -0,0 +1,141 @@
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Usuario
+
+# Intervalo de tempo [inicio, fim). Um limite None deixa o intervalo aberto daquele lado.
+Periodo = namedtuple('Periodo', ['inicio', 'fim'])
+
+# Períodos predefinidos aceitos pelo dashboard e pelos endpoints que filtram por data.
+PERIODOS = {
+    'turno_atual': 'Este turno',
+    'hoje': 'Hoje',
+    'ultimos_7_dias': 'Últimos 7 dias',
+}
+
+TURNOS_VALIDOS = {codigo for codigo, _ in Usuario.TURNOS}
+
+
+class FiltroInvalido(ValueError):
+    """Um parâmetro de período ou de turno não pôde ser interpretado."""
+
+
+def inicio_do_dia(dia):
+    """Meia-noite, no fuso horário local, do início de `dia`."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def alinhado_ao_dia(instante):
+    """Indica se o limite é vazio ou cai exatamente na meia-noite local (um limite do resumo diário)."""
+    return instante is None or timezone.localtime(instante).time() == time.min
+
+
+def turno_do_horario(agora=None):
+    """
+    Identifica o turno em andamento pelo horário de início de cada turno
+    (`HORARIO_INICIO_TURNOS`). Um turno termina quando o seguinte começa, inclusive o que passa da
+    meia-noite.
+
+    Args:
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+
+    Returns:
+        tuple: (código do turno, `Periodo` do turno).
+    """
+    agora = timezone.localtime(agora or timezone.now())
+    hoje = agora.date()
+    inicios = sorted(
+        (inicio_do_dia(dia) + timedelta(hours=hora), turno)
+        for dia in (hoje - timedelta(days=1), hoje, hoje + timedelta(days=1))
+        for turno, hora in settings.HORARIO_INICIO_TURNOS.items()
+    )
+    for (inicio, turno), (fim, _) in zip(inicios, inicios[1:]):
+        if inicio <= agora < fim:
+            return turno, Periodo(inicio, fim)
+    raise ValueError("HORARIO_INICIO_TURNOS deve definir ao menos um turno.")
+
+
+def periodo_predefinido(nome, agora=None):
+    """
+    Calcula um dos períodos de `PERIODOS`:
+        - "turno_atual": do início do turno em andamento até o início do próximo;
+        - "hoje": do início do dia até o início do dia seguinte;
+        - "ultimos_7_dias": os últimos 7 dias, incluindo hoje.
+
+    Args:
+        nome (str): Chave de `PERIODOS`.
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+
+    Returns:
+        Periodo: Limites do período.
+
+    Raises:
+        KeyError: Se o período não existir.
+    """
+    if nome not in PERIODOS:
+        raise KeyError(nome)
+    if nome == 'turno_atual':
+        return turno_do_horario(agora)[1]
+    amanha = inicio_do_dia(timezone.localdate(agora) + timedelta(days=1))
+    dias = 1 if nome == 'hoje' else 7
+    return Periodo(amanha - timedelta(days=dias), amanha)
+
+
+def _limite(texto, nome, fim=False):
+    """Converte uma data ou data e hora ISO em limite do período; uma data de fim inclui o dia."""
+    try:
+        dia = parse_date(texto)
+        instante = None if dia else parse_datetime(texto)
+    except ValueError:  # Data no formato ISO, mas inexistente (ex.: mês 13)
+        dia = instante = None
+    if dia is not None:
+        return inicio_do_dia(dia + timedelta(days=1) if fim else dia)
+    if instante is None:
+        raise FiltroInvalido(f"Parâmetro '{nome}' inválido: use AAAA-MM-DD ou AAAA-MM-DDTHH:MM.")
+    return instante if timezone.is_aware(instante) else timezone.make_aware(instante)
+
+
+def ler_filtro(parametros, agora=None):
+    """
+    Interpreta os parâmetros de filtro de uma requisição.
+
+    Parâmetros aceitos:
+        - "periodo": um dos `PERIODOS`;
+        - "inicio" e "fim": datas (AAAA-MM-DD, o fim inclui o dia) ou datas e horas ISO, que
+          substituem o respectivo limite do período;
+        - "turno": código do turno (T1, T2 ou T3).
+
+    Args:
+        parametros (QueryDict or dict): Parâmetros da requisição.
+        agora (datetime, opcional): Instante de referência. Usa `timezone.now()` se omitido.
+
+    Returns:
+        dict: "inicio", "fim" e "turno", com None para os filtros ausentes.
+
+    Raises:
+        FiltroInvalido: Se algum parâmetro for inválido.
+    """
+    periodo = Periodo(None, None)
+    nome = parametros.get('periodo')
+    if nome:
+        try:
+            periodo = periodo_predefinido(nome, agora)
+        except KeyError:
+            raise FiltroInvalido(f"Período '{nome}' inválido. Use {', '.join(PERIODOS)}.")
+
+    inicio, fim = periodo
+    if parametros.get('inicio'):
+        inicio = _limite(parametros['inicio'], 'inicio')
+    if parametros.get('fim'):
+        fim = _limite(parametros['fim'], 'fim', fim=True)
+    if inicio is not None and fim is not None and fim <= inicio:
+        raise FiltroInvalido("O fim do período deve ser posterior ao início.")
+
+    turno = parametros.get('turno') or None
+    if turno is not None and turno not in TURNOS_VALIDOS:
+        raise FiltroInvalido(f"Turno '{turno}' inválido. Use {', '.join(sorted(TURNOS_VALIDOS))}.")
+    return {'inicio': inicio, 'fim': fim, 'turno': turno}
@@ -0,0 +1,118 @@
+import heapq
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import RegistroTransacao, RegistroTransacaoArquivo, ResumoDiario
+
+
+def _minutos(inicio, fim):
+    """Minutos inteiros entre `inicio` e `fim` (0 se o início for desconhecido)."""
+    if inicio is None or fim < inicio:
+        return 0
+    return round((fim - inicio).total_seconds() / 60)
+
+
+def _chave(timestamp, turno, modelo, tipo):
+    """Chave (dia, turno, modelo, tipo) do resumo de uma transação."""
+    return timezone.localdate(timestamp), turno or '', modelo, tipo
+
+
+def acumular_no_resumo(registros):
+    """
+    Soma transações recém-gravadas ao resumo diário.
+
+    Deve ser chamada na mesma transação de banco que gravou as transações. As transações são
+    agrupadas pela chave do resumo (dia, turno, modelo, tipo), e todos os grupos são somados com
+    um único `INSERT ... ON CONFLICT DO UPDATE SET total = total + excluded.total` (suportado pelo
+    SQLite e pelo PostgreSQL), que cria a linha do grupo no primeiro registro do dia e a
+    incrementa nos seguintes, sem ler o resumo antes.
+
+    Args:
+        registros (iterable[tuple]): Tuplas (transação, modelo do equipamento, início da posse). O
+                                     início da posse (o `retirado_em` do equipamento antes da
+                                     devolução) só é usado nas devoluções, para somar o tempo de uso.
+    """
+    grupos = defaultdict(lambda: [0, 0])
+    for transacao, modelo, retirado_em in registros:
+        grupo = grupos[_chave(transacao.timestamp, transacao.turno, modelo, transacao.tipo)]
+        grupo[0] += 1
+        if transacao.tipo == 'Devolução':
+            grupo[1] += _minutos(retirado_em, transacao.timestamp)
+    if not grupos:
+        return
+
+    nome = connection.ops.quote_name
+    tabela = nome(ResumoDiario._meta.db_table)
+    chave = ', '.join(nome(coluna) for coluna in ['dia', 'turno', 'modelo', 'tipo'])
+    total, minutos = nome('total'), nome('minutos_uso')
+    sql = (
+        f"INSERT INTO {tabela} ({chave}, {total}, {minutos}) "
+        f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(grupos))} "
+        f"ON CONFLICT ({chave}) DO UPDATE SET "
+        f"{total} = {tabela}.{total} + excluded.{total}, "
+        f"{minutos} = {tabela}.{minutos} + excluded.{minutos}"
+    )
+    parametros = []
+    for (dia, turno, modelo, tipo), valores in grupos.items():
+        parametros += [connection.ops.adapt_datefield_value(dia), turno, modelo, tipo, *valores]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+
+
+def calcular_resumo(*transacoes):
+    """
+    Calcula o resumo diário a partir do histórico de transações.
+
+    As transações são percorridas em blocos, em ordem de equipamento e data, de modo que cada
+    devolução é associada à retirada anterior do mesmo equipamento (o início da posse) sem manter
+    o histórico em memória. Com mais de um QuerySet (ex.: o arquivo e a tabela de transações),
+    as transações de todos são intercaladas nessa mesma ordem.
+
+    Args:
+        *transacoes (QuerySet): Transações a resumir.
+
+    Returns:
+        dict: Chave (dia, turno, modelo, tipo) -> [total, minutos_uso].
+    """
+    grupos = defaultdict(lambda: [0, 0])
+    equipamento_anterior, retirado_em = None, None
+    linhas = heapq.merge(*(
+        consulta.order_by('equipamento_id', 'timestamp', 'id')
+        .values_list('equipamento_id', 'timestamp', 'id', 'equipamento__modelo', 'turno', 'tipo')
+        .iterator(chunk_size=5000)
+        for consulta in transacoes
+    ))
+    for equipamento_id, timestamp, _, modelo, turno, tipo in linhas:
+        if equipamento_id != equipamento_anterior:
+            equipamento_anterior, retirado_em = equipamento_id, None
+        grupo = grupos[_chave(timestamp, turno, modelo, tipo)]
+        grupo[0] += 1
+        if tipo == 'Retirada':
+            retirado_em = timestamp
+        else:
+            grupo[1] += _minutos(retirado_em, timestamp)
+            retirado_em = None
+    return grupos
+
+
+def reconstruir_resumo():
+    """
+    Recalcula todo o resumo diário a partir de `RegistroTransacao` e do arquivo de transações
+    antigas (`RegistroTransacaoArquivo`), substituindo o atual.
+
+    Returns:
+        int: Quantidade de linhas gravadas no resumo.
+    """
+    grupos = calcular_resumo(RegistroTransacaoArquivo.objects.all(), RegistroTransacao.objects.all())
+    with transaction.atomic():
+        ResumoDiario.objects.all().delete()
+        ResumoDiario.objects.bulk_create(
+            (
+                ResumoDiario(dia=dia, turno=turno, modelo=modelo, tipo=tipo, total=total, minutos_uso=minutos)
+                for (dia, turno, modelo, tipo), (total, minutos) in grupos.items()
+            ),
+            batch_size=1000,
+        )
+    return len(grupos)
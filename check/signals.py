@@ -0,0 +1,42 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .autocompletar import limpar_cache_autocompletar
+from .busca import garantir_indice_trecho
+from .dashboard import (
+    CHAVE_ALERTA_ENTREGA, CHAVE_POR_TURNO, CHAVE_PORCENTAGEM_MODELO, CHAVE_STATUS, invalidar_dashboard,
+)
+from .diretorio import invalidar_diretorio
+from .models import Equipamento, RegistroTransacao, Usuario
+
+
+@receiver([post_save, post_delete], sender=Equipamento)
+def equipamento_alterado(sender, **kwargs):
+    """Invalida os widgets que dependem do status ou do modelo dos equipamentos e o autocompletar."""
+    invalidar_dashboard([CHAVE_STATUS, CHAVE_ALERTA_ENTREGA, CHAVE_PORCENTAGEM_MODELO])
+    limpar_cache_autocompletar()
+
+
+@receiver([post_save, post_delete], sender=RegistroTransacao)
+def transacao_alterada(sender, **kwargs):
+    """Invalida os widgets calculados a partir do histórico de transações."""
+    invalidar_dashboard([CHAVE_ALERTA_ENTREGA, CHAVE_PORCENTAGEM_MODELO, CHAVE_POR_TURNO])
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def usuario_alterado(sender, **kwargs):
+    """Invalida o autocompletar e o diretório de operadores."""
+    limpar_cache_autocompletar()
+    invalidar_diretorio()
+
+
+@receiver(post_migrate)
+def banco_migrado(sender, using, **kwargs):
+    """Recria o índice de busca por trecho do número de série, caso uma migração o tenha descartado."""
+    if sender.name != 'check':
+        return
+    conexao = connections[using]
+    if ('check', '0011_indice_trecho_serial') in MigrationRecorder(conexao).applied_migrations():
+        garantir_indice_trecho(conexao)
@@ -1,3 +1,1315 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from .models import Equipamento, RegistroTransacao, RegistroTransacaoArquivo, ResumoDiario, Usuario
+from .arquivo import alcanca_o_arquivo, arquivar_transacoes, corte_do_arquivo
+from .autocompletar import autocompletar, limpar_cache_autocompletar
+from .busca import buscar_por_serial
+from .dashboard import (
+    CHAVES_DASHBOARD, acalcular_dashboard, calcular_dashboard, consultar_equipamentos_em_atraso, versao_dashboard,
+)
+from .eventos import Difusor, calcular_evento, ultima_transacao
+from .exportacao import linhas_do_historico
+from .periodos import FiltroInvalido, Periodo, inicio_do_dia, ler_filtro, periodo_predefinido, turno_do_horario
+from .resumo import reconstruir_resumo
+from .diretorio import buscar_operador, buscar_operadores
+from .importacao import PlanilhaInvalida, importar_equipamentos, importar_usuarios
+from .transacoes import (
+    DevolucaoNaoPermitida, EquipamentoIndisponivel, OperacaoInvalida, registrar_devolucao,
+    registrar_devolucoes_em_lote, registrar_retirada,
+)
+from .views import abuscar_equipamentos, adashboard_dados, consultar_equipamentos_em_operacao
+
+
+def criar_equipamentos(quantidade, status='Disponível', prefixo='SN'):
+    """Cria `quantidade` equipamentos com números de série sequenciais."""
+    return [
+        Equipamento.objects.create(
+            serial_number=f'{prefixo}{i:05d}', modelo='TC21', marca='Zebra', status=status
+        )
+        for i in range(quantidade)
+    ]
+
+
+def registrar_retiradas(equipamentos, login='op1', timestamp=None):
+    """Registra uma retirada para cada equipamento informado."""
+    for equipamento in equipamentos:
+        registrar_retirada(equipamento, login, 'supervisor', timestamp=timestamp)
+
+
+class EquipamentosEmOperacaoTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.user = User.objects.create_user('supervisor', password='senha')
+        self.client.force_login(self.user)
+
+    def test_consulta_unica_independente_da_quantidade(self):
+        registrar_retiradas(criar_equipamentos(3))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(consultar_equipamentos_em_operacao())), 3)
+
+        registrar_retiradas(criar_equipamentos(30, prefixo='XT'))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(consultar_equipamentos_em_operacao())), 33)
+
+    def test_usa_a_posse_atual_e_ignora_disponiveis(self):
+        equipamento, devolvido = criar_equipamentos(2)
+        agora = timezone.now()
+        registrar_retirada(equipamento, 'antigo', 'supervisor', timestamp=agora - timedelta(hours=3))
+        registrar_devolucao(equipamento, 'antigo', 'supervisor', timestamp=agora - timedelta(hours=2))
+        registrar_retirada(equipamento, 'op1', 'supervisor', timestamp=agora)
+        registrar_retirada(devolvido, 'op1', 'supervisor')
+        registrar_devolucao(devolvido, 'op1', 'supervisor')
+
+        linhas = list(consultar_equipamentos_em_operacao())
+
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]['serial_number'], equipamento.serial_number)
+        self.assertEqual(linhas[0]['tipo_transacao'], 'Retirada')
+        self.assertEqual(linhas[0]['usuario'], 'op1')
+        self.assertEqual(linhas[0]['timestamp'], agora)
+
+    def test_endpoint_lista_equipamento_sem_transacao(self):
+        criar_equipamentos(1, status='Retirado')
+
+        response = self.client.get(reverse('listar_equipamentos_em_operacao'), {'draw': 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['draw'], 3)
+        self.assertEqual(response.json()['data'][0]['usuario'], 'Não disponível')
+
+
+class RetiradaDevolucaoTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        Usuario.objects.create(login_usuario='op2', nome_usuario='Operador 2', turno_usuario='T2')
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        self.equipamento = criar_equipamentos(1)[0]
+
+    def test_fluxo_mantem_o_estado_de_posse(self):
+        self.client.post(reverse('retirar_equipamento', args=[self.equipamento.id]), {'usuario_login': 'op1'})
+        self.equipamento.refresh_from_db()
+        retirada = RegistroTransacao.objects.get(tipo='Retirada')
+        self.assertEqual(self.equipamento.status, 'Retirado')
+        self.assertEqual(self.equipamento.usuario_atual, 'op1')
+        self.assertEqual(self.equipamento.retirado_em, retirada.timestamp)
+        self.assertEqual(self.equipamento.ultima_transacao, retirada)
+
+        # Somente quem está com o equipamento pode devolvê-lo.
+        self.client.post(reverse('devolver_equipamento', args=[self.equipamento.id]), {'usuario_login': 'op2'})
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.equipamento.status, 'Retirado')
+
+        self.client.post(reverse('devolver_equipamento', args=[self.equipamento.id]), {'usuario_login': 'op1'})
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.equipamento.status, 'Disponível')
+        self.assertIsNone(self.equipamento.usuario_atual)
+        self.assertIsNone(self.equipamento.retirado_em)
+        self.assertEqual(self.equipamento.ultima_transacao, RegistroTransacao.objects.get(tipo='Devolução'))
+
+    def test_nao_devolve_equipamento_disponivel(self):
+        registrar_retirada(self.equipamento, 'op1', 'supervisor')
+        registrar_devolucao(self.equipamento, 'op1', 'supervisor')
+
+        self.client.post(reverse('devolver_equipamento', args=[self.equipamento.id]), {'usuario_login': 'op1'})
+
+        self.assertEqual(RegistroTransacao.objects.filter(tipo='Devolução').count(), 1)
+
+
+class TransacoesAtomicasTests(TestCase):
+    def setUp(self):
+        self.equipamento = criar_equipamentos(1)[0]
+
+    def test_segunda_retirada_e_rejeitada_sem_deixar_registro(self):
+        registrar_retirada(self.equipamento, 'op1', 'terminal1')
+        # Instância obsoleta, como a de um segundo terminal que leu o equipamento antes da retirada.
+        obsoleto = Equipamento.objects.get(pk=self.equipamento.pk)
+        obsoleto.status = 'Disponível'
+
+        with self.assertRaises(EquipamentoIndisponivel):
+            registrar_retirada(obsoleto, 'op2', 'terminal2')
+
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.equipamento.usuario_atual, 'op1')
+        self.assertEqual(RegistroTransacao.objects.count(), 1)
+
+    def test_devolucao_por_outro_usuario_e_rejeitada(self):
+        registrar_retirada(self.equipamento, 'op1', 'terminal1')
+
+        with self.assertRaises(DevolucaoNaoPermitida):
+            registrar_devolucao(self.equipamento, 'op2', 'terminal1')
+
+        registrar_devolucao(self.equipamento, 'op1', 'terminal1')
+        with self.assertRaises(DevolucaoNaoPermitida):
+            registrar_devolucao(self.equipamento, 'op1', 'terminal1')
+        self.assertEqual(RegistroTransacao.objects.filter(tipo='Devolução').count(), 1)
+
+    def test_retirada_invalida_o_contador_de_status(self):
+        cache.clear()
+        self.assertEqual(calcular_dashboard().total_em_operacao, 0)
+
+        registrar_retirada(self.equipamento, 'op1', 'terminal1')
+
+        self.assertEqual(calcular_dashboard().total_em_operacao, 1)
+
+
+class RetiradaEmLoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        Usuario.objects.create(login_usuario='op2', nome_usuario='Operador 2', turno_usuario='T2')
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        self.equipamentos = criar_equipamentos(4)
+        registrar_retirada(self.equipamentos[3], 'op2', 'supervisor')
+        self.url = reverse('retirar_equipamentos_em_lote')
+
+    def enviar(self, corpo):
+        return self.client.post(self.url, json.dumps(corpo), content_type='application/json')
+
+    def test_valida_com_uma_consulta_e_grava_em_lote(self):
+        itens = [
+            {'serial_number': 'SN00000', 'login_usuario': 'op1'},
+            ['SN00001', 'op2'],
+            ['SN00002', 'desconhecido'],
+            ['SN00003', 'op1'],
+            ['NAOEXISTE', 'op1'],
+            ['SN00000', 'op2'],
+        ]
+        # Sessão, usuário autenticado, savepoint, consulta IN (os operadores vêm do diretório em
+        # memória, que confere o banco uma vez pelos logins sem cadastro), bulk_create, bulk_update,
+        # resumo diário e release.
+        with self.assertNumQueries(9):
+            resposta = self.enviar({'itens': itens}).json()
+
+        self.assertEqual((resposta['confirmadas'], resposta['rejeitadas']), (2, 4))
+        self.assertEqual([item['ok'] for item in resposta['resultados']], [True, True, False, False, False, False])
+        self.assertIn('não está disponível', resposta['resultados'][3]['erro'])
+        self.assertIn('repetido', resposta['resultados'][5]['erro'])
+
+        equipamento = Equipamento.objects.get(serial_number='SN00001')
+        self.assertEqual(equipamento.status, 'Retirado')
+        self.assertEqual(equipamento.usuario_atual, 'op2')
+        self.assertEqual(equipamento.ultima_transacao_id, resposta['resultados'][1]['transacao_id'])
+        self.assertEqual(Equipamento.objects.get(serial_number='SN00002').status, 'Disponível')
+        self.assertEqual(calcular_dashboard().total_em_operacao, 3)
+
+    def test_corpo_invalido(self):
+        self.assertEqual(self.enviar({'itens': []}).status_code, 400)
+        self.assertEqual(self.enviar({'itens': [{'serial_number': 'SN00000'}]}).status_code, 400)
+        resposta = self.client.post(self.url, 'não é json', content_type='application/json')
+        self.assertEqual(resposta.status_code, 400)
+
+
+class DevolucaoEmLoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        self.equipamentos = criar_equipamentos(4)
+        registrar_retirada(self.equipamentos[0], 'op1', 'supervisor')
+        registrar_retirada(self.equipamentos[1], 'op2', 'supervisor')
+        registrar_retirada(self.equipamentos[2], 'op1', 'supervisor')
+
+    def test_valida_portadores_em_uma_consulta_e_libera_em_um_update(self):
+        itens = [['SN00000', 'op1'], ['SN00001', 'op1'], ['SN00002', 'op1'], ['SN00003', 'op1']]
+        # Sessão, usuário autenticado, savepoint, consulta IN, conferência do diretório (op1 não está
+        # cadastrado), bulk_create, UPDATE, resumo diário e release.
+        with self.assertNumQueries(9):
+            resposta = self.client.post(
+                reverse('devolver_equipamentos_em_lote'), json.dumps({'itens': itens}),
+                content_type='application/json',
+            ).json()
+
+        self.assertEqual([item['ok'] for item in resposta['resultados']], [True, False, True, False])
+        self.assertIn('só pode ser devolvido', resposta['resultados'][1]['erro'])
+        self.assertIn('não está retirado', resposta['resultados'][3]['erro'])
+
+        for equipamento, resultado in zip(self.equipamentos[:3:2], resposta['resultados'][::2]):
+            equipamento.refresh_from_db()
+            self.assertEqual(equipamento.status, 'Disponível')
+            self.assertIsNone(equipamento.usuario_atual)
+            self.assertEqual(equipamento.ultima_transacao.tipo, 'Devolução')
+            self.assertEqual(equipamento.ultima_transacao_id, resultado['transacao_id'])
+        self.assertEqual(Equipamento.objects.get(serial_number='SN00001').usuario_atual, 'op2')
+        self.assertEqual(calcular_dashboard().total_em_operacao, 1)
+
+
+class ConfiguracaoSqliteTests(TestCase):
+    def pragma(self, nome):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nome}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_aplicados_ao_abrir_a_conexao(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Apenas SQLite.")
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class IndicesPostgresqlTests(TestCase):
+    def test_indices_especificos(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("Apenas PostgreSQL.")
+        with connection.cursor() as cursor:
+            equipamento = connection.introspection.get_constraints(cursor, 'check_equipamento')
+            transacao = connection.introspection.get_constraints(cursor, 'check_registrotransacao')
+
+        self.assertEqual(equipamento['equip_status_retirado_parcial_idx']['columns'], ['status'])
+        self.assertEqual(transacao['transacao_timestamp_brin_idx']['type'], 'brin')
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class TransacoesConcorrentesTests(TransactionTestCase):
+    def test_somente_uma_retirada_simultanea_e_confirmada(self):
+        equipamento = criar_equipamentos(1)[0]
+        barreira = threading.Barrier(8)
+        resultados = []
+
+        def retirar(numero):
+            try:
+                instancia = Equipamento.objects.get(pk=equipamento.pk)
+                barreira.wait()
+                registrar_retirada(instancia, f'op{numero}', 'terminal')
+                resultados.append(True)
+            except OperacaoInvalida:
+                resultados.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retirar, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(RegistroTransacao.objects.filter(equipamento=equipamento).count(), 1)
+
+
+class ListarEquipamentosEmOperacaoTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        retirados = criar_equipamentos(30)
+        criar_equipamentos(5, prefixo='DISP')
+        for i, equipamento in enumerate(retirados):
+            registrar_retirada(
+                equipamento, f'op{i % 4}', 'supervisor', timestamp=timezone.now() - timedelta(minutes=i % 7)
+            )
+        self.url = reverse('listar_equipamentos_em_operacao')
+
+    def paginar(self, parametros, usar_cursor):
+        """Percorre todas as páginas e devolve os números de série na ordem recebida."""
+        seriais, cursor, inicio = [], None, 0
+        while True:
+            consulta = dict(parametros, start=inicio, length=7)
+            if usar_cursor and cursor:
+                consulta['cursor'] = cursor
+            resposta = self.client.get(self.url, consulta).json()
+            if not resposta['data']:
+                return seriais
+            seriais += [linha['serial_number'] for linha in resposta['data']]
+            cursor, inicio = resposta['cursor'], inicio + 7
+
+    def test_keyset_equivale_a_offset_em_todas_as_ordenacoes(self):
+        for coluna in ('0', '1', '3', '4'):
+            for direcao in ('asc', 'desc'):
+                parametros = {'order[0][column]': coluna, 'order[0][dir]': direcao}
+                por_offset = self.paginar(parametros, usar_cursor=False)
+                por_cursor = self.paginar(parametros, usar_cursor=True)
+                self.assertEqual(len(por_offset), 30)
+                self.assertEqual(por_cursor, por_offset)
+
+    def test_busca_e_totais(self):
+        resposta = self.client.get(self.url, {'search[value]': 'SN0000'}).json()
+
+        self.assertEqual(resposta['recordsTotal'], 30)
+        self.assertEqual(resposta['recordsFiltered'], 10)
+        self.assertEqual(len(resposta['data']), 10)
+
+    def test_tamanho_da_pagina_e_limitado(self):
+        resposta = self.client.get(self.url, {'length': -1}).json()
+
+        self.assertEqual(len(resposta['data']), 30)
+        self.assertEqual(resposta['data'][0]['numero'], 1)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='manha', nome_usuario='Operador Manhã', turno_usuario='T1')
+        Usuario.objects.create(login_usuario='noite', nome_usuario='Operador Noite', turno_usuario='T3')
+        self.retirados = criar_equipamentos(3)
+        criar_equipamentos(2, prefixo='DISP')
+        criar_equipamentos(1, status='Manutenção', prefixo='MAN')
+        agora = timezone.now()
+        registrar_retirada(self.retirados[0], 'manha', 'supervisor', timestamp=agora - timedelta(hours=11))
+        registrar_retirada(self.retirados[1], 'noite', 'supervisor', timestamp=agora)
+        registrar_retirada(self.retirados[2], 'sem_cadastro', 'supervisor', timestamp=agora)
+
+    def test_calcula_todos_os_widgets_com_consultas_constantes(self):
+        with self.assertNumQueries(4):
+            dashboard = calcular_dashboard()
+
+        self.assertEqual(dashboard.info, {
+            'total_em_operacao': 3,
+            'total_disponivel': 2,
+            'total_manutencao': 1,
+            'total_alerta_entrega': 1,
+        })
+        self.assertEqual(dashboard.controle['series'], [3, 2, 1])
+        self.assertEqual(dashboard.porcentagem_modelo, {'categories': ['TC21'], 'series': [100.0]})
+
+        series = {dataset['label']: sum(dataset['data']) for dataset in dashboard.por_turno['datasets']}
+        self.assertEqual(series, {'Manhã': 1, 'Tarde': 0, 'Noite': 1})
+
+        criar_equipamentos(20, status='Retirado', prefixo='MAIS')
+        cache.clear()
+        with self.assertNumQueries(4):
+            calcular_dashboard()
+
+    def test_widgets_em_cache_ate_a_proxima_escrita(self):
+        calcular_dashboard()
+        with self.assertNumQueries(0):
+            self.assertEqual(calcular_dashboard().total_em_operacao, 3)
+
+        # Um novo equipamento invalida os widgets de status, alertas e modelo, mas não o de turnos.
+        criar_equipamentos(1, status='Retirado', prefixo='NOVO')
+        with self.assertNumQueries(3):
+            self.assertEqual(calcular_dashboard().total_em_operacao, 4)
+
+        # O gráfico por turno usa o turno gravado nas transações: alterar o cadastro não o afeta.
+        Usuario.objects.filter(login_usuario='noite').get().delete()
+        with self.assertNumQueries(0):
+            calcular_dashboard()
+
+        # Uma retirada invalida todos os widgets.
+        registrar_retirada(criar_equipamentos(1, prefixo='T3')[0], 'manha', 'supervisor')
+        with self.assertNumQueries(4):
+            series = calcular_dashboard().por_turno['datasets']
+        self.assertEqual(sum(series[0]['data']), 2)
+
+    def test_escritas_de_outros_processos_aparecem_apos_o_tempo_de_vida(self):
+        calcular_dashboard()
+        versao = versao_dashboard()
+        # Sem invalidar o cache, como uma escrita de outro processo que não o compartilha.
+        Equipamento.objects.filter(serial_number='DISP00000').update(status='Manutenção')
+        self.assertEqual(calcular_dashboard().total_manutencao, 1)
+
+        depois = time.time() + settings.DASHBOARD_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=depois):
+            self.assertEqual(calcular_dashboard().total_manutencao, 2)
+            self.assertNotEqual(versao_dashboard(), versao)
+
+    def test_grafico_por_turno_considera_apenas_o_periodo(self):
+        antiga = criar_equipamentos(1, prefixo='ANTIGA')[0]
+        registrar_retirada(antiga, 'noite', 'supervisor', timestamp=timezone.now() - timedelta(days=30))
+
+        series = calcular_dashboard().por_turno['datasets']
+        self.assertEqual(sum(series[2]['data']), 1)
+        self.assertEqual(RegistroTransacao.objects.filter(turno='T3').count(), 2)
+
+        with self.settings(DASHBOARD_POR_TURNO_DIAS=60):
+            series = calcular_dashboard().por_turno['datasets']
+        self.assertEqual(sum(series[2]['data']), 2)
+
+    def test_alerta_de_entrega_expira_pelo_ttl(self):
+        with self.settings(DASHBOARD_ALERTA_CACHE_TIMEOUT=0):
+            calcular_dashboard()
+            with self.assertNumQueries(1):
+                calcular_dashboard()
+
+    def test_sem_retiradas(self):
+        Equipamento.objects.all().delete()
+        ResumoDiario.objects.all().delete()
+
+        dashboard = calcular_dashboard()
+
+        self.assertEqual(dashboard.porcentagem_modelo, {'categories': [], 'series': []})
+        self.assertEqual(dashboard.total_alerta_entrega, 0)
+
+    def test_endpoint_json(self):
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+        response = self.client.get(reverse('dashboard_dados'))
+
+        self.assertEqual(response.json()['info']['total_em_operacao'], 3)
+        self.assertEqual(response.json()['controle']['series'], [3, 2, 1])
+
+    def test_filtros_de_periodo_e_turno(self):
+        agora = timezone.now()
+        ultima_hora = {'inicio': agora - timedelta(hours=1), 'fim': agora + timedelta(hours=1)}
+
+        dashboard = calcular_dashboard(**ultima_hora)
+        self.assertEqual(dashboard.info, {
+            'total_em_operacao': 2,
+            'total_disponivel': 2,
+            'total_manutencao': 1,
+            'total_alerta_entrega': 0,
+        })
+        series = {dataset['label']: sum(dataset['data']) for dataset in dashboard.por_turno['datasets']}
+        self.assertEqual(series, {'Manhã': 0, 'Tarde': 0, 'Noite': 1})
+
+        dashboard = calcular_dashboard(turno='T1')
+        self.assertEqual((dashboard.total_em_operacao, dashboard.total_alerta_entrega), (1, 1))
+        self.assertEqual(sum(dashboard.por_turno['datasets'][0]['data']), 1)
+        self.assertEqual(sum(dashboard.por_turno['datasets'][2]['data']), 0)
+
+    def test_periodo_fora_de_dias_inteiros_le_as_transacoes(self):
+        # Sem o resumo diário, apenas os períodos que não são de dias inteiros encontram retiradas.
+        ResumoDiario.objects.all().delete()
+        agora = timezone.now()
+        hoje = inicio_do_dia(timezone.localdate())
+
+        parcial = calcular_dashboard(inicio=agora - timedelta(hours=1), fim=agora + timedelta(hours=1))
+        dias_inteiros = calcular_dashboard(inicio=hoje, fim=hoje + timedelta(days=1))
+
+        self.assertEqual(parcial.porcentagem_modelo, {'categories': ['TC21'], 'series': [100.0]})
+        self.assertEqual(dias_inteiros.porcentagem_modelo, {'categories': [], 'series': []})
+
+    def test_endpoint_json_com_filtros(self):
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        url = reverse('dashboard_dados')
+
+        resposta = self.client.get(url, {'periodo': 'turno_atual', 'turno': 'T3'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['filtro']['turno'], 'T3')
+        self.assertEqual(resposta.json()['info']['total_em_operacao'], 1)
+
+        self.assertEqual(self.client.get(url, {'turno': 'T9'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'periodo': 'ano'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'inicio': '31/01/2026'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'fim': '2026-13-01'}).status_code, 400)
+
+
+class WidgetsDashboardApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_equipamentos(2)
+        self.equipamento = criar_equipamentos(1, prefixo='RET')[0]
+        registrar_retirada(self.equipamento, 'operador', 'supervisor')
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+    def test_widgets(self):
+        status = self.client.get(reverse('api_widget_status')).json()
+        self.assertEqual(
+            (status['total_em_operacao'], status['total_disponivel'], status['controle']['series']),
+            (1, 2, [1, 2, 0]),
+        )
+        self.assertEqual(status['ultima_transacao'], ultima_transacao())
+
+        alertas = self.client.get(reverse('api_widget_alertas')).json()
+        self.assertEqual(alertas['total_alerta_entrega'], 0)
+        modelos = self.client.get(reverse('api_widget_porcentagem_modelo')).json()
+        self.assertEqual(modelos['categories'], ['TC21'])
+        por_turno = self.client.get(reverse('api_widget_por_turno'), {'periodo': 'hoje'}).json()
+        self.assertEqual(len(por_turno['labels']), 7)
+
+    def test_requisicao_condicional_pela_etag(self):
+        url = reverse('api_widget_status')
+        resposta = self.client.get(url)
+        etag = resposta['ETag']
+
+        # A ETag é verificada sem calcular o widget: além da sessão e do usuário, apenas a última transação.
+        with self.assertNumQueries(3):
+            revalidacao = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidacao.status_code, 304)
+        self.assertEqual(revalidacao.content, b'')
+        self.assertEqual(self.client.get(url, {'turno': 'T1'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        registrar_devolucao(self.equipamento, 'operador', 'supervisor')
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        self.assertEqual(resposta.json()['total_em_operacao'], 0)
+
+    def test_escrita_sem_transacao_renova_a_etag(self):
+        url = reverse('api_widget_status')
+        etag = self.client.get(url)['ETag']
+
+        criar_equipamentos(1, status='Manutenção', prefixo='MAN')
+
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['total_manutencao'], 1)
+
+    def test_last_modified(self):
+        url = reverse('api_widget_porcentagem_modelo')
+        resposta = self.client.get(url)
+
+        revalidacao = self.client.get(url, HTTP_IF_MODIFIED_SINCE=resposta['Last-Modified'])
+        self.assertEqual(revalidacao.status_code, 304)
+        self.assertNotIn('Last-Modified', self.client.get(reverse('api_widget_alertas')))
+
+    def test_filtro_invalido_e_acesso_anonimo(self):
+        resposta = self.client.get(reverse('api_widget_status'), {'turno': 'T9'})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('erro', resposta.json())
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_widget_status')).status_code, 403)
+
+    def test_pagina_inicial_sem_consultas_ao_dashboard(self):
+        # Apenas a sessão e o usuário.
+        with self.assertNumQueries(2):
+            resposta = self.client.get(reverse('index'))
+
+        self.assertContains(resposta, 'id="grafico-turnos"')
+        self.assertIn('private', resposta['Cache-Control'])
+
+    def test_documentacao(self):
+        resposta = self.client.get(reverse('api_docs'), {'format': 'openapi'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['basePath'], '/api')
+        self.assertIn('/dashboard/status/', resposta.json()['paths'])
+        self.assertIn('/equipamento/{equipamento_id}/historico/', resposta.json()['paths'])
+
+
+class AlertaEntregaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='manha', nome_usuario='Operador Manhã', turno_usuario='T1')
+        Usuario.objects.create(login_usuario='noite', nome_usuario='Operador Noite', turno_usuario='T3')
+        self.agora = timezone.now()
+
+    def retirar(self, serial, horas, login='manha', modelo='TC21'):
+        equipamento = Equipamento.objects.create(serial_number=serial, modelo=modelo, marca='Zebra')
+        registrar_retirada(equipamento, login, 'supervisor', timestamp=self.agora - timedelta(hours=horas))
+        return equipamento
+
+    def seriais_em_atraso(self):
+        return [item['serial_number'] for item in consultar_equipamentos_em_atraso(self.agora)]
+
+    def test_considera_somente_a_retirada_atual(self):
+        equipamento = self.retirar('RETIRADO_DE_NOVO', horas=13)
+        registrar_devolucao(equipamento, 'manha', 'supervisor', timestamp=self.agora - timedelta(hours=12))
+        registrar_retirada(equipamento, 'manha', 'supervisor', timestamp=self.agora - timedelta(hours=1))
+        self.retirar('ATRASADO', horas=12)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.seriais_em_atraso(), ['ATRASADO'])
+
+    @override_settings(ALERTA_ENTREGA_HORAS_POR_MODELO={'Rádio': 4}, ALERTA_ENTREGA_HORAS_POR_TURNO={'T3': 6})
+    def test_limites_por_modelo_e_por_turno(self):
+        self.retirar('RADIO', horas=5, modelo='Rádio', login='noite')
+        self.retirar('NOITE', horas=7, login='noite')
+        self.retirar('NOITE_NO_PRAZO', horas=5, login='noite')
+        self.retirar('MANHA', horas=9)
+        self.retirar('SEM_CADASTRO', horas=11, login='desconhecido')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.seriais_em_atraso(), ['SEM_CADASTRO', 'NOITE', 'RADIO'])
+
+    def test_endpoint_lista_os_equipamentos(self):
+        self.retirar('ATRASADO', horas=12)
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+        resposta = self.client.get(reverse('listar_alertas_entrega')).json()
+
+        self.assertEqual(resposta['total'], 1)
+        self.assertEqual(resposta['equipamentos'][0]['usuario'], 'manha')
+        self.assertEqual(resposta['equipamentos'][0]['horas_retirado'], 12.0)
+
+
+class ImportacaoUsuariosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Nome antigo', turno_usuario='T1')
+
+    def importar_csv(self, conteudo):
+        return importar_usuarios(io.BytesIO(conteudo.encode('utf-8-sig')), 'usuarios.csv')
+
+    def test_cria_atualiza_e_relata_erros_por_linha(self):
+        relatorio = self.importar_csv(
+            "login_usuario;nome_usuario;turno_usuario;coordenador\n"
+            "op1;Operador 1;Tarde;Ana\n"
+            "op2;Operador 2;t3;\n"
+            ";Sem login;T1;\n"
+            "op3;Operador 3;Madrugada;\n"
+            "\n"
+            "op2;Operador 2 repetido;T1;\n"
+        )
+
+        self.assertEqual((relatorio.linhas, relatorio.importadas, relatorio.invalidas), (5, 2, 3))
+        self.assertEqual([erro['linha'] for erro in relatorio.erros], [4, 5, 7])
+        self.assertIn('repetido', relatorio.erros[2]['erro'])
+
+        op1 = Usuario.objects.get(login_usuario='op1')
+        self.assertEqual((op1.nome_usuario, op1.turno_usuario, op1.coordenador), ('Operador 1', 'T2', 'Ana'))
+        self.assertEqual(Usuario.objects.get(login_usuario='op2').turno_usuario, 'T3')
+        self.assertEqual(Usuario.objects.count(), 2)
+
+    def test_colunas_obrigatorias(self):
+        with self.assertRaises(PlanilhaInvalida):
+            self.importar_csv("login_usuario,nome\nop2,Operador 2\n")
+
+    def test_autocompletar_sugere_usuarios_importados(self):
+        limpar_cache_autocompletar()
+        self.assertEqual(autocompletar('usuarios', 'op2', 10), ())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.importar_csv("login_usuario;nome_usuario;turno_usuario\nop2;Operador 2;T1\n")
+
+        self.assertEqual([valor for valor, _ in autocompletar('usuarios', 'op2', 10)], ['op2'])
+
+    def test_view_importa_planilha_excel(self):
+        planilha = Workbook()
+        planilha.active.append(['login_usuario', 'nome_usuario', 'turno_usuario', 'coordenador'])
+        planilha.active.append(['op2', 'Operador 2', 'Noite', None])
+        planilha.active.append([12345, 'Operador numérico', 'T1', 'Ana'])
+        conteudo = io.BytesIO()
+        planilha.save(conteudo)
+
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        resposta = self.client.post(reverse('importar_excel'), {
+            'excel_file': SimpleUploadedFile('usuarios.xlsx', conteudo.getvalue()),
+        })
+
+        self.assertEqual(resposta.context['relatorio'].importadas, 2)
+        self.assertEqual(Usuario.objects.get(login_usuario='12345').nome_usuario, 'Operador numérico')
+        self.assertEqual(Usuario.objects.get(login_usuario='op2').turno_usuario, 'T3')
+
+
+class ImportacaoEquipamentosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_equipamentos(2)
+
+    def test_ignora_existentes_com_uma_consulta_por_lote(self):
+        linhas = ''.join(f"SN{i:05d},TC21,Zebra\n" for i in range(5))
+        arquivo = io.BytesIO(
+            f"serial_number,modelo,marca\n{linhas}SN00004,TC21,Zebra\nSEM_MODELO,,Zebra\n".encode()
+        )
+
+        # Savepoint, consulta IN, bulk_create e release.
+        with self.assertNumQueries(4):
+            relatorio = importar_equipamentos(arquivo, 'equipamentos.csv')
+
+        self.assertEqual(
+            (relatorio.linhas, relatorio.importadas, relatorio.ignoradas, relatorio.invalidas), (7, 3, 3, 1)
+        )
+        self.assertEqual(relatorio.erros[0]['linha'], 8)
+        self.assertEqual(Equipamento.objects.count(), 5)
+        self.assertEqual(calcular_dashboard().total_disponivel, 5)
+
+    def test_conta_somente_os_equipamentos_gravados(self):
+        Equipamento.objects.create(serial_number='NOVO2', modelo='CT40', marca='Honeywell')
+        filtrar = Equipamento.objects.filter
+        consultas = []
+
+        def cadastrado_apos_a_consulta(*args, **kwargs):
+            # Outro processo cadastra NOVO2 entre a primeira consulta e a gravação do lote.
+            consultas.append(kwargs)
+            consulta = filtrar(*args, **kwargs)
+            return consulta.exclude(serial_number='NOVO2') if len(consultas) == 1 else consulta
+
+        linhas = ''.join(f"NOVO{i},CT40,Honeywell\n" for i in range(1, 4))
+        arquivo = io.BytesIO(f"serial_number,modelo,marca\n{linhas}".encode())
+        with mock.patch.object(Equipamento.objects, 'filter', side_effect=cadastrado_apos_a_consulta):
+            relatorio = importar_equipamentos(arquivo, 'equipamentos.csv')
+
+        self.assertEqual(len(consultas), 2)
+        self.assertEqual((relatorio.importadas, relatorio.ignoradas), (2, 1))
+        self.assertEqual(Equipamento.objects.get(serial_number='NOVO2').modelo, 'CT40')
+        self.assertEqual(Equipamento.objects.filter(serial_number__startswith='NOVO').count(), 3)
+
+    def test_autocompletar_sugere_equipamentos_importados(self):
+        limpar_cache_autocompletar()
+        self.assertEqual(autocompletar('equipamentos', 'novo', 10), ())
+
+        importar_equipamentos(io.BytesIO(b"serial_number,modelo,marca\nNOVO1,CT40,Honeywell\n"), 'equipamentos.csv')
+
+        self.assertEqual([valor for valor, _ in autocompletar('equipamentos', 'novo', 10)], ['NOVO1'])
+
+    def test_view_importa_planilha(self):
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+        arquivo = SimpleUploadedFile('equipamentos.csv', "serial_number;modelo;marca\nNOVO1;CT40;Honeywell\n".encode())
+
+        resposta = self.client.post(reverse('importar_equipamentos'), {'excel_file': arquivo})
+
+        self.assertEqual(resposta.context['relatorio'].importadas, 1)
+        self.assertEqual(Equipamento.objects.get(serial_number='NOVO1').status, 'Disponível')
+
+
+class BuscaSerialTests(TestCase):
+    def setUp(self):
+        for serial in ['ab-12345', '12345', '123456', 'X12345', '99999']:
+            Equipamento.objects.create(serial_number=serial, modelo='TC21', marca='Zebra')
+
+    def seriais(self, termo):
+        return [(equipamento.serial_number, equipamento.relevancia) for equipamento in buscar_por_serial(termo)]
+
+    def test_ordena_por_relevancia_ignorando_separadores(self):
+        self.assertEqual(
+            self.seriais('123 45'),
+            [('12345', 0), ('123456', 1), ('ab-12345', 2), ('X12345', 2)],
+        )
+        self.assertEqual(self.seriais('AB12'), [('ab-12345', 1)])
+        self.assertEqual(self.seriais('--'), [])
+
+    def test_termo_curto_busca_somente_prefixo(self):
+        self.assertEqual(self.seriais('12'), [('12345', 1), ('123456', 1)])
+
+    def test_termo_com_aspas(self):
+        Equipamento.objects.create(serial_number='AB"CD1', modelo='TC21', marca='Zebra')
+
+        self.assertEqual(self.seriais('b"cd'), [('AB"CD1', 2)])
+        self.assertEqual(self.seriais('ab"'), [('AB"CD1', 1)])
+        self.assertEqual(self.seriais('x"y"z'), [])
+
+    def test_indice_de_trecho_acompanha_alteracoes(self):
+        equipamento = Equipamento.objects.get(serial_number='99999')
+        equipamento.serial_number = 'Z98765'
+        equipamento.save()
+        Equipamento.objects.filter(serial_number='X12345').delete()
+
+        self.assertEqual(self.seriais('9876'), [('Z98765', 2)])
+        self.assertEqual(self.seriais('999'), [])
+        self.assertNotIn('X12345', [serial for serial, _ in self.seriais('2345')])
+
+    def test_view_pagina_os_resultados(self):
+        Equipamento.objects.bulk_create(
+            Equipamento(serial_number=f'LOTE{i:03d}', modelo='TC21', marca='Zebra') for i in range(30)
+        )
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+        resposta = self.client.get(reverse('buscar_equipamentos'), {'sn': 'lote', 'pagina': 2})
+
+        pagina = resposta.context['equipamentos']
+        self.assertEqual((pagina.paginator.count, len(pagina)), (30, 5))
+        self.assertEqual(pagina[0].serial_number, 'LOTE025')
+
+
+class AutocompletarTests(TestCase):
+    def setUp(self):
+        limpar_cache_autocompletar()
+        Usuario.objects.create(login_usuario='mlima', nome_usuario='Maria Lima', turno_usuario='T1')
+        Usuario.objects.create(login_usuario='jsilva', nome_usuario='João Silva', turno_usuario='T2')
+        Usuario.objects.create(login_usuario='marcos', nome_usuario='Marcos Souza', turno_usuario='T3')
+        Equipamento.objects.create(serial_number='ab-100', modelo='TC21', marca='Zebra')
+        Equipamento.objects.create(serial_number='AB200', modelo='CT40', marca='Honeywell')
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+    def sugerir(self, tipo, **parametros):
+        resposta = self.client.get(reverse('autocompletar', args=[tipo]), parametros)
+        return [sugestao['valor'] for sugestao in resposta.json()['resultados']]
+
+    def test_prefixo_do_login_ou_do_nome(self):
+        self.assertEqual(self.sugerir('usuarios', q='MAR'), ['marcos', 'mlima'])
+        self.assertEqual(self.sugerir('usuarios', q='j'), ['jsilva'])
+        self.assertEqual(self.sugerir('usuarios', q='mar', limite=1), ['marcos'])
+        self.assertEqual(self.sugerir('equipamentos', q='ab1'), ['ab-100'])
+        self.assertEqual(self.sugerir('equipamentos', q='AB'), ['ab-100', 'AB200'])
+
+    def test_prefixos_em_cache_ate_uma_escrita(self):
+        # Uma consulta pelo login e outra pelo nome; a segunda chamada vem do cache.
+        with self.assertNumQueries(2):
+            autocompletar('usuarios', 'ma', 10)
+            autocompletar('usuarios', 'ma', 10)
+
+        Usuario.objects.create(login_usuario='mateus', nome_usuario='Mateus', turno_usuario='T1')
+        self.assertEqual([login for login, _ in autocompletar('usuarios', 'ma', 10)], ['marcos', 'mateus', 'mlima'])
+
+    @override_settings(AUTOCOMPLETAR_CACHE_TAMANHO=1)
+    def test_tamanho_do_cache_configuravel(self):
+        autocompletar('equipamentos', 'ab', 10)
+        autocompletar('equipamentos', 'ab1', 10)  # Descarta 'ab'
+        with self.assertNumQueries(1):
+            autocompletar('equipamentos', 'ab', 10)
+
+    def test_tipo_invalido(self):
+        resposta = self.client.get(reverse('autocompletar', args=['transacoes']), {'q': 'a'})
+        self.assertEqual(resposta.status_code, 404)
+
+
+class DiretorioOperadoresTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Usuario.objects.create(login_usuario=f'op{i}', nome_usuario=f'Operador {i}', turno_usuario='T1')
+
+    def test_carrega_uma_vez_e_resolve_sem_consultas(self):
+        with self.assertNumQueries(1):
+            buscar_operador('op0')
+        with self.assertNumQueries(0):
+            self.assertEqual(buscar_operador('op1').nome_usuario, 'Operador 1')
+        # Um login ausente só confere se o banco mudou desde a carga.
+        with self.assertNumQueries(1):
+            self.assertIsNone(buscar_operador('naoexiste'))
+
+    def test_encontra_operadores_cadastrados_por_outro_processo(self):
+        buscar_operador('op0')
+        # Sem signal, como um cadastro feito em outro processo que não compartilha o cache.
+        Usuario.objects.bulk_create([Usuario(login_usuario='novo', nome_usuario='Novo', turno_usuario='T2')])
+
+        with self.assertNumQueries(2):
+            self.assertEqual(buscar_operador('novo').turno_usuario, 'T2')
+        with self.assertNumQueries(0):
+            buscar_operador('novo')
+
+    @override_settings(DIRETORIO_OPERADORES_TIMEOUT=0)
+    def test_recarrega_apos_o_tempo_de_vida(self):
+        buscar_operador('op0')
+        Usuario.objects.filter(login_usuario='op0').update(turno_usuario='T3')  # Sem signal
+
+        self.assertEqual(buscar_operador('op0').turno_usuario, 'T3')
+
+    def test_invalida_em_escritas(self):
+        buscar_operador('op0')
+        Usuario.objects.filter(login_usuario='op0').update(turno_usuario='T3')  # Sem signal
+        self.assertEqual(buscar_operador('op0').turno_usuario, 'T1')
+
+        usuario = Usuario.objects.get(login_usuario='op0')
+        usuario.save()
+        Usuario.objects.create(login_usuario='novo', nome_usuario='Novo', turno_usuario='T2')
+        self.assertEqual(buscar_operador('op0').turno_usuario, 'T3')
+        self.assertEqual(buscar_operador('novo').turno_usuario, 'T2')
+
+    @override_settings(DIRETORIO_OPERADORES_TAMANHO=2)
+    def test_descarta_os_menos_usados_quando_cheio(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(set(buscar_operadores(['op0', 'op1'])), {'op0', 'op1'})
+        with self.assertNumQueries(1):
+            self.assertEqual(set(buscar_operadores(['op2', 'naoexiste'])), {'op2'})
+        with self.assertNumQueries(0):
+            buscar_operador('op2')
+        with self.assertNumQueries(1):
+            buscar_operador('op0')  # Descartado ao carregar op2
+
+
+class ResumoDiarioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.equipamentos = criar_equipamentos(3)
+        self.agora = timezone.now()
+
+    def resumo(self):
+        return sorted(ResumoDiario.objects.values_list('turno', 'modelo', 'tipo', 'total', 'minutos_uso'))
+
+    def test_mantido_a_cada_transacao_e_igual_a_reconstrucao(self):
+        equipamento = self.equipamentos[0]
+        registrar_retirada(equipamento, 'op1', 'supervisor', timestamp=self.agora - timedelta(minutes=90))
+        registrar_devolucao(equipamento, 'op1', 'supervisor', timestamp=self.agora)
+        registrar_retiradas(self.equipamentos[1:], login='sem_cadastro')
+        registrar_devolucoes_em_lote([{'serial_number': 'SN00001', 'login_usuario': 'sem_cadastro'}], 'supervisor')
+
+        esperado = [
+            ('', 'TC21', 'Devolução', 1, 0),
+            ('', 'TC21', 'Retirada', 2, 0),
+            ('T1', 'TC21', 'Devolução', 1, 90),
+            ('T1', 'TC21', 'Retirada', 1, 0),
+        ]
+        self.assertEqual(self.resumo(), esperado)
+
+        self.assertEqual(reconstruir_resumo(), 4)
+        self.assertEqual(self.resumo(), esperado)
+
+    def test_historico_preservado_ao_remover_equipamento(self):
+        registrar_retiradas(self.equipamentos[:1], login='op1')
+        Equipamento.objects.all().delete()
+
+        self.assertEqual(self.resumo(), [('T1', 'TC21', 'Retirada', 1, 0)])
+        self.assertEqual(calcular_dashboard().porcentagem_modelo['categories'], ['TC21'])
+
+
+class ArquivoTransacoesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.antigo, self.perdido, self.recente = criar_equipamentos(3)
+        self.agora = timezone.now()
+        self.ha_dois_anos = self.agora - timedelta(days=730)
+        registrar_retirada(self.antigo, 'op1', 'supervisor', timestamp=self.ha_dois_anos)
+        registrar_devolucao(self.antigo, 'op1', 'supervisor', timestamp=self.ha_dois_anos + timedelta(hours=2))
+        registrar_retirada(self.antigo, 'op1', 'supervisor', timestamp=self.agora - timedelta(hours=1))
+        # Retirado há dois anos e nunca devolvido: a retirada continua sendo a sua última transação.
+        registrar_retirada(self.perdido, 'op1', 'supervisor', timestamp=self.ha_dois_anos + timedelta(hours=1))
+        registrar_retirada(self.recente, 'op1', 'supervisor', timestamp=self.agora)
+
+    def test_move_as_transacoes_antigas_exceto_as_ultimas_de_cada_equipamento(self):
+        resumo = list(ResumoDiario.objects.values_list('dia', 'tipo', 'total', 'minutos_uso').order_by('dia', 'tipo'))
+
+        saida = io.StringIO()
+        call_command('arquivar_transacoes', '--lote', '1', stdout=saida)
+
+        self.assertIn('2 transações', saida.getvalue())
+        self.assertEqual(RegistroTransacaoArquivo.objects.count(), 2)
+        self.assertEqual(RegistroTransacao.objects.filter(timestamp__lt=corte_do_arquivo()).get().equipamento, self.perdido)
+        self.assertEqual(
+            list(ResumoDiario.objects.values_list('dia', 'tipo', 'total', 'minutos_uso').order_by('dia', 'tipo')), resumo
+        )
+        # A reconstrução do resumo também lê o arquivo e pareia retiradas e devoluções arquivadas.
+        reconstruir_resumo()
+        self.assertEqual(
+            list(ResumoDiario.objects.values_list('dia', 'tipo', 'total', 'minutos_uso').order_by('dia', 'tipo')), resumo
+        )
+        self.assertEqual(arquivar_transacoes(corte_do_arquivo()), 0)
+
+    def test_fronteira_acompanha_arquivamentos_de_outros_processos(self):
+        self.assertFalse(alcanca_o_arquivo(None))
+
+        # Cópia feita diretamente no banco, como pelo comando rodando em outro processo.
+        transacao = RegistroTransacao.objects.filter(equipamento=self.antigo).earliest('timestamp')
+        RegistroTransacaoArquivo.objects.create(
+            id=transacao.id, equipamento=self.antigo, usuario_login='op1', tipo='Retirada', timestamp=transacao.timestamp,
+        )
+
+        self.assertTrue(alcanca_o_arquivo(self.ha_dois_anos))
+        self.assertFalse(alcanca_o_arquivo(self.ha_dois_anos + timedelta(seconds=1)))
+
+    def test_periodos_historicos_consultam_o_arquivo(self):
+        historico = {'inicio': self.ha_dois_anos - timedelta(minutes=30), 'fim': self.ha_dois_anos + timedelta(hours=3)}
+        antes = calcular_dashboard(**historico)
+
+        arquivar_transacoes(corte_do_arquivo())
+
+        self.assertEqual(calcular_dashboard(**historico), antes)
+        self.assertEqual(sum(map(sum, (serie['data'] for serie in antes.por_turno['datasets']))), 2)
+
+        # Um período recente não alcança o arquivo.
+        with CaptureQueriesContext(connection) as consultas:
+            dashboard = calcular_dashboard(inicio=self.agora - timedelta(hours=2), fim=self.agora + timedelta(hours=1))
+        self.assertEqual(dashboard.porcentagem_modelo, {'categories': ['TC21'], 'series': [100.0]})
+        # Apenas a fronteira do arquivo (sem filtro) é lida.
+        self.assertFalse(any(
+            'registrotransacaoarquivo' in consulta['sql'] and 'WHERE' in consulta['sql'] for consulta in consultas
+        ))
+
+
+
+class ExportacaoTransacoesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1', coordenador='Coord')
+        self.equipamentos = criar_equipamentos(2)
+        self.ha_dois_anos = timezone.now() - timedelta(days=730)
+        registrar_retirada(self.equipamentos[0], 'op1', 'supervisor', timestamp=self.ha_dois_anos)
+        registrar_devolucao(self.equipamentos[0], 'op1', 'supervisor', timestamp=self.ha_dois_anos + timedelta(hours=2))
+        registrar_retirada(self.equipamentos[1], 'semcadastro', 'supervisor', timestamp=self.ha_dois_anos + timedelta(hours=1))
+        registrar_retirada(self.equipamentos[0], 'op1', 'supervisor')
+        arquivar_transacoes(corte_do_arquivo())
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+    def test_intercala_o_arquivo_com_as_transacoes_recentes(self):
+        linhas = list(linhas_do_historico())
+
+        self.assertEqual(RegistroTransacaoArquivo.objects.count(), 2)
+        self.assertEqual([linha[2] for linha in linhas], ['Retirada', 'Retirada', 'Devolução', 'Retirada'])
+        self.assertEqual([linha[3] for linha in linhas], ['SN00000', 'SN00001', 'SN00000', 'SN00000'])
+        self.assertEqual(linhas[0][6:10], ('op1', 'Operador 1', 'Coord', 'T1'))
+        self.assertEqual(linhas[1][6:9], ('semcadastro', '', ''))
+
+    def test_exporta_csv_filtrado_em_fluxo(self):
+        resposta = self.client.get(reverse('exportar_transacoes'), {'equipamento': 'SN00000', 'inicio': '2000-01-01'})
+
+        self.assertTrue(resposta.streaming)
+        self.assertIn('attachment', resposta['Content-Disposition'])
+        linhas = b''.join(resposta.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(linhas[0].split(';')[:3], ['ID', 'Data e hora', 'Tipo'])
+        self.assertEqual([linha.split(';')[2] for linha in linhas[1:]], ['Retirada', 'Devolução', 'Retirada'])
+
+        resposta = self.client.get(reverse('exportar_transacoes'), {'equipamento': 'XPTO'})
+        self.assertEqual(resposta.status_code, 400)
+        resposta = self.client.get(reverse('exportar_transacoes'), {'formato': 'pdf'})
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_exporta_xlsx(self):
+        resposta = self.client.get(reverse('exportar_transacoes'), {'formato': 'xlsx', 'turno': 'T1'})
+
+        planilha = load_workbook(io.BytesIO(b''.join(resposta.streaming_content)), read_only=True)
+        linhas = list(planilha['Transações'].values)
+        self.assertEqual(len(linhas), 4)  # Cabeçalho e as três transações de op1
+        self.assertEqual(linhas[1][7], 'Operador 1')
+        # O Excel guarda a data e hora local, com precisão de milissegundos.
+        self.assertAlmostEqual(
+            linhas[1][1], timezone.localtime(self.ha_dois_anos).replace(tzinfo=None), delta=timedelta(milliseconds=1)
+        )
+
+    def test_comando_exporta_para_arquivo(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = f'{diretorio}/transacoes.csv'
+            saida = io.StringIO()
+            call_command('exportar_transacoes', caminho, '--periodo', 'hoje', stdout=saida)
+
+            with open(caminho, encoding='utf-8-sig') as arquivo:
+                self.assertEqual(len(arquivo.read().splitlines()), 2)
+        self.assertIn('1 transações exportadas', saida.getvalue())
+
+    async def test_fluxo_assincrono(self):
+        await self.async_client.aforce_login(await User.objects.aget(username='supervisor'))
+
+        resposta = await self.async_client.get(reverse('exportar_transacoes'))
+
+        self.assertTrue(resposta.is_async)
+        conteudo = b''.join([bloco async for bloco in resposta.streaming_content])
+        self.assertEqual(len(conteudo.decode('utf-8-sig').splitlines()), 5)
+
+
+
+class LinhaDoTempoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.equipamento, self.outro = criar_equipamentos(2)
+        self.agora = timezone.now()
+        inicio = self.agora - timedelta(days=730)
+        # Duas posses de 2 horas há dois anos (arquivadas), uma de 3 horas ontem e a atual.
+        for dia in (0, 1):
+            registrar_retirada(self.equipamento, 'op1', 'supervisor', timestamp=inicio + timedelta(days=dia))
+            registrar_devolucao(self.equipamento, 'op1', 'supervisor', timestamp=inicio + timedelta(days=dia, hours=2))
+        registrar_retirada(self.equipamento, 'op1', 'supervisor', timestamp=self.agora - timedelta(days=1))
+        registrar_devolucao(self.equipamento, 'op1', 'supervisor', timestamp=self.agora - timedelta(hours=21))
+        registrar_retirada(self.equipamento, 'op1', 'supervisor', timestamp=self.agora - timedelta(hours=1))
+        registrar_retirada(self.outro, 'op1', 'supervisor')
+        arquivar_transacoes(corte_do_arquivo())
+        self.client.force_login(User.objects.create_user('supervisor', password='senha'))
+
+    def paginas(self, tamanho):
+        url = reverse('api_historico_equipamento', args=[self.equipamento.id])
+        parametros = {'tamanho': tamanho}
+        while True:
+            resposta = self.client.get(url, parametros)
+            self.assertEqual(resposta.status_code, 200)
+            yield resposta.json()['transacoes']
+            if not resposta.json()['proximo']:
+                return
+            parametros['cursor'] = resposta.json()['proximo']
+
+    def test_pareia_retiradas_e_devolucoes_entre_paginas(self):
+        paginas = list(self.paginas(tamanho=2))
+        transacoes = [transacao for pagina in paginas for transacao in pagina]
+
+        self.assertEqual([len(pagina) for pagina in paginas], [2, 2, 2, 1])
+        self.assertEqual(
+            [transacao['tipo'] for transacao in transacoes], ['Retirada', 'Devolução'] * 3 + ['Retirada'],
+        )
+        self.assertEqual([transacao['arquivada'] for transacao in transacoes], [False] * 3 + [True] * 4)
+        self.assertEqual(
+            [transacao['duracao_segundos'] for transacao in transacoes[1:]],
+            [3 * 3600, 3 * 3600, 2 * 3600, 2 * 3600, 2 * 3600, 2 * 3600],
+        )
+        # A posse atual é contada até o momento da consulta.
+        self.assertTrue(transacoes[0]['em_posse'])
+        self.assertAlmostEqual(transacoes[0]['duracao_segundos'], 3600, delta=60)
+        self.assertFalse(any(transacao['em_posse'] for transacao in transacoes[1:]))
+        # Os pares cruzam as páginas: a devolução de ontem está na 1ª página, e a retirada, na 2ª.
+        self.assertEqual(transacoes[1]['par'], transacoes[2]['id'])
+        self.assertEqual(transacoes[2]['par'], transacoes[1]['id'])
+        self.assertEqual(transacoes[3]['par'], transacoes[4]['id'])
+        self.assertEqual(transacoes[0]['operador'], 'Operador 1')
+
+    def test_pagina_le_o_indice_do_equipamento(self):
+        url = reverse('api_historico_equipamento', args=[self.equipamento.id])
+        cursor = self.client.get(url, {'tamanho': 3}).json()['proximo']
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(url, {'tamanho': 3, 'cursor': cursor})
+        sql = [
+            consulta['sql'] for consulta in consultas
+            if 'registrotransacao' in consulta['sql'] and 'WHERE' in consulta['sql']
+        ]
+        # A página e a transação mais recente vizinha a ela, na tabela e no arquivo (além da
+        # fronteira do arquivo, lida sem filtro).
+        self.assertEqual(len(sql), 4)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql[0])
+                plano = ' '.join(str(linha) for linha in cursor.fetchall())
+            self.assertIn('transacao_equip_ts_id_idx', plano)
+            self.assertNotIn('TEMP B-TREE', plano)
+
+    def test_parametros_invalidos(self):
+        url = reverse('api_historico_equipamento', args=[self.equipamento.id])
+
+        self.assertEqual(self.client.get(url, {'cursor': 'invalido'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'tamanho': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_historico_equipamento', args=[9999])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('historico_equipamento', args=[self.equipamento.id])).status_code, 200)
+
+
+class PeriodosTests(TestCase):
+    def local(self, *args):
+        return timezone.make_aware(timezone.datetime(*args))
+
+    def test_turno_em_andamento(self):
+        self.assertEqual(
+            turno_do_horario(self.local(2026, 3, 10, 6, 0)),
+            ('T1', Periodo(self.local(2026, 3, 10, 6), self.local(2026, 3, 10, 14))),
+        )
+        # O turno da noite começa em um dia e termina no seguinte.
+        noite = Periodo(self.local(2026, 3, 9, 22), self.local(2026, 3, 10, 6))
+        self.assertEqual(turno_do_horario(self.local(2026, 3, 9, 23, 30)), ('T3', noite))
+        self.assertEqual(turno_do_horario(self.local(2026, 3, 10, 3, 0)), ('T3', noite))
+
+    def test_periodos_predefinidos(self):
+        agora = self.local(2026, 3, 10, 15, 30)
+
+        self.assertEqual(periodo_predefinido('hoje', agora), Periodo(self.local(2026, 3, 10), self.local(2026, 3, 11)))
+        self.assertEqual(
+            periodo_predefinido('ultimos_7_dias', agora), Periodo(self.local(2026, 3, 4), self.local(2026, 3, 11))
+        )
+        with self.assertRaises(KeyError):
+            periodo_predefinido('ano', agora)
+
+    def test_ler_filtro(self):
+        filtro = ler_filtro({'inicio': '2026-01-01', 'fim': '2026-01-31', 'turno': 'T2'})
+        self.assertEqual(filtro, {'inicio': self.local(2026, 1, 1), 'fim': self.local(2026, 2, 1), 'turno': 'T2'})
+
+        self.assertEqual(ler_filtro({}), {'inicio': None, 'fim': None, 'turno': None})
+        with self.assertRaises(FiltroInvalido):
+            ler_filtro({'inicio': '2026-01-31', 'fim': '2026-01-01'})
+
+
+class EventosDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.equipamentos = criar_equipamentos(3)
+        registrar_retiradas(self.equipamentos[:2])
+        self.user = User.objects.create_user('supervisor', password='senha')
+
+    def test_calcula_linhas_adicionadas_e_removidas(self):
+        desde = ultima_transacao()
+        self.assertIsNone(calcular_evento(desde))
+
+        registrar_devolucao(self.equipamentos[0], 'op1', 'supervisor')
+        registrar_retirada(self.equipamentos[2], 'op1', 'supervisor')
+        # Retirado e devolvido no mesmo intervalo: sai da tabela, se estiver nela.
+        registrar_devolucao(self.equipamentos[1], 'op1', 'supervisor')
+        registrar_retirada(self.equipamentos[1], 'op1', 'supervisor')
+        registrar_devolucao(self.equipamentos[1], 'op1', 'supervisor')
+
+        evento = calcular_evento(desde)
+
+        self.assertEqual(evento['id'], ultima_transacao())
+        self.assertEqual([linha['serial_number'] for linha in evento['adicionados']], ['SN00002'])
+        self.assertEqual(sorted(evento['removidos']), [self.equipamentos[0].id, self.equipamentos[1].id])
+        self.assertEqual(evento['info']['total_em_operacao'], 1)
+
+    def confirmar_fora_de_ordem(self):
+        """Registra três transações e remove a do meio, como se o seu commit ainda não tivesse ocorrido."""
+        difusor = Difusor()
+        difusor.ultima = ultima_transacao()
+        registrar_devolucao(self.equipamentos[0], 'op1', 'supervisor')
+        atrasada = registrar_retirada(self.equipamentos[2], 'op1', 'supervisor')
+        registrar_devolucao(self.equipamentos[1], 'op1', 'supervisor')
+        RegistroTransacao.objects.filter(id=atrasada.id).delete()
+        return difusor, atrasada
+
+    def test_aguarda_transacao_confirmada_fora_da_ordem_dos_ids(self):
+        difusor, atrasada = self.confirmar_fora_de_ordem()
+
+        evento, = difusor.verificar(agora=0)
+        self.assertEqual((evento['id'], evento['removidos']), (atrasada.id - 1, [self.equipamentos[0].id]))
+        self.assertEqual(difusor.verificar(agora=1), [])
+
+        atrasada.save()
+        evento, = difusor.verificar(agora=2)
+        self.assertEqual(evento['id'], ultima_transacao())
+        self.assertEqual([linha['serial_number'] for linha in evento['adicionados']], ['SN00002'])
+        self.assertEqual(evento['removidos'], [self.equipamentos[1].id])
+
+    @override_settings(EVENTOS_ESPERA_LACUNA=5)
+    def test_transacao_pulada_que_aparece_recarrega_os_clientes(self):
+        difusor, atrasada = self.confirmar_fora_de_ordem()
+        difusor.verificar(agora=0)
+
+        # Sem a transação após a espera, ela é considerada desfeita e as seguintes são enviadas.
+        evento, = difusor.verificar(agora=5)
+        self.assertEqual(evento['id'], ultima_transacao())
+
+        atrasada.save()
+        self.assertEqual(difusor.verificar(agora=6), [{'id': ultima_transacao(), 'recarregar': True}])
+        self.assertEqual(difusor.verificar(agora=7), [])
+
+    def test_fluxo_sem_asgi_nao_e_servido(self):
+        self.client.force_login(self.user)
+
+        self.assertEqual(self.client.get(reverse('eventos_dashboard')).status_code, 204)
+
+    @override_settings(EVENTOS_INTERVALO=0.01)
+    async def test_fluxo_envia_as_transacoes_novas(self):
+        await self.async_client.aforce_login(self.user)
+        desde = await sync_to_async(ultima_transacao)()
+
+        resposta = await self.async_client.get(reverse('eventos_dashboard'), {'desde': desde})
+        self.assertEqual(resposta['Content-Type'], 'text/event-stream')
+        fluxo = aiter(resposta.streaming_content)
+
+        await sync_to_async(registrar_retirada)(self.equipamentos[2], 'op1', 'supervisor')
+        mensagem = (await asyncio.wait_for(anext(fluxo), timeout=5)).decode()
+
+        self.assertTrue(mensagem.startswith(f'id: {desde + 1}\nevent: dashboard\n'))
+        evento = json.loads(mensagem.split('data: ', 1)[1])
+        self.assertEqual([linha['serial_number'] for linha in evento['adicionados']], ['SN00002'])
+        self.assertEqual(evento['info']['total_em_operacao'], 3)
+        await fluxo.aclose()
+
+
+class ViewsAssincronasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Usuario.objects.create(login_usuario='op1', nome_usuario='Operador 1', turno_usuario='T1')
+        self.equipamentos = criar_equipamentos(30)
+        registrar_retiradas(self.equipamentos[:3], timestamp=timezone.now() - timedelta(hours=12))
+        self.user = User.objects.create_user('supervisor', password='senha')
+
+    def requisicao(self, caminho, parametros=None):
+        request = AsyncRequestFactory().get(caminho, parametros)
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        return request
+
+    async def test_dashboard_igual_ao_sincrono(self):
+        esperado = await sync_to_async(calcular_dashboard)()
+        await cache.aclear()
+
+        self.assertEqual(await acalcular_dashboard(), esperado)
+        # Os widgets calculados ficam no cache compartilhado com a versão síncrona.
+        self.assertEqual(len(await cache.aget_many(CHAVES_DASHBOARD)), len(CHAVES_DASHBOARD))
+
+        agora = timezone.now()
+        filtro = {'inicio': agora - timedelta(days=1), 'fim': agora, 'turno': 'T1'}
+        self.assertEqual(await acalcular_dashboard(**filtro), await sync_to_async(calcular_dashboard)(**filtro))
+
+    async def test_dashboard_dados(self):
+        # Um início explícito: as retiradas de 12 horas atrás podem ser do dia anterior.
+        inicio = f"{timezone.localtime(timezone.now() - timedelta(hours=13)):%Y-%m-%dT%H:%M}"
+        resposta = await adashboard_dados(self.requisicao('/dashboard/dados/', {'inicio': inicio}))
+        self.assertEqual(json.loads(resposta.content)['info']['total_alerta_entrega'], 3)
+
+        resposta = await adashboard_dados(self.requisicao('/dashboard/dados/', {'turno': 'T9'}))
+        self.assertEqual(resposta.status_code, 400)
+
+    async def test_busca_paginada(self):
+        resposta = await abuscar_equipamentos(self.requisicao('/buscar_equipamentos/', {'sn': 'sn-000', 'pagina': 2}))
+
+        self.assertContains(resposta, 'Página 2 de 2 (30 equipamentos)')
+        self.assertContains(resposta, 'SN00029')
+        self.assertNotContains(resposta, 'SN00024')
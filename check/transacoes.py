@@ -0,0 +1,306 @@
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Value, When
+from django.utils import timezone
+
+from .dashboard import invalidar_dashboard
+from .diretorio import buscar_operador, buscar_operadores
+from .models import Equipamento, RegistroTransacao
+from .resumo import acumular_no_resumo
+
+
+class OperacaoInvalida(Exception):
+    """Erro de regra de negócio ao registrar uma retirada ou devolução."""
+
+
+class EquipamentoIndisponivel(OperacaoInvalida):
+    """O equipamento não está disponível para retirada."""
+
+
+class DevolucaoNaoPermitida(OperacaoInvalida):
+    """O equipamento não está retirado ou está com outro usuário."""
+
+
+def registrar_retirada(equipamento, login_usuario, login_registrado, timestamp=None):
+    """
+    Registra a retirada de um equipamento e atualiza o seu estado de posse.
+
+    A operação é atômica e segura contra retiradas simultâneas do mesmo equipamento: a troca de
+    status é um `UPDATE ... WHERE status = 'Disponível'` condicional, executado na mesma transação
+    do registro. Se outra retirada tiver sido confirmada antes, nenhuma linha é atualizada, a
+    transação é desfeita e `EquipamentoIndisponivel` é levantada. O resumo diário usado pelos
+    gráficos é atualizado na mesma transação (ver `acumular_no_resumo`).
+
+    Args:
+        equipamento (Equipamento): Equipamento a ser retirado. A instância é atualizada em memória.
+        login_usuario (str): Login do operador que está retirando o equipamento.
+        login_registrado (str): Nome de usuário da conta autenticada que registrou a operação.
+        timestamp (datetime, opcional): Momento da retirada. Usa `timezone.now()` se omitido.
+
+    Returns:
+        RegistroTransacao: A transação de retirada criada.
+
+    Raises:
+        EquipamentoIndisponivel: Se o equipamento não estiver com status 'Disponível'.
+    """
+    timestamp = timestamp or timezone.now()
+    with transaction.atomic():
+        transacao = RegistroTransacao.objects.create(
+            equipamento=equipamento,
+            usuario_login=login_usuario,
+            turno=_turno(login_usuario),
+            tipo='Retirada',
+            login_registrado=login_registrado,
+            timestamp=timestamp,
+        )
+        atualizados = Equipamento.objects.filter(pk=equipamento.pk, status='Disponível').update(
+            status='Retirado',
+            usuario_atual=login_usuario,
+            retirado_em=timestamp,
+            ultima_transacao=transacao,
+        )
+        if not atualizados:
+            raise EquipamentoIndisponivel(
+                f"O equipamento {equipamento.serial_number} não está disponível para retirada."
+            )
+        acumular_no_resumo([(transacao, equipamento.modelo, None)])
+        invalidar_dashboard()
+
+    equipamento.status = 'Retirado'
+    equipamento.usuario_atual = login_usuario
+    equipamento.retirado_em = timestamp
+    equipamento.ultima_transacao = transacao
+    return transacao
+
+
+def registrar_devolucao(equipamento, login_usuario, login_registrado, timestamp=None):
+    """
+    Registra a devolução de um equipamento e limpa o seu estado de posse.
+
+    Assim como a retirada, a troca de status é um `UPDATE` condicional
+    (`WHERE status = 'Retirado' AND usuario_atual = login_usuario`) na mesma transação do
+    registro, de modo que duas devoluções simultâneas não podem ser confirmadas. O tempo de posse
+    (desde o `retirado_em` da instância) é somado ao resumo diário na mesma transação.
+
+    Args:
+        equipamento (Equipamento): Equipamento a ser devolvido. A instância é atualizada em memória.
+        login_usuario (str): Login do operador que está devolvendo o equipamento.
+        login_registrado (str): Nome de usuário da conta autenticada que registrou a operação.
+        timestamp (datetime, opcional): Momento da devolução. Usa `timezone.now()` se omitido.
+
+    Returns:
+        RegistroTransacao: A transação de devolução criada.
+
+    Raises:
+        DevolucaoNaoPermitida: Se o equipamento não estiver retirado pelo usuário informado.
+    """
+    timestamp = timestamp or timezone.now()
+    with transaction.atomic():
+        transacao = RegistroTransacao.objects.create(
+            equipamento=equipamento,
+            usuario_login=login_usuario,
+            turno=_turno(login_usuario),
+            tipo='Devolução',
+            login_registrado=login_registrado,
+            timestamp=timestamp,
+        )
+        atualizados = Equipamento.objects.filter(
+            pk=equipamento.pk, status='Retirado', usuario_atual=login_usuario
+        ).update(
+            status='Disponível',
+            usuario_atual=None,
+            retirado_em=None,
+            ultima_transacao=transacao,
+        )
+        if not atualizados:
+            raise DevolucaoNaoPermitida(
+                "Erro na devolução. Este equipamento só pode ser devolvido pelo usuário que o retirou."
+            )
+        acumular_no_resumo([(transacao, equipamento.modelo, equipamento.retirado_em)])
+        invalidar_dashboard()
+
+    equipamento.status = 'Disponível'
+    equipamento.usuario_atual = None
+    equipamento.retirado_em = None
+    equipamento.ultima_transacao = transacao
+    return transacao
+
+
+def _turno(login_usuario):
+    """Turno atual do operador, gravado na transação, ou None se o login não estiver cadastrado."""
+    operador = buscar_operador(login_usuario)
+    return operador.turno_usuario if operador else None
+
+
+def _resultado(item, erro=None, transacao=None):
+    """Monta o resultado de um item de um lote de retiradas ou devoluções."""
+    return {
+        'serial_number': item['serial_number'],
+        'login_usuario': item['login_usuario'],
+        'ok': erro is None,
+        'erro': erro,
+        'transacao_id': transacao.id if transacao else None,
+    }
+
+
+def registrar_retiradas_em_lote(itens, login_registrado):
+    """
+    Registra várias retiradas de uma só vez, como as leituras acumuladas de uma estação de coleta.
+
+    Todos os itens são validados com uma consulta `IN` dos equipamentos pelo número de série e com o
+    diretório de operadores em memória (ver `buscar_operadores`), e os válidos são gravados na mesma transação com um `bulk_create` das
+    transações e um `bulk_update` dos equipamentos. Itens inválidos não impedem os demais.
+
+    Os equipamentos são lidos com `select_for_update`, o que bloqueia as linhas no PostgreSQL até o
+    fim da transação. No SQLite, que não tem bloqueio por linha, uma escrita concorrente confirmada
+    entre a leitura e a gravação faz a transação falhar com "database is locked", sem sobrescrever
+    a outra operação.
+
+    Args:
+        itens (list[dict]): Itens com as chaves 'serial_number' e 'login_usuario'.
+        login_registrado (str): Nome de usuário da conta autenticada que registrou as operações.
+
+    Returns:
+        list[dict]: Um resultado por item, na mesma ordem, com 'serial_number', 'login_usuario',
+                    'ok', 'erro' (mensagem ou None) e 'transacao_id'.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        equipamentos = {
+            equipamento.serial_number: equipamento
+            for equipamento in Equipamento.objects.select_for_update().filter(
+                serial_number__in={item['serial_number'] for item in itens}
+            )
+        }
+        usuarios = buscar_operadores({item['login_usuario'] for item in itens})
+
+        resultados, validos, vistos = [], [], set()
+        for item in itens:
+            equipamento = equipamentos.get(item['serial_number'])
+            if equipamento is None:
+                erro = f"Equipamento {item['serial_number']} não encontrado."
+            elif item['login_usuario'] not in usuarios:
+                erro = f"Usuário com login '{item['login_usuario']}' não encontrado."
+            elif item['serial_number'] in vistos:
+                erro = f"Equipamento {item['serial_number']} repetido no lote."
+            elif equipamento.status != 'Disponível':
+                erro = f"O equipamento {equipamento.serial_number} não está disponível para retirada."
+            else:
+                erro = None
+                validos.append((len(resultados), item, equipamento))
+            vistos.add(item['serial_number'])
+            resultados.append(_resultado(item, erro))
+
+        transacoes = RegistroTransacao.objects.bulk_create(
+            RegistroTransacao(
+                equipamento=equipamento,
+                usuario_login=item['login_usuario'],
+                turno=usuarios[item['login_usuario']].turno_usuario,
+                tipo='Retirada',
+                login_registrado=login_registrado,
+                timestamp=agora,
+            )
+            for _, item, equipamento in validos
+        )
+        for (posicao, item, equipamento), transacao in zip(validos, transacoes):
+            equipamento.status = 'Retirado'
+            equipamento.usuario_atual = item['login_usuario']
+            equipamento.retirado_em = agora
+            equipamento.ultima_transacao = transacao
+            resultados[posicao] = _resultado(item, transacao=transacao)
+        Equipamento.objects.bulk_update(
+            [equipamento for _, _, equipamento in validos],
+            ['status', 'usuario_atual', 'retirado_em', 'ultima_transacao'],
+        )
+        acumular_no_resumo(
+            (transacao, equipamento.modelo, None)
+            for (_, _, equipamento), transacao in zip(validos, transacoes)
+        )
+
+        if validos:
+            invalidar_dashboard()
+    return resultados
+
+
+def registrar_devolucoes_em_lote(itens, login_registrado):
+    """
+    Registra várias devoluções de uma só vez, como a fila de devolução do fim de turno.
+
+    O portador atual de todos os equipamentos do lote é obtido em uma única consulta (o estado de
+    posse mantido em `Equipamento`, gravado pela última retirada), e cada item só é aceito se for
+    devolvido pelo mesmo usuário que o retirou. As devoluções válidas são gravadas com um
+    `bulk_create`, e os equipamentos são liberados com um único `UPDATE`.
+
+    Args:
+        itens (list[dict]): Itens com as chaves 'serial_number' e 'login_usuario'.
+        login_registrado (str): Nome de usuário da conta autenticada que registrou as operações.
+
+    Returns:
+        list[dict]: Um resultado por item, na mesma ordem, com 'serial_number', 'login_usuario',
+                    'ok', 'erro' (mensagem ou None) e 'transacao_id'.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        equipamentos = {
+            equipamento.serial_number: equipamento
+            for equipamento in Equipamento.objects.select_for_update().filter(
+                serial_number__in={item['serial_number'] for item in itens}
+            ).only('id', 'serial_number', 'modelo', 'status', 'usuario_atual', 'retirado_em')
+        }
+
+        resultados, validos, vistos = [], [], set()
+        for item in itens:
+            equipamento = equipamentos.get(item['serial_number'])
+            if equipamento is None:
+                erro = f"Equipamento {item['serial_number']} não encontrado."
+            elif item['serial_number'] in vistos:
+                erro = f"Equipamento {item['serial_number']} repetido no lote."
+            elif equipamento.status != 'Retirado':
+                erro = f"O equipamento {equipamento.serial_number} não está retirado."
+            elif equipamento.usuario_atual != item['login_usuario']:
+                erro = (
+                    f"O equipamento {equipamento.serial_number} só pode ser devolvido pelo usuário "
+                    f"que o retirou."
+                )
+            else:
+                erro = None
+                validos.append((len(resultados), item, equipamento))
+            vistos.add(item['serial_number'])
+            resultados.append(_resultado(item, erro))
+
+        if not validos:
+            return resultados
+
+        operadores = buscar_operadores({item['login_usuario'] for _, item, _ in validos})
+        transacoes = RegistroTransacao.objects.bulk_create(
+            RegistroTransacao(
+                equipamento=equipamento,
+                usuario_login=item['login_usuario'],
+                turno=getattr(operadores.get(item['login_usuario']), 'turno_usuario', None),
+                tipo='Devolução',
+                login_registrado=login_registrado,
+                timestamp=agora,
+            )
+            for _, item, equipamento in validos
+        )
+        for (posicao, item, _), transacao in zip(validos, transacoes):
+            resultados[posicao] = _resultado(item, transacao=transacao)
+
+        # Libera todos os equipamentos em um único UPDATE, apontando cada um para a sua devolução.
+        Equipamento.objects.filter(id__in=[equipamento.id for _, _, equipamento in validos]).update(
+            status='Disponível',
+            usuario_atual=None,
+            retirado_em=None,
+            ultima_transacao=Case(
+                *[
+                    When(id=equipamento.id, then=Value(transacao.id))
+                    for (_, _, equipamento), transacao in zip(validos, transacoes)
+                ],
+                output_field=BigIntegerField(),
+            ),
+        )
+        acumular_no_resumo(
+            (transacao, equipamento.modelo, equipamento.retirado_em)
+            for (_, _, equipamento), transacao in zip(validos, transacoes)
+        )
+        invalidar_dashboard()
+    return resultados
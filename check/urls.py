@@ -1,19 +1,37 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views
 from django.contrib.auth.views import LoginView, LogoutView
 
+# Sob ASGI (ver setup/asgi.py), as páginas de leitura mais acessadas usam as versões assíncronas.
+if settings.VIEWS_ASSINCRONAS:
+    dashboard_dados, buscar_equipamentos = views.adashboard_dados, views.abuscar_equipamentos
+else:
+    dashboard_dados, buscar_equipamentos = views.dashboard_dados, views.buscar_equipamentos
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('retirar_equipamento/<int:equipamento_id>/', views.retirar_equipamento, name='retirar_equipamento'),
     path('devolver_equipamento/<int:equipamento_id>/', views.devolver_equipamento, name='devolver_equipamento'),
+    path('equipamento/<int:equipamento_id>/historico/', views.historico_equipamento, name='historico_equipamento'),
+    path('api/retiradas/', views.retirar_equipamentos_em_lote, name='retirar_equipamentos_em_lote'),
+    path('api/devolucoes/', views.devolver_equipamentos_em_lote, name='devolver_equipamentos_em_lote'),
     path('cadastrar_equipamento/', views.cadastrar_equipamentos, name='cadastrar_equipamento'),
-    path('buscar_equipamentos/', views.buscar_equipamentos, name='buscar_equipamentos'),
+    path('equipamentos_em_operacao/', views.listar_equipamentos_em_operacao, name='listar_equipamentos_em_operacao'),
+    path('buscar_equipamentos/', buscar_equipamentos, name='buscar_equipamentos'),
     path('cadastrar_usuario/', views.cadastrar_usuario, name='cadastrar_usuario'),
     path('login/', views.custom_login, name='login'),
     path('auto_logout/', views.auto_logout, name='auto_logout'),
-    path('dashboard_nao_entregue/', views.dashboard_view_porcentagem_modelo, name='dashboard_view_porcentagem_modelo'),
-<<<<<<< HEAD
+    path('dashboard/dados/', dashboard_dados, name='dashboard_dados'),
+    path('dashboard/eventos/', views.eventos_dashboard, name='eventos_dashboard'),
+    path('api/dashboard/status/', api.widget_status, name='api_widget_status'),
+    path('api/dashboard/alertas/', api.widget_alertas, name='api_widget_alertas'),
+    path('api/dashboard/porcentagem_modelo/', api.widget_porcentagem_modelo, name='api_widget_porcentagem_modelo'),
+    path('api/dashboard/por_turno/', api.widget_por_turno, name='api_widget_por_turno'),
+    path('api/equipamento/<int:equipamento_id>/historico/', api.historico_equipamento, name='api_historico_equipamento'),
+    path('alertas_entrega/', views.listar_alertas_entrega, name='listar_alertas_entrega'),
+    path('transacoes/exportar/', views.exportar_transacoes, name='exportar_transacoes'),
     path('importar_excel/', views.importar_excel, name='importar_excel'),
-=======
->>>>>>> b60e2b0cca2c51b86a831732c1a432c19fd3c3f8
+    path('autocompletar/<str:tipo>/', views.listar_sugestoes, name='autocompletar'),
+    path('importar_equipamentos/', views.importar_planilha_equipamentos, name='importar_equipamentos'),
     ]
\ No newline at end of file
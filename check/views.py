@@ -1,26 +1,39 @@
-from django.http import HttpResponseRedirect
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Equipamento, RegistroTransacao, Usuario
+from .models import Equipamento, Usuario
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login,logout
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_POST
+from django.db.models import Q
 from django.core.paginator import Paginator
-from django.db.models import Count, F, Max
 import json
-from django.db.models.functions import ExtractWeekDay
-from datetime import timedelta
-<<<<<<< HEAD
-import pandas as pd
-=======
->>>>>>> b60e2b0cca2c51b86a831732c1a432c19fd3c3f8
-
-
+from .autocompletar import autocompletar
+from .busca import buscar_por_serial
+from .dashboard import (
+    acalcular_dashboard, calcular_dashboard, consultar_equipamentos_em_atraso, consultar_equipamentos_em_operacao, linha_em_operacao,
+)
+from .diretorio import buscar_operador
+from .eventos import calcular_evento, difusor, transmitir
+from .exportacao import FORMATOS, em_fluxo_assincrono, gerar_csv, gerar_xlsx, ler_filtro_exportacao, linhas_do_historico
+from .importacao import PlanilhaInvalida, importar_equipamentos, importar_usuarios
+from .transacoes import (
+    OperacaoInvalida, registrar_devolucao, registrar_devolucoes_em_lote, registrar_retirada,
+    registrar_retiradas_em_lote,
+)
+from .periodos import PERIODOS, FiltroInvalido, ler_filtro
+from .paginacao import codificar_cursor, decodificar_cursor, filtrar_keyset, ordenar_keyset
 
 
 @login_required
+@cache_control(private=True, max_age=settings.PAGINA_INICIAL_CACHE_MAX_AGE)
 def index(request):
     """
     View para exibir a página inicial.
@@ -29,90 +42,18 @@ def index(request):
         request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
     Returns:
-        HttpResponse: Resposta renderizando o template 'index.html' com os dados necessários.
-    """
-    # ====================================
-    # Data Table
-    # ====================================
-    equipamentos_data = []  # Lista para armazenar informações dos equipamentos.
-
-    # Obtém todos os equipamentos cadastrados no banco de dados.
-    equipamentos = Equipamento.objects.all()
-    for equipamento in equipamentos:
-        if equipamento.status == 'Retirado':  # Verifica se o equipamento está retirado.
-            # Busca a última transação registrada para o equipamento, ordenada pela data (mais recente primeiro).
-            ultima_transacao = RegistroTransacao.objects.filter(equipamento=equipamento).order_by('-timestamp').first()
-
-            # Se a transação mais recente for encontrada, adiciona seus dados à lista.
-            if ultima_transacao:
-                equipamentos_data.append({
-                    'id': equipamento.id,  # ID único do equipamento.
-                    'serial_number': equipamento.serial_number,  # Número serial do equipamento.
-                    'modelo': equipamento.modelo,  # Modelo do equipamento.
-                    'marca': equipamento.marca,  # Marca do equipamento.
-                    'status': equipamento.status,  # Status atual do equipamento (neste caso, 'Retirado').
-                    'tipo_transacao': ultima_transacao.tipo,  # Tipo da última transação (ex.: retirada ou devolução).
-                    'usuario': ultima_transacao.usuario_login,  # Usuário associado à última transação.
-                    'timestamp': ultima_transacao.timestamp,  # Data e hora da última transação.
-                })
-            else:
-                # Caso não exista transação registrada, preenche com valores padrão.
-                equipamentos_data.append({
-                    'id': equipamento.id,
-                    'serial_number': equipamento.serial_number,
-                    'modelo': equipamento.modelo,
-                    'marca': equipamento.marca,
-                    'status': equipamento.status,
-                    'tipo_transacao': 'Não encontrado',  # Indica ausência de transação.
-                    'usuario': 'Não disponível',  # Indica que o usuário não está disponível.
-                    'timestamp': 'Não disponível',  # Indica que a data/hora não está disponível.
-                })
-        else:
-            continue  # Ignora equipamentos que não estão no status "Retirado".
-
-    # Caso nenhum equipamento esteja na lista, adiciona uma linha indicando ausência de dados.
-    if not equipamentos_data:
-        equipamentos_data.append({
-            'id': '-',  # Valor padrão indicando que não há dados.
-            'serial_number': '-',
-            'modelo': '-',
-            'marca': '-',
-            'status': '-',
-            'tipo_transacao': '-',
-            'usuario': '-',
-            'timestamp': '-',
-        })
-
-    # ====================================
-    # Dashboard Data
-    # ====================================
-    # Obtém informações gerais para os cards do dashboard.
-    data_dashboard_info = dashboard_info_view()
+        HttpResponse: Resposta renderizando o template 'index.html'.
 
-    # Obtém dados para o gráfico de porcentagem por modelo.
-    data_view_porcentagem = dashboard_view_porcentagem_modelo()
-
-    # Obtém dados sobre PDAs retirados por turno.
-    data_pda_por_turno = pda_retirado_por_turno()
-
-    # Obtém dados adicionais para o controle de PDAs.
-    data_pda_controle = dashboard_view_pda()
-
-    # ====================================
-    # Renderização do Template
-    # ====================================
-    # Renderiza o template 'index.html', passando os dados necessários.
-    return render(
-        request,
-        'index.html',
-        {
-            "data_dashboard_info": data_dashboard_info,  # Informações dos cards do dashboard.
-            "equipamentos_data": equipamentos_data,  # Dados da tabela de equipamentos.
-            "chart_data_porcentagem": data_view_porcentagem,  # Dados do gráfico de porcentagem.
-            "chart_data_por_turno": data_pda_por_turno,  # Dados sobre PDAs por turno.
-            "data_pda_controle": data_pda_controle,  # Dados adicionais para controle de PDAs.
-        }
-    )
+    Notas:
+        - A página é apenas a estrutura do dashboard, sem consultas ao banco, e pode ser mantida
+          no cache do navegador por `PAGINA_INICIAL_CACHE_MAX_AGE` segundos. Os cards e os
+          gráficos são buscados pelo navegador nos endpoints de widgets (check/api.py), e a
+          tabela de equipamentos em operação em `listar_equipamentos_em_operacao`.
+    """
+    return render(request, 'index.html', {
+        "periodos": PERIODOS,  # Períodos predefinidos do filtro do dashboard.
+        "turnos": Usuario.TURNOS,  # Turnos do filtro do dashboard.
+    })
 
 
 def custom_login(request):
@@ -182,7 +123,7 @@ def cadastrar_usuario(request):
         coordenador = request.POST.get('coordenador')  # Coordenador responsável pelo usuário.
 
         # Valida se o login informado já existe no banco de dados.
-        if Usuario.objects.filter(login_usuario=login_usuario).exists():
+        if buscar_usuario(login_usuario) is not None:
             # Caso o login já esteja em uso, exibe uma mensagem de erro e redireciona para a página de cadastro.
             messages.error(request, "Esse login já está em uso.")
             return redirect('cadastrar_usuario')
@@ -257,23 +198,27 @@ def cadastrar_equipamentos(request):
     return render(request, 'cadastro_equipamento.html')
 
 
+# Quantidade de equipamentos exibidos por página na busca por número de série.
+RESULTADOS_POR_PAGINA = 25
+
+
 @login_required
 def buscar_equipamentos(request):
     """
     View para buscar equipamentos pelo número de série.
 
-    Essa função permite que o usuário busque por equipamentos no sistema utilizando o número de série.
-    Se um número de série for fornecido, a busca será realizada e os equipamentos encontrados serão
-    retornados para o template. Caso contrário, ou se nenhum equipamento for encontrado, uma mensagem de erro
-    será exibida.
+    Essa função permite que o usuário busque por equipamentos no sistema utilizando o número de série
+    completo ou parcial. A busca ignora espaços, hífens, barras e pontos e usa os índices do número de
+    série normalizado (ver `buscar_por_serial`). Os resultados são ordenados por relevância (número igual,
+    número que começa com o termo e número que contém o termo) e paginados.
 
     Args:
-        request (HttpRequest): Objeto que contém os dados da solicitação HTTP, incluindo qualquer parâmetro
-                                de consulta enviado na URL.
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP, incluindo os parâmetros
+                                de consulta 'sn' (número de série) e 'pagina'.
 
     Returns:
         HttpResponse: 
-            - Renderiza o template 'buscar_equipamento.html' com os resultados da busca ou mensagem de erro.
+            - Renderiza o template 'buscar_equipamento.html' com a página de resultados ou mensagem de erro.
     """
     equipamentos = None  # Inicializa para evitar erro no template caso nenhum equipamento seja encontrado
     erro = None  # Variável para armazenar uma mensagem de erro, se necessário
@@ -282,78 +227,151 @@ def buscar_equipamentos(request):
     sn = request.GET.get('sn')  # Obtém o valor de 'sn' dos parâmetros de consulta
 
     if sn:  # Se um número de série foi fornecido
-        # Realiza a busca por equipamentos que contenham o número de série fornecido
-        equipamentos = Equipamento.objects.filter(serial_number__icontains=sn)
+        # Realiza a busca pelos índices do número de série e obtém a página solicitada
+        paginador = Paginator(buscar_por_serial(sn), RESULTADOS_POR_PAGINA)
+        equipamentos = paginador.get_page(request.GET.get('pagina'))
         
         # Caso nenhum equipamento seja encontrado, define uma mensagem de erro
-        if not equipamentos:
+        if not paginador.count:
             erro = "Nenhum equipamento encontrado com esse número de série."
     else:
         # Define uma mensagem de erro caso nenhum número de série seja fornecido
         erro = "Por favor, insira um número de série para realizar a busca."
 
     # Renderiza o template 'buscar_equipamento.html' com os dados dos equipamentos ou a mensagem de erro
-    return render(request, 'buscar_equipamento.html', {'equipamentos': equipamentos, 'erro': erro})
+    return render(request, 'buscar_equipamento.html', {'equipamentos': equipamentos, 'erro': erro, 'sn': sn})
+
+
+@login_required
+async def abuscar_equipamentos(request):
+    """
+    Versão assíncrona de `buscar_equipamentos`, usada sob ASGI.
+
+    A contagem de resultados e a página solicitada são obtidas pelo ORM assíncrono (`acount` e
+    `aiterator`); o `Paginator` só calcula os limites da página, sem consultar o banco.
+    """
+    equipamentos = None
+    erro = None
+    sn = request.GET.get('sn')
+
+    if sn:
+        paginador = Paginator(buscar_por_serial(sn), RESULTADOS_POR_PAGINA)
+        paginador.count = await paginador.object_list.acount()  # Substitui a contagem síncrona
+        equipamentos = paginador.get_page(request.GET.get('pagina'))
+        equipamentos.object_list = [equipamento async for equipamento in equipamentos.object_list.aiterator()]
+
+        if not paginador.count:
+            erro = "Nenhum equipamento encontrado com esse número de série."
+    else:
+        erro = "Por favor, insira um número de série para realizar a busca."
+
+    return await sync_to_async(render)(
+        request, 'buscar_equipamento.html', {'equipamentos': equipamentos, 'erro': erro, 'sn': sn}
+    )
 
 
-<<<<<<< HEAD
 
-=======
->>>>>>> b60e2b0cca2c51b86a831732c1a432c19fd3c3f8
 def buscar_usuario(login_usuario):
     """
     Busca um usuário pelo login de usuário fornecido.
 
-    Esta função tenta localizar um usuário no banco de dados com base no login informado. Se o usuário
+    Esta função localiza o usuário no diretório de operadores mantido em memória (ver
+    `buscar_operador`), sem consultar o banco de dados a cada retirada ou devolução. Se o usuário
     for encontrado, ele é retornado. Caso contrário, a função retorna None.
 
     Args:
-        login_usuario (str): O login do usuário a ser buscado no banco de dados.
+        login_usuario (str): O login do usuário a ser buscado.
 
     Returns:
-        Usuario or None: O objeto Usuario correspondente ao login fornecido, se encontrado, 
-                         ou None se nenhum usuário com esse login for encontrado.
+        Operador or None: Os dados do usuário correspondente ao login fornecido (id, login_usuario,
+                          nome_usuario, turno_usuario e coordenador), se encontrado,
+                          ou None se nenhum usuário com esse login for encontrado.
     """
-    try:
-        usuario = Usuario.objects.get(login_usuario=login_usuario)
-        return usuario
-    except Usuario.DoesNotExist:
-        return None
-    
-    
+    return buscar_operador(login_usuario)
+
+
+# Colunas da tabela "PDA em operação", na ordem em que são exibidas, mapeadas para o campo de ordenação.
+COLUNAS_EM_OPERACAO = ['id', 'serial_number', 'modelo', 'usuario', 'timestamp', 'timestamp', 'status']
+
+
 @login_required
 def listar_equipamentos_em_operacao(request):
     """
-    View para listar todos os equipamentos que estão em operação.
+    Endpoint de processamento server-side da tabela de equipamentos em operação (DataTables).
 
-    Essa função retorna apenas os equipamentos que possuem o status "em operação"
-    (ou seja, equipamentos com o status 'Retirado') para serem exibidos em uma tabela no template.
-    Além disso, utiliza paginação para limitar o número de itens exibidos por página.
+    Recebe os parâmetros do protocolo do DataTables (`draw`, `start`, `length`, `search[value]`,
+    `order[0][column]` e `order[0][dir]`) e devolve somente a página solicitada. Quando o cliente
+    envia o parâmetro `cursor` (recebido na resposta da página anterior), a página é obtida por
+    paginação keyset, sem OFFSET; caso contrário, usa `start` como deslocamento.
 
     Args:
         request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
     Returns:
-        HttpResponse:
-            - Renderiza o template 'listar_equipamentos.html' com a lista paginada de equipamentos em operação.
+        JsonResponse: Objeto com as chaves:
+            - "draw": Eco do contador enviado pelo DataTables.
+            - "recordsTotal": Total de equipamentos retirados.
+            - "recordsFiltered": Total de equipamentos retirados que atendem à busca.
+            - "data": Linhas da página.
+            - "cursor": Cursor da última linha da página, ou None se a página estiver vazia.
     """
-    # Filtra os equipamentos com o status "Retirado", indicando que estão em operação
-    equipamentos_em_operacao = Equipamento.objects.filter(status='Retirado')
+    draw = _inteiro(request.GET.get('draw'), 0)
+    inicio = max(_inteiro(request.GET.get('start'), 0), 0)
+    tamanho = _inteiro(request.GET.get('length'), 25)
+    if tamanho <= 0 or tamanho > 100:
+        tamanho = 100  # Limita o tamanho da página, inclusive para a opção "Todos" (-1).
+
+    coluna = _inteiro(request.GET.get('order[0][column]'), 0)
+    campo = COLUNAS_EM_OPERACAO[coluna] if 0 <= coluna < len(COLUNAS_EM_OPERACAO) else 'id'
+    descendente = request.GET.get('order[0][dir]') == 'desc'
+
+    equipamentos = consultar_equipamentos_em_operacao()
+    total = Equipamento.objects.filter(status='Retirado').count()
+
+    # Aplica o filtro de busca global, se informado.
+    busca = request.GET.get('search[value]', '').strip()
+    if busca:
+        equipamentos = equipamentos.filter(
+            Q(serial_number__icontains=busca) | Q(modelo__icontains=busca) | Q(usuario__icontains=busca)
+        )
+        total_filtrado = equipamentos.count()
+    else:
+        total_filtrado = total
 
-    # Configura a paginação para exibir 10 equipamentos por página (pode ajustar o valor conforme necessário)
-    paginator = Paginator(equipamentos_em_operacao, 10)
+    equipamentos = ordenar_keyset(equipamentos, campo, descendente)
+    chave = decodificar_cursor(request.GET.get('cursor', ''))
+    if chave:
+        pagina = list(filtrar_keyset(equipamentos, campo, *chave, descendente=descendente)[:tamanho])
+    else:
+        pagina = list(equipamentos[inicio:inicio + tamanho])
 
-    # Obtém o número da página atual a partir do parâmetro 'page' na URL
-    page_number = request.GET.get('page')  # Retorna None caso o parâmetro não esteja presente
-    equipamentos_page = paginator.get_page(page_number)  # Obtém a página atual dos equipamentos
+    data = [
+        linha_em_operacao(equipamento, posicao)
+        for posicao, equipamento in enumerate(pagina, start=inicio + 1)
+    ]
 
-    # Renderiza o template 'listar_equipamentos.html' passando os dados paginados
-    return render(request, 'listar_equipamentos.html', {'equipamentos': equipamentos_page})
+    cursor = None
+    if pagina:
+        ultimo = pagina[-1]
+        cursor = codificar_cursor(ultimo[campo], ultimo['id'])
+
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': total,
+        'recordsFiltered': total_filtrado,
+        'data': data,
+        'cursor': cursor,
+    })
+
+
+def _inteiro(valor, padrao):
+    """Converte um parâmetro da requisição para inteiro, usando `padrao` se for inválido."""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return padrao
 
-<<<<<<< HEAD
-=======
 
->>>>>>> b60e2b0cca2c51b86a831732c1a432c19fd3c3f8
 @login_required
 def retirar_equipamento(request, equipamento_id):
     """
@@ -384,10 +402,12 @@ def retirar_equipamento(request, equipamento_id):
 
         3. **Validações na Retirada:**
            - Verifica se o login do usuário fornecido está registrado no sistema.
-           - Certifica-se de que o equipamento está disponível para retirada.
+           - Certifica-se de que o equipamento está disponível para retirada, no mesmo `UPDATE`
+             condicional que altera o status (ver `registrar_retirada`), evitando que dois
+             terminais retirem o mesmo equipamento simultaneamente.
         
         4. **Atualização do Equipamento e Registro de Transação:**
-           - Atualiza o status do equipamento para 'Retirado'.
+           - Atualiza o status e o estado de posse do equipamento para 'Retirado'.
            - Cria um registro de transação no banco de dados, associando o equipamento ao usuário.
 
         5. **Mensagens de Feedback:**
@@ -396,7 +416,7 @@ def retirar_equipamento(request, equipamento_id):
     Variáveis Locais:
         - equipamento (Equipamento): Instância do equipamento associado ao ID fornecido.
         - login_usuario (str): Login do usuário fornecido no formulário.
-        - usuario (Usuario): Instância do usuário obtida pela função `buscar_usuario`.
+        - usuario (Operador): Dados do usuário obtidos pela função `buscar_usuario`.
         - login_registrado (str): Nome de usuário da conta autenticada que realizou a operação.
 
     Exceções:
@@ -422,27 +442,16 @@ def retirar_equipamento(request, equipamento_id):
             messages.error(request, f"Usuário com login '{login_usuario}' não encontrado.")
             return redirect('retirar_equipamento', equipamento_id=equipamento_id)
 
-        # Verifica se o equipamento está disponível para retirada
-        if equipamento.status == 'Disponível':
-            # Atualiza o status do equipamento para "Retirado"
-            equipamento.status = 'Retirado'
-            equipamento.save()
-
-            # Cria o registro de transação
-            RegistroTransacao.objects.create(
-                equipamento=equipamento,
-                usuario_login=usuario.login_usuario,
-                tipo='Retirada',
-                login_registrado=login_registrado,
-                timestamp=timezone.now()
-            )
-
-            messages.success(request, f"Equipamento {equipamento.serial_number} retirado com sucesso!")
-            return redirect('index')
+        # Registra a retirada; a disponibilidade é verificada atomicamente no próprio UPDATE
+        try:
+            registrar_retirada(equipamento, usuario.login_usuario, login_registrado)
+        except OperacaoInvalida as erro:
+            # Equipamento não está disponível
+            messages.error(request, str(erro))
+            return redirect('retirar_equipamento', equipamento_id=equipamento_id)
 
-        # Equipamento não está disponível
-        messages.error(request, f"O equipamento {equipamento.serial_number} não está disponível para retirada.")
-        return redirect('retirar_equipamento', equipamento_id=equipamento_id)
+        messages.success(request, f"Equipamento {equipamento.serial_number} retirado com sucesso!")
+        return redirect('index')
 
     return render(request, 'retirar_equipamento.html', {'equipamento': equipamento})
 
@@ -477,10 +486,11 @@ def devolver_equipamento(request, equipamento_id):
 
         3. **Validações na Devolução:**
            - Verifica se o login do usuário fornecido está registrado no sistema.
-           - Certifica-se de que o usuário tentando devolver é o mesmo que realizou a retirada.
+           - Certifica-se de que o usuário tentando devolver é o que está com o equipamento
+             (campo `usuario_atual`, sem consultar o histórico de transações).
 
         4. **Atualização do Equipamento e Registro de Transação:**
-           - Atualiza o status do equipamento para 'Disponível'.
+           - Atualiza o status do equipamento para 'Disponível' e limpa o estado de posse.
            - Cria um registro de transação no banco de dados, associando o equipamento ao usuário.
 
         5. **Mensagens de Feedback:**
@@ -489,9 +499,8 @@ def devolver_equipamento(request, equipamento_id):
     Variáveis Locais:
         - equipamento (Equipamento): Instância do equipamento associado ao ID fornecido.
         - login_usuario (str): Login do usuário fornecido no formulário.
-        - usuario (Usuario): Instância do usuário obtida pela função `buscar_usuario`.
+        - usuario (Operador): Dados do usuário obtidos pela função `buscar_usuario`.
         - login_registrado (str): Nome de usuário da conta autenticada que realizou a operação.
-        - transacao_retirada (RegistroTransacao): Última transação de retirada associada ao equipamento.
 
     Exceções:
         - Retorna uma página 404 se o equipamento não for encontrado.
@@ -514,434 +523,383 @@ def devolver_equipamento(request, equipamento_id):
             messages.error(request, "Usuário não encontrado. Por favor, insira o login correto.")
             return redirect('devolver_equipamento', equipamento_id=equipamento_id)
 
-        # Busca a última transação de retirada para o equipamento
-        transacao_retirada = RegistroTransacao.objects.filter(
-            equipamento=equipamento, tipo='Retirada'
-        ).order_by('-timestamp').first()
-
-        # Verifica se o equipamento foi retirado pelo mesmo usuário
-        if transacao_retirada and transacao_retirada.usuario_login == login_usuario:
-            # Atualiza o status do equipamento e registra a devolução
-            equipamento.status = 'Disponível'
-            transacao = RegistroTransacao(
-                equipamento=equipamento,
-                usuario_login=login_usuario,
-                tipo='Devolução',
-                login_registrado=login_registrado,
-                timestamp=timezone.now()
-            )
-            equipamento.save()
-            transacao.save()
-            return redirect('index')
-        else:
+        # Registra a devolução; o UPDATE só é aplicado se o equipamento estiver com o mesmo usuário
+        try:
+            registrar_devolucao(equipamento, login_usuario, login_registrado)
+        except OperacaoInvalida as erro:
             # Exibe uma mensagem de erro se o login do usuário não corresponde ao da retirada
-            messages.error(request, "Erro na devolução. Este equipamento só pode ser devolvido pelo usuário que o retirou.")
+            messages.error(request, str(erro))
             return redirect('devolver_equipamento', equipamento_id=equipamento_id)
+        return redirect('index')
 
     return render(request, 'devolver_equipamento.html', {'equipamento': equipamento})
 
 
-def dashboard_view_porcentagem_modelo():
-    """
-    Gera dados para um gráfico de porcentagem de retiradas por modelo de equipamento.
+# Quantidade máxima de leituras aceitas em um único lote de retiradas ou devoluções.
+TAMANHO_MAXIMO_LOTE = 1000
 
-    Esta função consulta o banco de dados para calcular a quantidade de retiradas de equipamentos,
-    agrupadas por modelo. Os dados são formatados para serem utilizados em gráficos, como aqueles
-    criados com bibliotecas de visualização de dados.
 
-    Args:
-        Nenhum argumento é necessário, pois os dados são obtidos diretamente do banco de dados.
+def _ler_lote(request):
+    """
+    Lê os itens de um lote enviado em JSON por uma estação de coleta.
+
+    O corpo deve ser um objeto com a chave "itens", contendo objetos com "serial_number" e
+    "login_usuario" ou pares [serial_number, login_usuario].
 
     Returns:
-        str:
-            Uma string JSON contendo:
-            - "categories": Uma lista de modelos de equipamentos retirados.
-            - "series": Uma lista de porcentagens que representa a proporção de retiradas de cada modelo.
+        tuple: (itens, erro). `itens` é uma lista de dicionários; `erro` é uma mensagem ou None.
+    """
+    try:
+        itens = json.loads(request.body).get('itens')
+    except (ValueError, AttributeError):
+        return None, "O corpo da requisição deve ser um objeto JSON com a chave 'itens'."
+    if not isinstance(itens, list) or not itens:
+        return None, "Informe ao menos um item no lote."
+    if len(itens) > TAMANHO_MAXIMO_LOTE:
+        return None, f"O lote pode ter no máximo {TAMANHO_MAXIMO_LOTE} itens."
+
+    lidos = []
+    for item in itens:
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            item = {'serial_number': item[0], 'login_usuario': item[1]}
+        if not isinstance(item, dict) or not all(
+            isinstance(item.get(chave), str) and item[chave].strip() for chave in ('serial_number', 'login_usuario')
+        ):
+            return None, "Cada item deve informar 'serial_number' e 'login_usuario'."
+        lidos.append({
+            'serial_number': item['serial_number'].strip(),
+            'login_usuario': item['login_usuario'].strip(),
+        })
+    return lidos, None
 
-    Fluxo de Execução:
-        1. **Consulta ao Banco de Dados:**
-           - Filtra as transações do tipo "Retirada".
-           - Conta o número total de retiradas.
-
-        2. **Agrupamento por Modelo:**
-           - Agrupa as retiradas pelo campo `equipamento__modelo`.
-           - Conta o número de retiradas para cada modelo.
-
-        3. **Cálculo da Porcentagem:**
-           - Calcula a porcentagem de retiradas para cada modelo com base no total de retiradas.
-
-        4. **Formatação para Gráficos:**
-           - Organiza os modelos como categorias ("categories").
-           - Insere as porcentagens em uma lista ("series").
-
-    Exemplo de Saída:
-        Se houver os seguintes registros:
-            - Modelo A: 50 retiradas.
-            - Modelo B: 30 retiradas.
-            - Modelo C: 20 retiradas.
-        O JSON retornado será:
+
+def _resposta_lote(resultados):
+    """Resume os resultados de um lote de retiradas ou devoluções em uma resposta JSON."""
+    confirmadas = sum(1 for resultado in resultados if resultado['ok'])
+    return JsonResponse({
+        'confirmadas': confirmadas,
+        'rejeitadas': len(resultados) - confirmadas,
+        'resultados': resultados,
+    })
+
+
+@require_POST
+@login_required
+def retirar_equipamentos_em_lote(request):
+    """
+    API JSON para registrar, de uma só vez, as retiradas lidas por uma estação de coleta.
+
+    Corpo da requisição:
         ```json
-        {
-            "categories": ["Modelo A", "Modelo B", "Modelo C"],
-            "series": [50.0, 30.0, 20.0]
-        }
+        {"itens": [{"serial_number": "SN001", "login_usuario": "op1"}, ["SN002", "op2"]]}
         ```
 
-    Notas:
-        - A porcentagem é arredondada para duas casas decimais.
-        - Se não houver retiradas no banco de dados, as listas retornadas serão vazias.
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
-    Requisitos:
-        - O modelo `RegistroTransacao` deve ter os seguintes campos:
-          - `tipo` (str): Indica o tipo da transação (ex.: "Retirada").
-          - `equipamento__modelo` (str): O modelo do equipamento associado à transação.
+    Returns:
+        JsonResponse:
+            - 200 com "confirmadas", "rejeitadas" e "resultados" (um por item, na ordem enviada,
+              com "ok", "erro" e "transacao_id"), mesmo que alguns itens sejam rejeitados.
+            - 400 se o corpo da requisição for inválido.
+    """
+    itens, erro = _ler_lote(request)
+    if erro:
+        return JsonResponse({'erro': erro}, status=400)
+    return _resposta_lote(registrar_retiradas_em_lote(itens, request.user.username))
 
-    Dependências:
-        - `RegistroTransacao` (modelo do Django).
-        - `F` e `Count` (utilitários do Django ORM).
-        - `json.dumps` para converter o dicionário em uma string JSON.
 
+@require_POST
+@login_required
+def devolver_equipamentos_em_lote(request):
     """
-    # Consulta ao banco de dados: contagem de retiradas por modelo de equipamento
-    total_retiradas = RegistroTransacao.objects.filter(tipo="Retirada").count()
+    API JSON para registrar, de uma só vez, as devoluções lidas por uma estação de coleta.
 
-    # Agrupa por modelo de equipamento e conta as retiradas
-    retiradas_por_modelo = (
-        RegistroTransacao.objects.filter(tipo="Retirada")
-        .values(modelo=F('equipamento__modelo'))  # Substitui 'equipamento__modelo' no agrupamento
-        .annotate(total=Count('id'))  # Conta as retiradas por modelo
-    )
+    Aceita o mesmo corpo de `retirar_equipamentos_em_lote`. Cada item só é aceito se o equipamento
+    estiver retirado pelo usuário informado.
 
-    # Calcula a porcentagem de retiradas por modelo
-    data = {
-        "categories": [item['modelo'] for item in retiradas_por_modelo],
-        "series": [
-            round((item['total'] / total_retiradas) * 100, 2)
-            for item in retiradas_por_modelo
-        ],
-    }
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
-    # Retorna os dados como JSON
-    return json.dumps(data)
+    Returns:
+        JsonResponse:
+            - 200 com "confirmadas", "rejeitadas" e "resultados" (um por item, na ordem enviada).
+            - 400 se o corpo da requisição for inválido.
+    """
+    itens, erro = _ler_lote(request)
+    if erro:
+        return JsonResponse({'erro': erro}, status=400)
+    return _resposta_lote(registrar_devolucoes_em_lote(itens, request.user.username))
 
 
-def pda_retirado_por_turno():
+@login_required
+def dashboard_dados(request):
     """
-    Gera dados para um gráfico que exibe o número de equipamentos retirados por turno ao longo da semana.
+    Retorna em JSON todos os dados do dashboard (cards e gráficos).
 
-    Esta função filtra os registros de retirada, identifica o dia da semana e agrupa os dados pelo turno
-    do usuário associado. Os resultados são organizados no formato esperado por bibliotecas de gráficos
-    como Chart.js.
+    Aceita os filtros de `ler_filtro`: "periodo" (turno_atual, hoje ou ultimos_7_dias), "inicio",
+    "fim" e "turno". Sem filtros, devolve os widgets em cache do dashboard padrão.
 
     Args:
-        Nenhum argumento é necessário, pois os dados são obtidos diretamente do banco de dados.
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
     Returns:
-        str:
-            Uma string JSON contendo:
-            - "labels": Lista de nomes dos dias da semana ("Dom", "Seg", ..., "Sab").
-            - "datasets": Lista de dicionários, onde cada dicionário representa um turno e contém:
-              - "label": Nome do turno ("Manhã", "Tarde", "Noite").
-              - "data": Número de retiradas por dia da semana para o turno correspondente.
-              - "borderColor": Cor do gráfico para o turno.
-              - "fill": Booleano indicando se a área abaixo da linha deve ser preenchida.
+        JsonResponse: Objeto com as chaves "filtro", "info", "porcentagem_modelo", "controle" e
+            "por_turno", ou "erro" com status 400 se algum filtro for inválido.
+    """
+    try:
+        filtro = ler_filtro(request.GET)
+    except FiltroInvalido as erro:
+        return JsonResponse({'erro': str(erro)}, status=400)
 
-    Fluxo de Execução:
-        1. **Filtragem e Anotação:**
-           - Filtra registros no modelo `RegistroTransacao` para considerar apenas retiradas.
-           - Anota o dia da semana (como número) com base no campo `timestamp`.
-
-        2. **Preparação de Dados por Turno:**
-           - Itera pelos registros para organizar os dados por dia da semana e turno.
-           - Usa os logins de usuários para buscar seus respectivos turnos no modelo `Usuario`.
-           - Cria um dicionário que associa cada dia da semana aos totais de retiradas para cada turno.
-
-        3. **Formatação para Chart.js:**
-           - Define rótulos ("labels") com os dias da semana.
-           - Cria conjuntos de dados ("datasets") para cada turno, preenchendo os valores por dia.
-
-    Exemplo de Saída:
-        Se houver as seguintes retiradas:
-            - Segunda-feira: 5 retiradas no turno "Manhã", 3 no turno "Tarde".
-            - Terça-feira: 4 retiradas no turno "Noite".
-        O JSON retornado será:
-        ```json
-        {
-            "labels": ["Dom", "Seg", "Ter", "Qua", "Qui", "Sex", "Sab"],
-            "datasets": [
-                {
-                    "label": "Manhã",
-                    "data": [0, 5, 0, 0, 0, 0, 0],
-                    "borderColor": "rgba(75, 192, 192, 1)",
-                    "fill": false
-                },
-                {
-                    "label": "Tarde",
-                    "data": [0, 3, 0, 0, 0, 0, 0],
-                    "borderColor": "rgba(153, 102, 255, 1)",
-                    "fill": false
-                },
-                {
-                    "label": "Noite",
-                    "data": [0, 0, 4, 0, 0, 0, 0],
-                    "borderColor": "rgba(255, 99, 132, 1)",
-                    "fill": false
-                }
-            ]
-        }
-        ```
+    return JsonResponse(_dados_dashboard(calcular_dashboard(**filtro), filtro))
 
-    Notas:
-        - Os dias da semana são representados como números: 1 (domingo) a 7 (sábado).
-        - As cores dos turnos são definidas estaticamente e podem ser ajustadas conforme necessário.
-        - Se um usuário não for encontrado no modelo `Usuario`, o registro correspondente é ignorado.
-
-    Requisitos:
-        - O modelo `RegistroTransacao` deve ter os seguintes campos:
-          - `tipo` (str): Indica o tipo da transação (ex.: "Retirada").
-          - `timestamp` (datetime): Data e hora da transação.
-          - `usuario_login` (str): Login do usuário associado à transação.
-        - O modelo `Usuario` deve ter os seguintes campos:
-          - `login_usuario` (str): Login do usuário.
-          - `turno_usuario` (str): Turno do usuário ("T1", "T2", "T3").
-
-    Dependências:
-        - `RegistroTransacao` e `Usuario` (modelos do Django).
-        - `ExtractWeekDay` e `Count` (utilitários do Django ORM).
-        - `json.dumps` para converter o dicionário em uma string JSON.
-
-    """
-    # Filtrar registros apenas de retirada e anotar o dia da semana
-    registros = RegistroTransacao.objects.filter(
-        tipo='Retirada'  # Considerar apenas retiradas
-    ).annotate(
-        weekday=ExtractWeekDay('timestamp')
-    ).values(
-        'weekday', 'usuario_login'
-    ).annotate(
-        total=Count('id')
-    )
 
-    # Preparar os dados para o gráfico
-    data = {}
-    turnos = {'T1': 'Manhã', 'T2': 'Tarde', 'T3': 'Noite'}
-    for registro in registros:
-        weekday = registro['weekday']
-        login = registro['usuario_login']
-        usuario = Usuario.objects.filter(login_usuario=login).first()
-        if not usuario:
-            continue
-        turno = usuario.turno_usuario
-        total = registro['total']
+@login_required
+async def adashboard_dados(request):
+    """Versão assíncrona de `dashboard_dados`, usada sob ASGI (ver `acalcular_dashboard`)."""
+    try:
+        filtro = ler_filtro(request.GET)
+    except FiltroInvalido as erro:
+        return JsonResponse({'erro': str(erro)}, status=400)
+
+    return JsonResponse(_dados_dashboard(await acalcular_dashboard(**filtro), filtro))
+
+
+def _dados_dashboard(dashboard, filtro):
+    """Corpo da resposta de `dashboard_dados`."""
+    return {
+        "filtro": {
+            chave: timezone.localtime(valor).isoformat() if chave != 'turno' and valor else valor
+            for chave, valor in filtro.items()
+        },
+        "info": dashboard.info,
+        "porcentagem_modelo": dashboard.porcentagem_modelo,
+        "controle": dashboard.controle,
+        "por_turno": dashboard.por_turno,
+    }
+
+
+@login_required
+async def eventos_dashboard(request):
+    """
+    Fluxo Server-Sent Events com as atualizações do dashboard a cada retirada ou devolução.
+
+    Cada evento traz os contadores dos cards, os gráficos e as linhas adicionadas e removidas da
+    tabela de equipamentos em operação (ver `calcular_evento`). Os eventos são calculados uma vez
+    por processo e distribuídos a todas as conexões (ver `Difusor`).
+
+    O cliente informa a última transação que já exibe no parâmetro `desde` (na primeira conexão)
+    ou no cabeçalho `Last-Event-ID` (nas reconexões automáticas do navegador); as transações
+    posteriores a ela são enviadas em um primeiro evento. Se forem mais que `EVENTOS_LOTE`, o
+    evento traz "recarregar", e o cliente deve buscar o dashboard completo.
 
-        if weekday not in data:
-            data[weekday] = {t: 0 for t in turnos.values()}
-        data[weekday][turnos[turno]] += total
+    O fluxo só é servido sob ASGI (ex.: `uvicorn setup.asgi:application`); sob WSGI, a resposta é
+    204, que faz o navegador desistir da conexão.
 
-    # Organizar os dados para o Chart.js
-    labels = ["Dom", "Seg", "Ter", "Qua", "Qui", "Sex", "Sab"]
-    chart_data = {"labels": labels, "datasets": []}
-    cores = ['rgba(75, 192, 192, 1)', 'rgba(153, 102, 255, 1)', 'rgba(255, 99, 132, 1)']
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
+
+    Returns:
+        StreamingHttpResponse: Fluxo `text/event-stream`, ou HttpResponse 204 fora do ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
 
-    for i, turno in enumerate(turnos.values()):
-        dataset = {"label": turno, "data": [], "borderColor": cores[i], "fill": False}
-        for day in range(1, 8):  # Dias da semana: 1 (domingo) a 7 (sábado)
-            dataset["data"].append(data.get(day, {}).get(turno, 0))
-        chart_data["datasets"].append(dataset)
+    fila = await difusor.assinar()
+    desde = _inteiro(request.headers.get('Last-Event-ID') or request.GET.get('desde'), None)
+    pendente = None
+    if desde is not None and desde < difusor.ultima:
+        pendente = await sync_to_async(calcular_evento)(desde, difusor.ultima)
+        if pendente is not None:
+            pendente['recarregar'] = pendente['id'] < difusor.ultima
 
-    return json.dumps(chart_data)
+    resposta = StreamingHttpResponse(transmitir(fila, pendente), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'  # Impede que proxies como o nginx retenham os eventos.
+    return resposta
 
 
-def dashboard_view_pda():
+@login_required
+def listar_alertas_entrega(request):
     """
-    Gera dados para um gráfico de distribuição de equipamentos por status.
+    Lista em JSON os equipamentos em alerta de entrega (retirados além do limite configurado).
 
-    Esta função consulta o banco de dados para contar a quantidade de equipamentos 
-    em diferentes estados: "Em operação", "Disponível" e "Manutenção". Os dados são 
-    formatados para serem utilizados em gráficos de visualização, como pie charts ou bar charts.
+    Aceita os mesmos filtros de `dashboard_dados`, aplicados à data e ao turno da retirada.
 
     Args:
-        Nenhum argumento é necessário, pois os dados são obtidos diretamente do banco de dados.
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
 
     Returns:
-        str:
-            Uma string JSON contendo:
-            - "categories": Uma lista com os status de equipamentos ("Em operação", "Disponível", "Manutenção").
-            - "series": Uma lista com os totais de equipamentos para cada status.
+        JsonResponse: Objeto com "total" e "equipamentos", do atraso mais antigo para o mais recente.
+            Cada equipamento traz id, número de série, modelo, marca, operador, data da retirada
+            (ISO 8601) e horas decorridas desde a retirada.
+    """
+    try:
+        filtro = ler_filtro(request.GET)
+    except FiltroInvalido as erro:
+        return JsonResponse({'erro': str(erro)}, status=400)
 
-    Fluxo de Execução:
-        1. **Consulta ao Banco de Dados:**
-           - Conta o total de equipamentos com status "Retirado" (considerados "Em operação").
-           - Conta o total de equipamentos com status "Disponível".
-           - Conta o total de equipamentos com status "Manutenção".
-
-        2. **Formatação para Gráficos:**
-           - Organiza os status como categorias ("categories").
-           - Insere os totais correspondentes em uma lista ("series").
-
-    Exemplo de Saída:
-        Se houver os seguintes registros no banco:
-            - "Em operação": 50 equipamentos.
-            - "Disponível": 30 equipamentos.
-            - "Manutenção": 20 equipamentos.
-        O JSON retornado será:
-        ```json
+    agora = timezone.now()
+    equipamentos = [
         {
-            "categories": ["Em operação", "Disponível", "Manutenção"],
-            "series": [50, 30, 20]
+            'id': equipamento['id'],
+            'serial_number': equipamento['serial_number'],
+            'modelo': equipamento['modelo'],
+            'marca': equipamento['marca'],
+            'usuario': equipamento['usuario'],
+            'retirado_em': timezone.localtime(equipamento['ultima_retirada']).isoformat(),
+            'horas_retirado': round((agora - equipamento['ultima_retirada']).total_seconds() / 3600, 1),
         }
-        ```
+        for equipamento in consultar_equipamentos_em_atraso(agora, **filtro)
+    ]
+    return JsonResponse({'total': len(equipamentos), 'equipamentos': equipamentos})
 
-    Notas:
-        - Os nomes das categorias são estáticos e correspondem diretamente aos status dos equipamentos.
-        - Se não houver equipamentos cadastrados, as contagens serão 0.
 
-    Requisitos:
-        - O modelo `Equipamento` deve ter um campo `status` (str) que armazene o estado do equipamento.
 
-    Dependências:
-        - `Equipamento` (modelo do Django).
-        - `json.dumps` para converter o dicionário em uma string JSON.
+@login_required
+def exportar_transacoes(request):
     """
-    # Consulta ao banco de dados: contagem de retiradas por modelo de equipamento
-    total_em_operacao = Equipamento.objects.filter(status="Retirado").count()
-    total_disponivel = Equipamento.objects.filter(status="Disponível").count()
-    total_manutencao = Equipamento.objects.filter(status="Manutenção").count()
+    Exporta o histórico de transações (inclusive as arquivadas) em CSV ou XLSX, para auditoria.
 
-    # Dados para o gráfico
-    data = {
-        "categories": ["Em operação", "Disponível", "Manutenção"],
-        "series": [total_em_operacao, total_disponivel, total_manutencao],
-    }
+    Aceita os mesmos filtros de `dashboard_dados`, mais "equipamento" (número de série) e
+    "formato" ("csv", o padrão, ou "xlsx"). O arquivo é enviado em fluxo, à medida que as
+    transações são lidas em lotes (ver `linhas_do_historico`), sem carregar o período na memória.
+
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
+
+    Returns:
+        StreamingHttpResponse: O arquivo, como anexo, ou JsonResponse 400 se algum filtro for inválido.
+    """
+    formato = request.GET.get('formato') or 'csv'
+    if formato not in FORMATOS:
+        return JsonResponse({'erro': f"Formato '{formato}' inválido. Use {', '.join(FORMATOS)}."}, status=400)
+    try:
+        filtro = ler_filtro_exportacao(request.GET)
+    except FiltroInvalido as erro:
+        return JsonResponse({'erro': str(erro)}, status=400)
 
-    return json.dumps(data)
+    gerar = gerar_xlsx if formato == 'xlsx' else gerar_csv
+    blocos = gerar(linhas_do_historico(**filtro))
+    if isinstance(request, ASGIRequest):
+        blocos = em_fluxo_assincrono(blocos)
 
+    resposta = StreamingHttpResponse(blocos, content_type=FORMATOS[formato])
+    nome = f"transacoes_{timezone.localtime():%Y%m%d_%H%M}.{formato}"
+    resposta['Content-Disposition'] = f'attachment; filename="{nome}"'
+    return resposta
 
-def dashboard_info_view():
+
+@login_required
+def historico_equipamento(request, equipamento_id):
     """
-    Gera informações gerais para a dashboard do sistema, incluindo a quantidade de equipamentos 
-    em diferentes estados e a contagem de alertas de entrega.
+    View para exibir a linha do tempo de um equipamento.
 
-    Esta função realiza a consulta ao banco de dados para contar a quantidade de equipamentos em 
-    três status principais ("Em operação", "Disponível", "Manutenção") e também verifica os 
-    equipamentos retirados que ultrapassaram o tempo de operação esperado, gerando um alerta de 
-    entrega para aqueles que excederam o limite de tempo.
+    A página traz apenas os dados do equipamento; as transações são buscadas pelo navegador na
+    API da linha do tempo (`api.historico_equipamento`), uma página por vez.
 
     Args:
-        Nenhum argumento é necessário, pois os dados são obtidos diretamente do banco de dados.
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
+        equipamento_id (int): ID do equipamento.
 
     Returns:
-        str:
-            Uma string JSON contendo:
-            - "total_em_operacao": O total de equipamentos que estão "Retirados" e em operação.
-            - "total_disponivel": O total de equipamentos que estão "Disponíveis".
-            - "total_manutencao": O total de equipamentos que estão em "Manutenção".
-            - "total_alerta_entrega": O total de alertas de entrega gerados, ou seja, equipamentos 
-              que estão "Retirados" há mais de 10 horas sem devolução.
+        HttpResponse: Renderiza o template 'historico_equipamento.html'.
 
-    Fluxo de Execução:
-        1. **Consulta ao Banco de Dados:**
-           - Conta o total de equipamentos com status "Retirado" (em operação).
-           - Conta o total de equipamentos com status "Disponível".
-           - Conta o total de equipamentos com status "Manutenção".
-        
-        2. **Cálculo de Alertas:**
-           - Para cada equipamento retirado, verifica o tempo desde a última retirada.
-           - Se o tempo decorrido for superior a 10 horas, é gerado um alerta de entrega.
-        
-        3. **Organização de Dados para a Dashboard:**
-           - Organiza as contagens e alertas em um dicionário que será retornado como um JSON.
+    Raises:
+        Http404: Se o equipamento não existir.
+    """
+    equipamento = get_object_or_404(Equipamento, id=equipamento_id)
+    return render(request, 'historico_equipamento.html', {'equipamento': equipamento})
 
-    Exemplo de Saída:
-        Se houver 50 equipamentos "Em operação", 30 "Disponíveis", 20 "Em Manutenção" e 5 
-        equipamentos com alertas de entrega, o JSON retornado será:
-        ```json
-        {
-            "total_em_operacao": 50,
-            "total_disponivel": 30,
-            "total_manutencao": 20,
-            "total_alerta_entrega": 5
-        }
-        ```
+# Quantidade máxima de sugestões por requisição do autocompletar.
+LIMITE_MAXIMO_AUTOCOMPLETAR = 50
 
-    Notas:
-        - O cálculo do alerta de entrega é baseado na comparação do tempo desde a última retirada. 
-          Equipamentos que estão "Retirados" por mais de 10 horas geram um alerta.
-        - A verificação do tempo de retirada considera o fuso horário atual.
-
-    Requisitos:
-        - O modelo `Equipamento` deve ter um campo `status` (str) que armazene o estado do equipamento.
-        - O modelo `RegistroTransacao` deve ter uma relação com `Equipamento` e armazenar o campo `timestamp`.
-        - O campo `timestamp` no modelo `RegistroTransacao` deve ser do tipo `DateTimeField` para calcular o tempo decorrido.
-
-    Dependências:
-        - `Equipamento` (modelo do Django).
-        - `RegistroTransacao` (modelo do Django).
-        - `timezone.now()` para obter o horário atual.
-        - `timedelta` para calcular a diferença de tempo.
-    """
-    # Consulta ao banco de dados: contagem de retiradas por modelo de equipamento
-    total_em_operacao = Equipamento.objects.filter(status="Retirado").count()
-    total_disponivel = Equipamento.objects.filter(status="Disponível").count()
-    total_manutencao = Equipamento.objects.filter(status="Manutenção").count()
-
-    # Inicializa o contador de alertas
-    total_alerta_entrega = 0
-
-    # Verifica equipamentos retirados e calcula o tempo desde a retirada
-    retirados = Equipamento.objects.filter(status="Retirado")
-    for equipamento in retirados:
-        # Verifica se o equipamento está em operação e obtém a última vez que foi retirado
-        ultima_retirada = RegistroTransacao.objects.filter(equipamento=equipamento).aggregate(max_timestamp=Max('timestamp'))['max_timestamp']
-        
-        if ultima_retirada:
-            tempo_decorrido = timezone.now() - ultima_retirada  # Calcula o tempo desde a retirada
-            if tempo_decorrido > timedelta(hours=10):
-                total_alerta_entrega += 1
-
-    # Dados da dashboard
-    data = {
-        "total_em_operacao": total_em_operacao,
-        "total_disponivel": total_disponivel,
-        "total_manutencao": total_manutencao,
-        "total_alerta_entrega": total_alerta_entrega,
-    }
 
-<<<<<<< HEAD
-    return json.dumps(data)
+@login_required
+def listar_sugestoes(request, tipo):
+    """
+    Sugere logins de usuários ou números de série em JSON, para o autocompletar dos formulários.
 
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP, com os parâmetros
+                                'q' (texto digitado) e 'limite' (opcional).
+        tipo (str): 'usuarios' ou 'equipamentos'.
+
+    Returns:
+        JsonResponse: Objeto com "resultados", uma lista de {"valor", "rotulo"} em ordem alfabética.
+    """
+    limite = _inteiro(request.GET.get('limite'), settings.AUTOCOMPLETAR_LIMITE)
+    limite = min(max(limite, 1), LIMITE_MAXIMO_AUTOCOMPLETAR)
+    try:
+        sugestoes = autocompletar(tipo, request.GET.get('q', ''), limite)
+    except KeyError:
+        raise Http404("Tipo de autocompletar inválido.")
+    return JsonResponse({'resultados': [{'valor': valor, 'rotulo': rotulo} for valor, rotulo in sugestoes]})
 
 
+@login_required
 def importar_excel(request):
-    if request.method == 'POST' and request.FILES['excel_file']:
-        # Obtém o arquivo Excel
-        excel_file = request.FILES['excel_file']
-        
+    """
+    View para importar usuários em massa a partir de uma planilha Excel (.xlsx) ou CSV.
+
+    A planilha é lida em fluxo e os usuários são criados ou atualizados em lotes (ver
+    `importar_usuarios`). Linhas inválidas não impedem a importação das demais e são listadas
+    no relatório exibido ao final.
+
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
+
+    Returns:
+        HttpResponse: Renderiza o template 'importar_excel.html', com o relatório da importação
+                      quando um arquivo é enviado.
+    """
+    relatorio = None
+    if request.method == 'POST':
+        arquivo = request.FILES.get('excel_file')
+        if arquivo is None:
+            messages.error(request, "Selecione um arquivo para importar.")
+            return redirect('importar_excel')
+
         try:
-            # Lê o arquivo Excel
-            df = pd.read_excel(excel_file)
-
-            # Verifica se as colunas necessárias estão presentes
-            required_columns = ['login_usuario', 'nome', 'email']  # Ajuste conforme necessário
-            if not all(col in df.columns for col in required_columns):
-                messages.error(request, "O arquivo Excel está no formato incorreto.")
-                return redirect('importar_excel')
-
-            # Itera sobre as linhas e insere os dados no banco
-            for _, row in df.iterrows():
-                Usuario.objects.create(
-                    login_usuario=row['login_usuario'],
-                    nome=row['nome'],
-                    email=row['email'],
-                )
-            messages.success(request, "Usuários importados com sucesso!")
-            return redirect('index')
-        
-        except Exception as e:
-            messages.error(request, f"Erro ao importar o arquivo: {str(e)}")
+            relatorio = importar_usuarios(arquivo, arquivo.name)
+        except PlanilhaInvalida as erro:
+            messages.error(request, str(erro))
             return redirect('importar_excel')
-    
-    return render(request, 'importar_excel.html')
-=======
-    return json.dumps(data)
->>>>>>> b60e2b0cca2c51b86a831732c1a432c19fd3c3f8
+
+        messages.success(request, f"{relatorio.importadas} usuário(s) importado(s) com sucesso!")
+
+    return render(request, 'importar_excel.html', {'relatorio': relatorio})
+
+
+@login_required
+def importar_planilha_equipamentos(request):
+    """
+    View para cadastrar equipamentos em massa a partir de uma planilha Excel (.xlsx) ou CSV.
+
+    Equipamentos já cadastrados são ignorados; linhas inválidas não impedem a importação das
+    demais e são listadas no relatório exibido ao final (ver `importar_equipamentos`).
+
+    Args:
+        request (HttpRequest): Objeto que contém os dados da solicitação HTTP.
+
+    Returns:
+        HttpResponse: Renderiza o template 'importar_equipamentos.html', com o relatório da
+                      importação quando um arquivo é enviado.
+    """
+    relatorio = None
+    if request.method == 'POST':
+        arquivo = request.FILES.get('excel_file')
+        if arquivo is None:
+            messages.error(request, "Selecione um arquivo para importar.")
+            return redirect('importar_equipamentos')
+
+        try:
+            relatorio = importar_equipamentos(arquivo, arquivo.name)
+        except PlanilhaInvalida as erro:
+            messages.error(request, str(erro))
+            return redirect('importar_equipamentos')
+
+        messages.success(request, f"{relatorio.importadas} equipamento(s) cadastrado(s) com sucesso!")
+
+    return render(request, 'importar_equipamentos.html', {'relatorio': relatorio})
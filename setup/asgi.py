@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+# Serve as páginas de leitura pelas views assíncronas (ver VIEWS_ASSINCRONAS em settings.py).
+os.environ.setdefault('VIEWS_ASSINCRONAS', '1')
 
 application = get_asgi_application()
@@ -61,17 +61,143 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'setup.wsgi.application'
 
+# Views assíncronas (adashboard_dados, abuscar_equipamentos) no lugar das síncronas. Ativado
+# por setup/asgi.py: sob WSGI, cada view assíncrona precisaria de um laço de eventos próprio.
+VIEWS_ASSINCRONAS = os.getenv('VIEWS_ASSINCRONAS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# Conexões persistentes do SQLite: reaproveitadas por DB_CONN_MAX_AGE segundos, em vez de uma
+# conexão (e os PRAGMAs de SQLITE_PRAGMAS) por requisição. Sob ASGI, cada requisição usa threads
+# diferentes e as conexões persistentes não seriam reaproveitadas, apenas acumuladas; por isso
+# ficam desativadas.
+DB_CONN_MAX_AGE = 0 if VIEWS_ASSINCRONAS else int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# DB_ENGINE=postgresql usa o PostgreSQL (DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT) com o
+# pool de conexões do psycopg; caso contrário, o SQLite em DB_NAME.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'checkit'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+            # As conexões vêm do pool (de cada processo), que dispensa as conexões persistentes e
+            # também as reaproveita sob ASGI.
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN', 2)),
+                    'max_size': int(os.getenv('DB_POOL_MAX', 10)),
+                    'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),  # Segundos aguardando uma conexão livre
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_MAX_AGE > 0,
+            'OPTIONS': {
+                # Transações de escrita reservam o banco no BEGIN. Com o modo padrão (DEFERRED),
+                # uma transação que lê antes de escrever falha com "database is locked" na escrita,
+                # sem respeitar o busy_timeout, se outra conexão estiver escrevendo.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# PRAGMAs aplicados a cada nova conexão com o SQLite (check/banco.py).
+# O busy_timeout vem primeiro para valer também para a troca do journal_mode.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,  # Milissegundos aguardando outra escrita antes de "database is locked"
+    'journal_mode': 'WAL',  # Leituras não bloqueiam a escrita, e vice-versa
+    'synchronous': 'NORMAL',  # Sincroniza o disco apenas nos checkpoints do WAL
+    'mmap_size': 256 * 1024 * 1024,  # Bytes do arquivo lidos por memória mapeada
+    'cache_size': -64 * 1024,  # Cache de páginas por conexão, em KiB (valor negativo)
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# O cache local (locmem) é exclusivo de cada processo. Em implantações com vários processos,
+# configure um backend compartilhado (ex.: Redis ou Memcached) pelas variáveis de ambiente
+# para que a invalidação do dashboard alcance todos os workers.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'check-it'),
     }
 }
 
+# Tempo de vida (segundos) dos widgets do dashboard e da versão usada nas ETags. As escritas
+# invalidam os widgets imediatamente nos processos que compartilham o cache; nos demais (ex.: outros
+# workers e comandos de gerenciamento, com o LocMemCache padrão), aparecem após esse tempo.
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# O contador de alertas de entrega depende da passagem do tempo e expira mais cedo.
+DASHBOARD_ALERTA_CACHE_TIMEOUT = 60
+
+# Segundos que o navegador pode reutilizar a página inicial, que não contém dados (os widgets
+# são buscados na API do dashboard e revalidados pela ETag).
+PAGINA_INICIAL_CACHE_MAX_AGE = 300
+
+# Quantidade de dias (terminando hoje) considerados no gráfico de retiradas por dia da semana e turno.
+DASHBOARD_POR_TURNO_DIAS = 7
+
+# Hora (local) de início de cada turno; um turno termina quando o seguinte começa. Define o
+# período "Este turno" dos filtros do dashboard.
+HORARIO_INICIO_TURNOS = {'T1': 6, 'T2': 14, 'T3': 22}
+
+# Atualizações ao vivo do dashboard (Server-Sent Events, servidas sob ASGI; check/eventos.py).
+EVENTOS_INTERVALO = 1  # Segundos entre as verificações de novas transações, por processo
+EVENTOS_KEEPALIVE = 15  # Segundos sem eventos até enviar um comentário que mantém a conexão
+EVENTOS_FILA = 100  # Eventos pendentes por conexão antes de encerrá-la por lentidão
+EVENTOS_LOTE = 500  # Transações consideradas por evento
+EVENTOS_ESPERA_LACUNA = 5  # Segundos aguardando uma transação de id menor ainda não confirmada
+EVENTOS_RETENCAO_LACUNA = 300  # Segundos verificando ids pulados; se aparecerem, os clientes recarregam
+
+# Autocompletar de logins e números de série: cache LRU em memória de cada processo.
+AUTOCOMPLETAR_CACHE_TAMANHO = 2048  # Prefixos mantidos em cache
+AUTOCOMPLETAR_CACHE_TIMEOUT = 30  # Segundos até uma sugestão em cache expirar
+AUTOCOMPLETAR_LIMITE = 10  # Sugestões retornadas quando o cliente não informa o limite
+
+# Quantidade máxima de operadores mantidos no diretório em memória de cada processo (check/diretorio.py).
+DIRETORIO_OPERADORES_TAMANHO = 10_000
+# Segundos até cada processo recarregar o diretório, para receber as alterações feitas por processos
+# que não compartilham o cache (ex.: outros workers, com o LocMemCache padrão).
+DIRETORIO_OPERADORES_TIMEOUT = 60
+
+
+# Meses de histórico mantidos na tabela de transações; as transações anteriores são movidas para o
+# arquivo pelo comando `arquivar_transacoes` (check/arquivo.py).
+ARQUIVO_TRANSACOES_MESES = 12
+
+
+# Alerta de entrega: horas que um equipamento pode ficar retirado antes de ser considerado atrasado.
+# Limites por modelo têm prioridade sobre limites pelo turno do operador, que têm prioridade
+# sobre o limite padrão. Ex.: {'Rádio T470': 12} e {'T3': 8}.
+ALERTA_ENTREGA_HORAS = 10
+ALERTA_ENTREGA_HORAS_POR_MODELO = {}
+ALERTA_ENTREGA_HORAS_POR_TURNO = {}
+
+
+# API (Django REST framework): autenticação pela sessão do site e acesso apenas a usuários logados.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
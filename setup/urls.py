@@ -1,7 +1,18 @@
 from django.contrib import admin
 from django.urls import path, include
+from drf_yasg import openapi
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+# Documentação da API (Swagger), disponível para usuários autenticados.
+schema_view = get_schema_view(
+    openapi.Info(title="Check-It API", default_version='v1'),
+    public=False,
+    permission_classes=[permissions.IsAuthenticated],
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='api_docs'),
     path('', include('check.urls')),
-]
\ No newline at end of file
+]